@@ -5,11 +5,38 @@ import logging
 import time
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence
 from collections import defaultdict, deque
+from itertools import islice
 
 logger = logging.getLogger(__name__)
 
+try:  # optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:  # optional dependency
+    import ijson
+except ImportError:  # pragma: no cover - optional dependency
+    ijson = None
+
+_TURN_OFF_ACTION = {"action_type": "turn_off", "params": {}}
+_LIGHTING_ACTION = {"action_type": "set_brightness", "params": {"value": 70}}
+_NOTIFY_ACTION = {"action_type": "notify", "params": {}}
+_REDUCE_LOAD_ACTION = {"action_type": "reduce_load", "params": {"target_power": 3000}}
+
+
+def _build_action(template: Dict[str, Any], **params: Any) -> Dict[str, Any]:
+    action = template.copy()
+    action["params"] = {**template["params"], **params}
+    return action
+
+
+def _stream_items(filepath: str, prefix: str) -> Iterator[Any]:
+    with open(filepath, "rb") as f:
+        yield from ijson.items(f, prefix, use_float=True)
+
 
 @dataclass
 class EnergyProfile:
@@ -44,26 +71,42 @@ class EnergySuggestion:
     priority: int
     actions: List[Dict[str, Any]] = field(default_factory=list)
     created_at: float = field(default_factory=time.time)
+    _dict_cache: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if name != "_dict_cache":
+            object.__setattr__(self, "_dict_cache", None)
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "suggestion_id": self.suggestion_id,
-            "title": self.title,
-            "description": self.description,
-            "potential_savings": self.potential_savings,
-            "priority": self.priority,
-            "actions": self.actions,
-            "created_at": self.created_at,
-        }
+        # Suggestions are rarely updated, so the serialized form is built once and
+        # reused until a field is assigned; callers get their own copy.
+        if self._dict_cache is None:
+            self._dict_cache = {
+                "suggestion_id": self.suggestion_id,
+                "title": self.title,
+                "description": self.description,
+                "potential_savings": self.potential_savings,
+                "priority": self.priority,
+                "actions": self.actions,
+                "created_at": self.created_at,
+            }
+        return dict(self._dict_cache)
 
 
 class EnergyOptimizer:
     def __init__(self) -> None:
         self.energy_profiles: Dict[str, EnergyProfile] = {}
-        self.consumption_history: Dict[str, deque] = {}
+        self.consumption_history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=24 * 7))
         self.suggestions: Dict[str, EnergySuggestion] = {}
         self.total_daily_consumption: deque = deque(maxlen=365)
         self.optimization_rules: List[Dict[str, Any]] = []
+        self._last_power: Dict[str, float] = {}
+        self._current_total_power = 0.0
+        # Insertion-ordered indexes (dict keys) so suggestions follow the
+        # order of energy_profiles, as a full scan would.
+        self._lighting_ids: Dict[str, None] = {}
+        self._high_power_ids: Dict[str, None] = {}
         self._init_default_rules()
 
     def _init_default_rules(self) -> None:
@@ -103,11 +146,7 @@ class EnergyOptimizer:
         timestamp: Optional[float] = None
     ) -> None:
         timestamp = timestamp or time.time()
-        dt = datetime.fromtimestamp(timestamp)
-        hour = dt.hour
-
-        if device_id not in self.consumption_history:
-            self.consumption_history[device_id] = deque(maxlen=24 * 7)
+        hour = time.localtime(timestamp).tm_hour
 
         self.consumption_history[device_id].append({
             "timestamp": timestamp,
@@ -115,14 +154,60 @@ class EnergyOptimizer:
             "hour": hour,
         })
 
+        prev = self._last_power.get(device_id, 0.0)
+        self._current_total_power += power - prev
+        self._last_power[device_id] = power
+
         self._update_energy_profile(device_id, power, hour)
 
+    def record_consumption_batch(
+        self,
+        device_id: str,
+        powers: Sequence[float],
+        timestamps: Optional[Sequence[Optional[float]]] = None
+    ) -> None:
+        if timestamps is not None and len(timestamps) != len(powers):
+            raise ValueError("powers and timestamps must have the same length")
+        if not powers:
+            return
+
+        now = time.time()
+        if timestamps is None:
+            timestamps = [now] * len(powers)
+
+        profile = self.energy_profiles.get(device_id)
+        localtime = time.localtime
+        records = []
+        for power, timestamp in zip(powers, timestamps):
+            timestamp = timestamp or now
+            hour = localtime(timestamp).tm_hour
+            records.append({
+                "timestamp": timestamp,
+                "power": power,
+                "hour": hour,
+            })
+            if profile is not None:
+                self._apply_hourly_sample(profile, power, hour)
+
+        self.consumption_history[device_id].extend(records)
+
+        last_power = records[-1]["power"]
+        prev = self._last_power.get(device_id, 0.0)
+        self._current_total_power += last_power - prev
+        self._last_power[device_id] = last_power
+
+        if profile is not None:
+            profile.avg_daily_consumption = sum(profile.avg_hourly_consumption.values())
+
     def _update_energy_profile(self, device_id: str, power: float, hour: int) -> None:
         if device_id not in self.energy_profiles:
             return
 
         profile = self.energy_profiles[device_id]
+        self._apply_hourly_sample(profile, power, hour)
+        profile.avg_daily_consumption = sum(profile.avg_hourly_consumption.values())
 
+    def _apply_hourly_sample(self, profile: EnergyProfile, power: float, hour: int) -> None:
         if hour not in profile.avg_hourly_consumption:
             profile.avg_hourly_consumption[hour] = 0.0
 
@@ -130,8 +215,6 @@ class EnergyOptimizer:
             profile.avg_hourly_consumption[hour] * 0.9 + power * 0.1
         )
 
-        profile.avg_daily_consumption = sum(profile.avg_hourly_consumption.values())
-
         if power > profile.base_power * 1.5:
             if hour not in profile.peak_hours:
                 profile.peak_hours.append(hour)
@@ -153,10 +236,22 @@ class EnergyOptimizer:
             peak_hours=[],
             standby_power=base_power * 0.1,
         )
-        self.energy_profiles[device_id] = profile
+        self._register_profile(profile)
         logger.info(f"Added energy profile for device: {device_name}")
         return profile
 
+    def _register_profile(self, profile: EnergyProfile) -> None:
+        device_id = profile.device_id
+        self.energy_profiles[device_id] = profile
+        if "light" in device_id.lower() or "灯" in profile.device_name:
+            self._lighting_ids[device_id] = None
+        else:
+            self._lighting_ids.pop(device_id, None)
+        if profile.base_power > 1000:
+            self._high_power_ids[device_id] = None
+        else:
+            self._high_power_ids.pop(device_id, None)
+
     def calculate_daily_consumption(self, date: Optional[datetime] = None) -> Dict[str, float]:
         date = date or datetime.now()
         date_str = date.strftime("%Y-%m-%d")
@@ -213,18 +308,24 @@ class EnergyOptimizer:
         current_time = time.time()
         threshold_seconds = threshold_hours * 3600
 
+        consumption_history = self.consumption_history
+
         for device_id, profile in self.energy_profiles.items():
-            history = self.consumption_history.get(device_id, deque())
-            if len(history) < 10:
+            history = consumption_history.get(device_id)
+            if history is None or len(history) < 10:
                 continue
 
-            recent_power = [r["power"] for r in list(history)[-10:]]
-            avg_power = sum(recent_power) / len(recent_power)
+            base = profile.base_power
+            standby = profile.standby_power
+            name = profile.device_name
+
+            avg_power = sum(r["power"] for r in islice(history, len(history) - 10, None)) / 10
 
-            if avg_power <= profile.standby_power * 1.2:
+            if avg_power <= standby * 1.2:
+                high_power = base * 0.5
                 last_high_power = None
                 for record in reversed(history):
-                    if record["power"] > profile.base_power * 0.5:
+                    if record["power"] > high_power:
                         last_high_power = record["timestamp"]
                         break
 
@@ -232,16 +333,11 @@ class EnergyOptimizer:
                     import uuid
                     suggestion = EnergySuggestion(
                         suggestion_id=str(uuid.uuid4()),
-                        title=f"关闭待机设备: {profile.device_name}",
-                        description=f"{profile.device_name} 已待机超过 {threshold_hours} 小时",
-                        potential_savings=profile.standby_power * 24 / 1000,
+                        title=f"关闭待机设备: {name}",
+                        description=f"{name} 已待机超过 {threshold_hours} 小时",
+                        potential_savings=standby * 24 / 1000,
                         priority=2,
-                        actions=[
-                            {
-                                "action_type": "turn_off",
-                                "params": {"target": device_id},
-                            }
-                        ],
+                        actions=[_build_action(_TURN_OFF_ACTION, target=device_id)],
                     )
                     suggestions.append(suggestion)
 
@@ -250,29 +346,25 @@ class EnergyOptimizer:
     def _optimize_lighting(self, rule: Dict[str, Any]) -> List[EnergySuggestion]:
         suggestions = []
         current_hour = datetime.now().hour
-
-        lighting_profiles = [
-            (did, p) for did, p in self.energy_profiles.items()
-            if "light" in did.lower() or "灯" in p.device_name
-        ]
-
-        for device_id, profile in lighting_profiles:
-            if current_hour in [6, 7, 8, 17, 18, 19]:
-                import uuid
-                suggestion = EnergySuggestion(
-                    suggestion_id=str(uuid.uuid4()),
-                    title=f"优化照明: {profile.device_name}",
-                    description="根据当前时间段，建议调整照明亮度以节能",
-                    potential_savings=profile.base_power * 0.3 * 6 / 1000,
-                    priority=1,
-                    actions=[
-                        {
-                            "action_type": "set_brightness",
-                            "params": {"target": device_id, "value": 70},
-                        }
-                    ],
-                )
-                suggestions.append(suggestion)
+        if current_hour not in (6, 7, 8, 17, 18, 19):
+            return suggestions
+
+        energy_profiles = self.energy_profiles
+        for device_id in self._lighting_ids:
+            # Profiles removed from energy_profiles directly are skipped.
+            profile = energy_profiles.get(device_id)
+            if profile is None:
+                continue
+            import uuid
+            suggestion = EnergySuggestion(
+                suggestion_id=str(uuid.uuid4()),
+                title=f"优化照明: {profile.device_name}",
+                description="根据当前时间段，建议调整照明亮度以节能",
+                potential_savings=profile.base_power * 0.3 * 6 / 1000,
+                priority=1,
+                actions=[_build_action(_LIGHTING_ACTION, target=device_id)],
+            )
+            suggestions.append(suggestion)
 
         return suggestions
 
@@ -282,24 +374,27 @@ class EnergyOptimizer:
         peak_hours = [10, 11, 12, 18, 19, 20, 21]
 
         if current_hour in peak_hours:
-            for device_id, profile in self.energy_profiles.items():
-                if profile.base_power > 1000 and device_id in self.consumption_history:
-                    history = list(self.consumption_history[device_id])
-                    if history and history[-1]["power"] > profile.base_power * 0.8:
+            energy_profiles = self.energy_profiles
+            consumption_history = self.consumption_history
+            for device_id in self._high_power_ids:
+                history = consumption_history.get(device_id)
+                profile = energy_profiles.get(device_id)
+                if history and profile is not None:
+                    base = profile.base_power
+                    name = profile.device_name
+                    if history[-1]["power"] > base * 0.8:
                         import uuid
                         suggestion = EnergySuggestion(
                             suggestion_id=str(uuid.uuid4()),
-                            title=f"错峰使用: {profile.device_name}",
+                            title=f"错峰使用: {name}",
                             description="当前为用电高峰期，建议将此设备的使用时间调整到低谷期",
-                            potential_savings=profile.base_power * 0.2 / 1000,
+                            potential_savings=base * 0.2 / 1000,
                             priority=2,
                             actions=[
-                                {
-                                    "action_type": "notify",
-                                    "params": {
-                                        "message": f"{profile.device_name} 在用电高峰期运行，建议延迟使用"
-                                    },
-                                }
+                                _build_action(
+                                    _NOTIFY_ACTION,
+                                    message=f"{name} 在用电高峰期运行，建议延迟使用",
+                                )
                             ],
                         )
                         suggestions.append(suggestion)
@@ -312,10 +407,7 @@ class EnergyOptimizer:
         peak_hours = [18, 19, 20]
 
         if current_hour in peak_hours:
-            total_power = 0.0
-            for history in self.consumption_history.values():
-                if history:
-                    total_power += history[-1]["power"]
+            total_power = self._current_total_power
 
             if total_power > 5000:
                 import uuid
@@ -325,12 +417,7 @@ class EnergyOptimizer:
                     description=f"当前总功率 {total_power}W 较高，建议关闭非必要设备",
                     potential_savings=(total_power - 3000) / 1000,
                     priority=3,
-                    actions=[
-                        {
-                            "action_type": "reduce_load",
-                            "params": {"target_power": 3000},
-                        }
-                    ],
+                    actions=[_build_action(_REDUCE_LOAD_ACTION)],
                 )
                 suggestions.append(suggestion)
 
@@ -363,17 +450,29 @@ class EnergyOptimizer:
         }
 
     def save_to_file(self, filepath: str) -> None:
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        data = self.to_dict()
+        if orjson is not None:
+            with open(filepath, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(filepath, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
         logger.info(f"Energy optimizer data saved to {filepath}")
 
     @classmethod
     def load_from_file(cls, filepath: str) -> "EnergyOptimizer":
         optimizer = cls()
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        if ijson is not None:
+            profiles = _stream_items(filepath, "energy_profiles.item")
+            suggestions = _stream_items(filepath, "suggestions.item")
+        else:
+            with open(filepath, "rb") as f:
+                raw = f.read()
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+            profiles = data.get("energy_profiles", [])
+            suggestions = data.get("suggestions", [])
 
-        for profile_data in data.get("energy_profiles", []):
+        for profile_data in profiles:
             profile = EnergyProfile(
                 device_id=profile_data["device_id"],
                 device_name=profile_data["device_name"],
@@ -384,9 +483,9 @@ class EnergyOptimizer:
                 standby_power=profile_data.get("standby_power", 0.0),
                 efficiency_score=profile_data.get("efficiency_score", 1.0),
             )
-            optimizer.energy_profiles[profile.device_id] = profile
+            optimizer._register_profile(profile)
 
-        for suggestion_data in data.get("suggestions", []):
+        for suggestion_data in suggestions:
             suggestion = EnergySuggestion(
                 suggestion_id=suggestion_data["suggestion_id"],
                 title=suggestion_data["title"],
@@ -1,15 +1,39 @@
 from __future__ import annotations
 
+import heapq
 import json
 import logging
 import time
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
-from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from collections import defaultdict, deque
+from itertools import islice
 
 logger = logging.getLogger(__name__)
 
+try:  # optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:  # optional dependency
+    import ijson
+except ImportError:  # pragma: no cover - optional dependency
+    ijson = None
+
+PATTERN_HISTORY_SIZE = 200
+
+
+def _stream_items(filepath: str, prefix: str, kvitems: bool = False) -> Iterator[Any]:
+    parse = ijson.kvitems if kvitems else ijson.items
+    with open(filepath, "rb") as f:
+        yield from parse(f, prefix, use_float=True)
+
+
+def _pattern_buffer(values: Any = ()) -> deque:
+    return deque(values, maxlen=PATTERN_HISTORY_SIZE)
+
 
 @dataclass
 class Prediction:
@@ -21,18 +45,28 @@ class Prediction:
     reason: str
     suggested_actions: List[Dict[str, Any]] = field(default_factory=list)
     created_at: float = field(default_factory=time.time)
+    _dict_cache: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if name != "_dict_cache":
+            object.__setattr__(self, "_dict_cache", None)
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "prediction_id": self.prediction_id,
-            "prediction_type": self.prediction_type,
-            "confidence": self.confidence,
-            "predicted_value": self.predicted_value,
-            "predicted_time": self.predicted_time,
-            "reason": self.reason,
-            "suggested_actions": self.suggested_actions,
-            "created_at": self.created_at,
-        }
+        # Predictions are rarely updated, so the serialized form is built once and
+        # reused until a field is assigned; callers get their own copy.
+        if self._dict_cache is None:
+            self._dict_cache = {
+                "prediction_id": self.prediction_id,
+                "prediction_type": self.prediction_type,
+                "confidence": self.confidence,
+                "predicted_value": self.predicted_value,
+                "predicted_time": self.predicted_time,
+                "reason": self.reason,
+                "suggested_actions": self.suggested_actions,
+                "created_at": self.created_at,
+            }
+        return dict(self._dict_cache)
 
 
 class PredictiveService:
@@ -40,17 +74,33 @@ class PredictiveService:
         self.predictions: Dict[str, Prediction] = {}
         self.prediction_history: List[Prediction] = []
         self.user_patterns: Dict[str, Dict[str, Any]] = {}
-        self.device_usage: Dict[str, deque] = {}
+        self.device_usage: Dict[str, deque] = defaultdict(lambda: deque(maxlen=100))
+        self._hour_counts: Dict[str, List[int]] = defaultdict(lambda: [0] * 24)
+        self._active_counts: Dict[str, int] = defaultdict(int)
+        self._prediction_ages: Dict[str, float] = {}
+        self._prediction_heap: List[Tuple[float, str]] = []
         self._init_patterns()
 
     def _init_patterns(self) -> None:
         self.user_patterns = {
-            "arrival_times": {"morning": [], "evening": []},
-            "departure_times": {"morning": [], "evening": []},
-            "activity_times": {},
+            "arrival_times": {"morning": _pattern_buffer(), "evening": _pattern_buffer()},
+            "departure_times": {"morning": _pattern_buffer(), "evening": _pattern_buffer()},
+            "activity_times": defaultdict(_pattern_buffer),
         }
         logger.info("Initialized predictive service patterns")
 
+    @staticmethod
+    def _monotonic_created(prediction: Prediction) -> float:
+        # Ages are measured on the monotonic clock; created_at stays wall-clock
+        # so persisted predictions keep their meaning across restarts.
+        return time.monotonic() - max(0.0, time.time() - prediction.created_at)
+
+    def _track_prediction(self, prediction: Prediction) -> None:
+        created = self._monotonic_created(prediction)
+        self.predictions[prediction.prediction_id] = prediction
+        self._prediction_ages[prediction.prediction_id] = created
+        heapq.heappush(self._prediction_heap, (created, prediction.prediction_id))
+
     def record_user_activity(
         self,
         user_id: str,
@@ -58,13 +108,11 @@ class PredictiveService:
         timestamp: Optional[float] = None
     ) -> None:
         timestamp = timestamp or time.time()
-        dt = datetime.fromtimestamp(timestamp)
-        hour = dt.hour
-        day_of_week = dt.weekday()
+        local = time.localtime(timestamp)
+        hour = local.tm_hour
+        day_of_week = local.tm_wday
 
         key = f"{user_id}_{activity_type}_{day_of_week}_{hour}"
-        if key not in self.user_patterns["activity_times"]:
-            self.user_patterns["activity_times"][key] = []
         self.user_patterns["activity_times"][key].append(timestamp)
 
         if activity_type == "arrival":
@@ -86,13 +134,24 @@ class PredictiveService:
     ) -> None:
         timestamp = timestamp or time.time()
 
-        if device_id not in self.device_usage:
-            self.device_usage[device_id] = deque(maxlen=100)
+        hour = time.localtime(timestamp).tm_hour
+
+        history = self.device_usage[device_id]
+        hour_counts = self._hour_counts[device_id]
+        active_delta = 1 if state == "on" else 0
+        if len(history) == history.maxlen:
+            evicted = history[0]
+            hour_counts[evicted["hour"]] -= 1
+            if evicted["state"] == "on":
+                active_delta -= 1
 
-        self.device_usage[device_id].append({
+        history.append({
             "timestamp": timestamp,
             "state": state,
+            "hour": hour,
         })
+        hour_counts[hour] += 1
+        self._active_counts[device_id] += active_delta
 
     def predict_user_arrival(
         self,
@@ -103,20 +162,25 @@ class PredictiveService:
         if len(arrivals) < 3:
             return None
 
-        arrival_times = [datetime.fromtimestamp(t) for t in arrivals[-10:]]
-        hours = [dt.hour + dt.minute / 60 for dt in arrival_times]
-        avg_hour = sum(hours) / len(hours)
+        recent = list(islice(arrivals, max(len(arrivals) - 10, 0), None))
+        total_hours = 0.0
+        for t in recent:
+            local = time.localtime(t)
+            total_hours += local.tm_hour + local.tm_min / 60
+        avg_hour = total_hours / len(recent)
 
-        predicted_dt = datetime.now().replace(
+        now = datetime.now()
+        predicted_dt = now.replace(
             hour=int(avg_hour),
             minute=int((avg_hour % 1) * 60),
             second=0,
             microsecond=0
         )
 
-        if predicted_dt < datetime.now():
+        if predicted_dt < now:
             predicted_dt += timedelta(days=1)
 
+        predicted_iso = predicted_dt.isoformat()
         confidence = min(len(arrivals) / 10, 0.9)
 
         import uuid
@@ -124,7 +188,7 @@ class PredictiveService:
             prediction_id=str(uuid.uuid4()),
             prediction_type="user_arrival",
             confidence=confidence,
-            predicted_value=predicted_dt.isoformat(),
+            predicted_value=predicted_iso,
             predicted_time=predicted_dt.timestamp(),
             reason=f"基于历史数据，用户{user_id}通常在{int(avg_hour)}点回家",
             suggested_actions=[
@@ -132,13 +196,13 @@ class PredictiveService:
                     "action_type": "prepare_home",
                     "params": {
                         "user_id": user_id,
-                        "expected_time": predicted_dt.isoformat(),
+                        "expected_time": predicted_iso,
                     },
                 }
             ],
         )
 
-        self.predictions[prediction.prediction_id] = prediction
+        self._track_prediction(prediction)
         return prediction
 
     def predict_temperature_preference(
@@ -168,7 +232,7 @@ class PredictiveService:
             ],
         )
 
-        self.predictions[prediction.prediction_id] = prediction
+        self._track_prediction(prediction)
         return prediction
 
     def predict_energy_consumption(
@@ -180,7 +244,7 @@ class PredictiveService:
         if len(usage_history) < 24:
             return None
 
-        recent_usage = list(usage_history)[-24:]
+        recent_usage = list(islice(usage_history, len(usage_history) - 24, None))
         active_periods = sum(1 for u in recent_usage if u["state"] == "on")
 
         avg_daily_active = active_periods / len(recent_usage) * 24
@@ -204,7 +268,7 @@ class PredictiveService:
             ],
         )
 
-        self.predictions[prediction.prediction_id] = prediction
+        self._track_prediction(prediction)
         return prediction
 
     def predict_device_need(
@@ -216,15 +280,9 @@ class PredictiveService:
         if len(usage_history) < 5:
             return None
 
-        current_time = datetime.now()
-        current_hour = current_time.hour
-
-        same_hour_usage = [
-            u for u in usage_history
-            if datetime.fromtimestamp(u["timestamp"]).hour == current_hour
-        ]
+        current_hour = datetime.now().hour
 
-        if len(same_hour_usage) >= 3:
+        if self._hour_counts[device_id][current_hour] >= 3:
             import uuid
             prediction = Prediction(
                 prediction_id=str(uuid.uuid4()),
@@ -241,47 +299,63 @@ class PredictiveService:
                 ],
             )
 
-            self.predictions[prediction.prediction_id] = prediction
+            self._track_prediction(prediction)
             return prediction
 
         return None
 
     def get_all_predictions(self, max_age_hours: int = 24) -> List[Prediction]:
-        current_time = time.time()
-        max_age_seconds = max_age_hours * 3600
-
-        return [
-            pred for pred in self.predictions.values()
-            if current_time - pred.created_at < max_age_seconds
-        ]
+        cutoff = time.monotonic() - max_age_hours * 3600
+        ages = self._prediction_ages
+        created = self._monotonic_created
+
+        recent = []
+        for pred_id, pred in self.predictions.items():
+            # Predictions put into self.predictions directly have no tracked
+            # age and fall back to their created_at.
+            age = ages.get(pred_id)
+            if age is None:
+                age = created(pred)
+            if age > cutoff:
+                recent.append(pred)
+        return recent
 
     def get_prediction(self, prediction_id: str) -> Optional[Prediction]:
         return self.predictions.get(prediction_id)
 
     def clear_old_predictions(self, max_age_hours: int = 24) -> int:
-        current_time = time.time()
-        max_age_seconds = max_age_hours * 3600
-
-        old_ids = [
-            pred_id for pred_id, pred in self.predictions.items()
-            if current_time - pred.created_at > max_age_seconds
-        ]
-
-        for pred_id in old_ids:
-            pred = self.predictions.pop(pred_id)
-            self.prediction_history.append(pred)
-
-        logger.info(f"Cleared {len(old_ids)} old predictions")
-        return len(old_ids)
+        cutoff = time.monotonic() - max_age_hours * 3600
+        heap = self._prediction_heap
+        ages = self._prediction_ages
+        predictions = self.predictions
+        cleared = 0
+
+        # Pick up predictions inserted without _track_prediction.
+        for pred_id in predictions.keys() - ages.keys():
+            self._track_prediction(predictions[pred_id])
+
+        while heap and heap[0][0] < cutoff:
+            created, pred_id = heapq.heappop(heap)
+            if ages.get(pred_id) != created:
+                continue
+            del ages[pred_id]
+            prediction = predictions.pop(pred_id, None)
+            if prediction is None:
+                continue
+            self.prediction_history.append(prediction)
+            cleared += 1
+
+        logger.info(f"Cleared {cleared} old predictions")
+        return cleared
 
     def get_user_pattern_summary(self, user_id: str) -> Dict[str, Any]:
         return {
             "arrival_times": {
-                period: [datetime.fromtimestamp(t).strftime("%H:%M") for t in times[-5:]]
+                period: [time.strftime("%H:%M", time.localtime(t)) for t in islice(times, max(len(times) - 5, 0), None)]
                 for period, times in self.user_patterns["arrival_times"].items()
             },
             "departure_times": {
-                period: [datetime.fromtimestamp(t).strftime("%H:%M") for t in times[-5:]]
+                period: [time.strftime("%H:%M", time.localtime(t)) for t in islice(times, max(len(times) - 5, 0), None)]
                 for period, times in self.user_patterns["departure_times"].items()
             },
         }
@@ -292,36 +366,50 @@ class PredictiveService:
         if not usage_history:
             return {"error": "No usage data"}
 
-        recent_usage = list(usage_history)[-100:]
-        active_count = sum(1 for u in recent_usage if u["state"] == "on")
-        total_count = len(recent_usage)
+        active_count = self._active_counts[device_id]
+        total_count = len(usage_history)
 
         return {
             "device_id": device_id,
             "total_records": total_count,
             "active_percentage": (active_count / total_count * 100) if total_count > 0 else 0,
-            "last_active": recent_usage[-1]["timestamp"] if recent_usage else None,
+            "last_active": usage_history[-1]["timestamp"],
         }
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             "active_predictions": [p.to_dict() for p in self.predictions.values()],
             "prediction_count": len(self.predictions),
-            "user_patterns": self.user_patterns,
+            "user_patterns": {
+                section: {key: list(values) for key, values in buckets.items()}
+                for section, buckets in self.user_patterns.items()
+            },
         }
 
     def save_to_file(self, filepath: str) -> None:
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        data = self.to_dict()
+        if orjson is not None:
+            with open(filepath, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(filepath, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
         logger.info(f"Predictive service data saved to {filepath}")
 
     @classmethod
     def load_from_file(cls, filepath: str) -> "PredictiveService":
         service = cls()
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        for pred_data in data.get("active_predictions", []):
+        if ijson is not None:
+            predictions = _stream_items(filepath, "active_predictions.item")
+            patterns = _stream_items(filepath, "user_patterns", kvitems=True)
+        else:
+            with open(filepath, "rb") as f:
+                raw = f.read()
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+            predictions = data.get("active_predictions", [])
+            patterns = data.get("user_patterns", {}).items()
+
+        for pred_data in predictions:
             prediction = Prediction(
                 prediction_id=pred_data["prediction_id"],
                 prediction_type=pred_data["prediction_type"],
@@ -332,10 +420,12 @@ class PredictiveService:
                 suggested_actions=pred_data.get("suggested_actions", []),
                 created_at=pred_data.get("created_at", time.time()),
             )
-            service.predictions[prediction.prediction_id] = prediction
+            service._track_prediction(prediction)
 
-        if "user_patterns" in data:
-            service.user_patterns = data["user_patterns"]
+        for section, buckets in patterns:
+            target = service.user_patterns.setdefault(section, defaultdict(_pattern_buffer))
+            for key, values in buckets.items():
+                target[key] = _pattern_buffer(values)
 
         logger.info(f"Predictive service loaded from {filepath}")
         return service
@@ -2,7 +2,15 @@ from .scenario import (
     ScenarioType,
     ScenarioState,
     ScenarioCondition,
+    TimeCondition,
+    DeviceStateCondition,
+    WeatherCondition,
+    LocationCondition,
+    UserPresenceCondition,
+    CustomCondition,
+    ExpressionCondition,
     ScenarioAction,
+    ActionResult,
     ScenarioTransition,
     Scenario,
 )
@@ -16,7 +24,15 @@ __all__ = [
     "ScenarioType",
     "ScenarioState",
     "ScenarioCondition",
+    "TimeCondition",
+    "DeviceStateCondition",
+    "WeatherCondition",
+    "LocationCondition",
+    "UserPresenceCondition",
+    "CustomCondition",
+    "ExpressionCondition",
     "ScenarioAction",
+    "ActionResult",
     "ScenarioTransition",
     "Scenario",
     "ScenarioPriority",
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import ast
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Mapping, Tuple
+
+ExprFunc = Callable[[Mapping[str, Any]], Any]
+
+_BIN_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+}
+
+_UNARY_OPS = {
+    ast.Not: operator.not_,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+_COMPARE_OPS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+
+
+def _build(node: ast.AST) -> ExprFunc:
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda ctx: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+
+        def load(ctx: Mapping[str, Any]) -> Any:
+            try:
+                return ctx[name]
+            except KeyError:
+                raise NameError(f"name '{name}' is not defined") from None
+
+        return load
+
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        items = tuple(_build(elt) for elt in node.elts)
+        factory = {ast.List: list, ast.Tuple: tuple, ast.Set: set}[type(node)]
+        return lambda ctx: factory(item(ctx) for item in items)
+
+    if isinstance(node, ast.Subscript):
+        target = _build(node.value)
+        key = _build(node.slice)
+        return lambda ctx: target(ctx)[key(ctx)]
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        op = _BIN_OPS[type(node.op)]
+        left = _build(node.left)
+        right = _build(node.right)
+        return lambda ctx: op(left(ctx), right(ctx))
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        op = _UNARY_OPS[type(node.op)]
+        operand = _build(node.operand)
+        return lambda ctx: op(operand(ctx))
+
+    if isinstance(node, ast.BoolOp):
+        values = tuple(_build(v) for v in node.values)
+        if isinstance(node.op, ast.And):
+            def all_of(ctx: Mapping[str, Any]) -> Any:
+                result = True
+                for value in values:
+                    result = value(ctx)
+                    if not result:
+                        return result
+                return result
+
+            return all_of
+
+        def any_of(ctx: Mapping[str, Any]) -> Any:
+            result = False
+            for value in values:
+                result = value(ctx)
+                if result:
+                    return result
+            return result
+
+        return any_of
+
+    if isinstance(node, ast.Compare) and all(type(op) in _COMPARE_OPS for op in node.ops):
+        left = _build(node.left)
+        if len(node.ops) == 1:
+            op = _COMPARE_OPS[type(node.ops[0])]
+            right = _build(node.comparators[0])
+            return lambda ctx: op(left(ctx), right(ctx))
+
+        steps = tuple(
+            (_COMPARE_OPS[type(op)], _build(comparator))
+            for op, comparator in zip(node.ops, node.comparators)
+        )
+
+        def chain(ctx: Mapping[str, Any]) -> bool:
+            current = left(ctx)
+            for op, comparator in steps:
+                following = comparator(ctx)
+                if not op(current, following):
+                    return False
+                current = following
+            return True
+
+        return chain
+
+    raise ValueError(f"Unsupported expression element: {type(node).__name__}")
+
+
+@lru_cache(maxsize=4096)
+def _compile(src: str) -> Tuple[ExprFunc, Tuple[str, ...]]:
+    tree = ast.parse(src, mode="eval")
+    name_nodes = sorted(
+        (node for node in ast.walk(tree) if isinstance(node, ast.Name)),
+        key=lambda node: (node.lineno, node.col_offset),
+    )
+    names = tuple(dict.fromkeys(node.id for node in name_nodes))
+    return _build(tree.body), names
+
+
+def compile_expr(src: str) -> ExprFunc:
+    # Raises SyntaxError or ValueError for expressions outside the scenario
+    # grammar; calls, attribute access and comprehensions are rejected.
+    return _compile(src)[0]
+
+
+def expr_names(src: str) -> Tuple[str, ...]:
+    return _compile(src)[1]
@@ -1,23 +1,107 @@
 from __future__ import annotations
 
 import asyncio
+import inspect
 import logging
+import random
+import sys
 import time
+from contextlib import nullcontext
 from dataclasses import dataclass, field
-from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Set
+from enum import Enum, IntEnum
+from typing import Any, Callable, ClassVar, Dict, FrozenSet, Hashable, Iterator, List, Optional, Set, Tuple
+
+from .expr import compile_expr, expr_names
 
 logger = logging.getLogger(__name__)
 
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
 
-class ScenarioType(Enum):
-    TIME_BASED = "time_based"
-    EVENT_BASED = "event_based"
-    LOCATION_BASED = "location_based"
-    WEATHER_BASED = "weather_based"
-    USER_ACTIVITY = "user_activity"
-    MANUAL = "manual"
-    COMPOSITE = "composite"
+def _freeze(value: Any) -> Hashable:
+    # Containers are tagged with their type: a list and a tuple holding the
+    # same items are not interchangeable (LocationCondition treats them apart).
+    if isinstance(value, dict):
+        return (dict, frozenset((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return (list, tuple(_freeze(v) for v in value))
+    if isinstance(value, tuple):
+        return (tuple, tuple(_freeze(v) for v in value))
+    hash(value)
+    return value
+
+
+@dataclass(slots=True, frozen=True)
+class ActionResult:
+    success: bool
+    error: Optional[str] = None
+    result: Any = None
+    skipped: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.keys()}
+
+    # Read-only mapping access for callers written against the old result
+    # dicts: the keys those dicts carried, with values read off the fields.
+    def keys(self) -> Tuple[str, ...]:
+        if self.skipped:
+            keys: Tuple[str, ...] = ("success", "skipped")
+        elif self.success:
+            keys = ("success", "result")
+        else:
+            keys = ("success",)
+        if self.error is not None:
+            keys += ("error",)
+        return keys
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.keys():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.keys() else default
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.keys()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+
+_SKIP_RESULT = ActionResult(success=True, skipped=True)
+_NO_EXECUTOR_RESULT = ActionResult(success=False, error="No action executor")
+
+
+class ScenarioType(IntEnum):
+    TIME_BASED = 0
+    EVENT_BASED = 1
+    LOCATION_BASED = 2
+    WEATHER_BASED = 3
+    USER_ACTIVITY = 4
+    MANUAL = 5
+    COMPOSITE = 6
+
+    # Serialized as the lowercase labels below, as when the values were strings.
+    @property
+    def label(self) -> str:
+        return _SCENARIO_TYPE_LABELS[self]
+
+    @classmethod
+    def from_label(cls, label: str) -> ScenarioType:
+        return cls(_SCENARIO_TYPE_LABELS.index(label))
+
+
+_SCENARIO_TYPE_LABELS = (
+    "time_based",
+    "event_based",
+    "location_based",
+    "weather_based",
+    "user_activity",
+    "manual",
+    "composite",
+)
 
 
 class ScenarioState(Enum):
@@ -29,40 +113,128 @@ class ScenarioState(Enum):
     ERROR = "error"
 
 
-@dataclass
+@dataclass(slots=True)
 class ScenarioCondition:
     condition_type: str
     parameters: Dict[str, Any] = field(default_factory=dict)
     operator: str = "equals"
     value: Any = None
     enabled: bool = True
+    _eval_count: int = field(default=0, init=False, repr=False, compare=False)
+    _false_count: int = field(default=0, init=False, repr=False, compare=False)
+    _total_time_ns: int = field(default=0, init=False, repr=False, compare=False)
+    _dedup_key: Optional[Hashable] = field(default=None, init=False, repr=False, compare=False)
+    # Set when a public field is assigned; _refresh() rebuilds derived values.
+    _stale: bool = field(default=True, init=False, repr=False, compare=False)
+    # Bumped whenever a public field of any condition is assigned; scenarios
+    # compare it to drop caches derived from their conditions.
+    _epoch: ClassVar[int] = 0
+
+    def __new__(cls, condition_type: str = "", *args: Any, **kwargs: Any) -> ScenarioCondition:
+        # ScenarioCondition("time", ...) builds the matching subclass, so each
+        # instance evaluates through its own method instead of a type switch.
+        if cls is ScenarioCondition:
+            cls = _CONDITION_CLASSES.get(condition_type, cls)
+        return object.__new__(cls)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if name[0] != "_":
+            object.__setattr__(self, "_stale", True)
+            ScenarioCondition._epoch += 1
+
+    def _refresh(self) -> None:
+        # Identical conditions in different scenarios share one result per
+        # evaluation pass; callbacks and unhashable definitions are excluded.
+        self._dedup_key = None
+        if self.condition_type != "custom":
+            try:
+                self._dedup_key = (
+                    self.condition_type,
+                    self.operator,
+                    _freeze(self.value),
+                    _freeze(self.parameters),
+                )
+            except TypeError:
+                pass
+        self._stale = False
+
+    def _share_key(self) -> Optional[Hashable]:
+        if self._stale:
+            self._refresh()
+        return self._dedup_key
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> ScenarioCondition:
+        condition_cls = _CONDITION_CLASSES.get(data.get("condition_type", ""), ScenarioCondition)
+        return condition_cls(**data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "condition_type": self.condition_type,
+            "parameters": self.parameters,
+            "operator": self.operator,
+            "value": self.value,
+            "enabled": self.enabled,
+        }
 
     def evaluate(self, context: Dict[str, Any]) -> bool:
         if not self.enabled:
             return True
 
-        if self.condition_type == "time":
-            return self._evaluate_time(context)
-        elif self.condition_type == "device_state":
-            return self._evaluate_device_state(context)
-        elif self.condition_type == "weather":
-            return self._evaluate_weather(context)
-        elif self.condition_type == "location":
-            return self._evaluate_location(context)
-        elif self.condition_type == "user_presence":
-            return self._evaluate_user_presence(context)
-        elif self.condition_type == "custom":
-            callback = self.parameters.get("callback")
-            if callback and callable(callback):
-                return callback(context)
-        elif self.condition_type == "expression":
-            expr = self.parameters.get("expression")
-            if expr:
-                return self._evaluate_expression(expr, context)
+        start = time.perf_counter_ns()
+        result = self._evaluate(context)
+        self._total_time_ns += time.perf_counter_ns() - start
+        self._eval_count += 1
+        if not result:
+            self._false_count += 1
+        return result
 
+    def _evaluate(self, context: Dict[str, Any]) -> bool:
         return False
 
-    def _evaluate_time(self, context: Dict[str, Any]) -> bool:
+    def selectivity_cost(self) -> float:
+        if self._eval_count == 0:
+            return 0.0
+        return self._total_time_ns / max(self._false_count, 1)
+
+    def _context_inputs(self, context: Dict[str, Any]) -> Optional[tuple]:
+        # The context values evaluate() would read, or None when they cannot
+        # be captured (callbacks, mutable values, clock-dependent defaults).
+        if not self.enabled:
+            return ()
+
+        inputs = self._read_inputs(context)
+        if inputs is None:
+            return None
+        for value in inputs:
+            if not isinstance(value, _SCALAR_TYPES):
+                return None
+        return inputs
+
+    def _read_inputs(self, context: Dict[str, Any]) -> Optional[tuple]:
+        return ()
+
+    def watched_keys(self) -> Optional[FrozenSet[str]]:
+        # Top-level context keys the result depends on; None means any key.
+        if not self.enabled:
+            return frozenset()
+        return self._watched_keys()
+
+    def _watched_keys(self) -> Optional[FrozenSet[str]]:
+        return frozenset()
+
+    def required_context(self) -> Optional[Tuple[str, Any]]:
+        # (key, value) the context must hold for this condition to pass, for
+        # conditions that are a plain top-level equality check.
+        return None
+
+
+@dataclass(slots=True)
+class TimeCondition(ScenarioCondition):
+    condition_type: str = "time"
+
+    def _evaluate(self, context: Dict[str, Any]) -> bool:
         current_time = context.get("current_time", time.time())
         time_of_day = context.get("time_of_day", "")
 
@@ -78,7 +250,29 @@ class ScenarioCondition:
 
         return False
 
-    def _evaluate_device_state(self, context: Dict[str, Any]) -> bool:
+    def _read_inputs(self, context: Dict[str, Any]) -> Optional[tuple]:
+        if self.operator == "in_range":
+            if "current_time" not in context:
+                return None
+            return (context.get("time_of_day", ""), context["current_time"])
+        return (context.get("time_of_day", ""),)
+
+    def _watched_keys(self) -> Optional[FrozenSet[str]]:
+        if self.operator == "in_range":
+            return frozenset(("current_time", "time_of_day"))
+        return frozenset(("time_of_day",))
+
+    def required_context(self) -> Optional[Tuple[str, Any]]:
+        if self.enabled and self.operator == "equals":
+            return ("time_of_day", self.value)
+        return None
+
+
+@dataclass(slots=True)
+class DeviceStateCondition(ScenarioCondition):
+    condition_type: str = "device_state"
+
+    def _evaluate(self, context: Dict[str, Any]) -> bool:
         device_states = context.get("device_states", {})
         device_id = self.parameters.get("device_id")
         state = device_states.get(device_id)
@@ -97,35 +291,84 @@ class ScenarioCondition:
 
         return False
 
-    def _evaluate_weather(self, context: Dict[str, Any]) -> bool:
+    def _read_inputs(self, context: Dict[str, Any]) -> Optional[tuple]:
+        return (context.get("device_states", {}).get(self.parameters.get("device_id")),)
+
+    def _watched_keys(self) -> Optional[FrozenSet[str]]:
+        return frozenset(("device_states",))
+
+
+@dataclass(slots=True)
+class WeatherCondition(ScenarioCondition):
+    condition_type: str = "weather"
+
+    def _evaluate(self, context: Dict[str, Any]) -> bool:
         weather = context.get("weather", {})
 
-        if self.condition_type == "weather":
-            condition = self.parameters.get("condition")
-            if condition == "temperature":
-                temp = weather.get("temperature", 0)
-                if self.operator == "greater_than":
-                    return temp > self.value
-                elif self.operator == "less_than":
-                    return temp < self.value
-            elif condition == "condition":
-                weather_condition = weather.get("condition", "")
-                return weather_condition == self.value
+        condition = self.parameters.get("condition")
+        if condition == "temperature":
+            temp = weather.get("temperature", 0)
+            if self.operator == "greater_than":
+                return temp > self.value
+            elif self.operator == "less_than":
+                return temp < self.value
+        elif condition == "condition":
+            weather_condition = weather.get("condition", "")
+            return weather_condition == self.value
 
         return False
 
-    def _evaluate_location(self, context: Dict[str, Any]) -> bool:
+    def _read_inputs(self, context: Dict[str, Any]) -> Optional[tuple]:
+        weather = context.get("weather", {})
+        return (weather.get("temperature", 0), weather.get("condition", ""))
+
+    def _watched_keys(self) -> Optional[FrozenSet[str]]:
+        return frozenset(("weather",))
+
+
+@dataclass(slots=True)
+class LocationCondition(ScenarioCondition):
+    condition_type: str = "location"
+    _location_set: FrozenSet[Any] = field(default=frozenset(), init=False, repr=False, compare=False)
+
+    def _refresh(self) -> None:
+        ScenarioCondition._refresh(self)
+        self._location_set = frozenset(self.value if isinstance(self.value, list) else (self.value,))
+
+    def _locations(self) -> FrozenSet[Any]:
+        if self._stale:
+            self._refresh()
+        return self._location_set
+
+    def _evaluate(self, context: Dict[str, Any]) -> bool:
         user_location = context.get("user_location", "")
-        locations = self.value if isinstance(self.value, list) else [self.value]
 
         if self.operator == "equals":
-            return user_location in locations
+            return user_location in self._locations()
         elif self.operator == "not_equals":
-            return user_location not in locations
+            return user_location not in self._locations()
 
         return False
 
-    def _evaluate_user_presence(self, context: Dict[str, Any]) -> bool:
+    def _read_inputs(self, context: Dict[str, Any]) -> Optional[tuple]:
+        return (context.get("user_location", ""),)
+
+    def _watched_keys(self) -> Optional[FrozenSet[str]]:
+        return frozenset(("user_location",))
+
+    def required_context(self) -> Optional[Tuple[str, Any]]:
+        if self.enabled and self.operator == "equals":
+            locations = self._locations()
+            if len(locations) == 1:
+                return ("user_location", next(iter(locations)))
+        return None
+
+
+@dataclass(slots=True)
+class UserPresenceCondition(ScenarioCondition):
+    condition_type: str = "user_presence"
+
+    def _evaluate(self, context: Dict[str, Any]) -> bool:
         user_presence = context.get("user_presence", {})
         user_id = self.parameters.get("user_id")
 
@@ -138,15 +381,79 @@ class ScenarioCondition:
 
         return False
 
+    def _read_inputs(self, context: Dict[str, Any]) -> Optional[tuple]:
+        return (context.get("user_presence", {}).get(self.parameters.get("user_id"), False),)
+
+    def _watched_keys(self) -> Optional[FrozenSet[str]]:
+        return frozenset(("user_presence",))
+
+
+@dataclass(slots=True)
+class CustomCondition(ScenarioCondition):
+    condition_type: str = "custom"
+
+    def _evaluate(self, context: Dict[str, Any]) -> bool:
+        callback = self.parameters.get("callback")
+        if callback and callable(callback):
+            return callback(context)
+        return False
+
+    def _read_inputs(self, context: Dict[str, Any]) -> Optional[tuple]:
+        return None
+
+    def _watched_keys(self) -> Optional[FrozenSet[str]]:
+        return None
+
+
+@dataclass(slots=True)
+class ExpressionCondition(ScenarioCondition):
+    condition_type: str = "expression"
+
+    def _evaluate(self, context: Dict[str, Any]) -> bool:
+        expr = self.parameters.get("expression")
+        if expr:
+            return self._evaluate_expression(expr, context)
+        return False
+
     def _evaluate_expression(self, expr: str, context: Dict[str, Any]) -> bool:
         try:
-            return eval(expr, {"__builtins__": {}}, context)
+            return compile_expr(expr)(context)
         except Exception as e:
-            logger.warning(f"Error evaluating expression '{expr}': {e}")
+            logger.warning("Error evaluating expression '%s': %s", expr, e)
             return False
 
+    def _read_inputs(self, context: Dict[str, Any]) -> Optional[tuple]:
+        expr = self.parameters.get("expression")
+        if not expr:
+            return ()
+        try:
+            names = expr_names(expr)
+        except (SyntaxError, ValueError):
+            return ()
+        return tuple(context.get(name) for name in names)
+
+    def _watched_keys(self) -> Optional[FrozenSet[str]]:
+        expr = self.parameters.get("expression")
+        if not expr:
+            return frozenset()
+        try:
+            return frozenset(expr_names(expr))
+        except (SyntaxError, ValueError):
+            return frozenset()
+
+
+_CONDITION_CLASSES: Dict[str, type] = {
+    "time": TimeCondition,
+    "device_state": DeviceStateCondition,
+    "weather": WeatherCondition,
+    "location": LocationCondition,
+    "user_presence": UserPresenceCondition,
+    "custom": CustomCondition,
+    "expression": ExpressionCondition,
+}
 
-@dataclass
+
+@dataclass(slots=True)
 class ScenarioAction:
     action_type: str
     parameters: Dict[str, Any] = field(default_factory=dict)
@@ -155,27 +462,46 @@ class ScenarioAction:
     enabled: bool = True
     metadata: Dict[str, Any] = field(default_factory=dict)
 
-    async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute(
+        self,
+        context: Dict[str, Any],
+        limiter: Optional[asyncio.Semaphore] = None,
+    ) -> ActionResult:
         if not self.enabled:
-            return {"success": True, "skipped": True}
+            return _SKIP_RESULT
 
         if self.delay > 0:
             await asyncio.sleep(self.delay)
 
         action_executor = context.get("action_executor")
         if not action_executor:
-            logger.warning(f"No action executor available for {self.action_type}")
-            return {"success": False, "error": "No action executor"}
+            logger.warning("No action executor available for %s", self.action_type)
+            return _NO_EXECUTOR_RESULT
+
+        error: Optional[Exception] = None
+        for attempt in range(max(self.retry_count, 0) + 1):
+            if attempt:
+                # Jittered exponential backoff, capped at two seconds per retry.
+                retry_delay = min(0.05 * (2 ** (attempt - 1)) + random.uniform(0, 0.05), 2.0)
+                logger.warning(
+                    "Retrying action %s (attempt %s) after error: %s",
+                    self.action_type, attempt + 1, error,
+                )
+                await asyncio.sleep(retry_delay)
+            try:
+                async with limiter or nullcontext():
+                    result = action_executor(self.action_type, self.parameters)
+                    if inspect.isawaitable(result):
+                        result = await result
+                return ActionResult(success=True, result=result)
+            except Exception as e:
+                error = e
 
-        try:
-            result = await action_executor(self.action_type, self.parameters)
-            return {"success": True, "result": result}
-        except Exception as e:
-            logger.error(f"Error executing action {self.action_type}: {e}")
-            return {"success": False, "error": str(e)}
+        logger.error("Error executing action %s: %s", self.action_type, error)
+        return ActionResult(success=False, error=str(error))
 
 
-@dataclass
+@dataclass(slots=True)
 class ScenarioTransition:
     from_scenario_id: str
     to_scenario_id: str
@@ -184,18 +510,39 @@ class ScenarioTransition:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
+def _evaluate_shared(
+    condition: ScenarioCondition,
+    context: Dict[str, Any],
+    shared_results: Optional[Dict[Hashable, bool]],
+) -> bool:
+    key = condition._share_key()
+    if shared_results is None or key is None or not condition.enabled:
+        return condition.evaluate(context)
+
+    result = shared_results.get(key)
+    if result is None:
+        result = shared_results[key] = condition.evaluate(context)
+    return result
+
+
 class Scenario:
+    _REORDER_INTERVAL: ClassVar[int] = 1024
+
     def __init__(
         self,
         scenario_id: str,
         name: str,
         description: str = "",
         scenario_type: ScenarioType = ScenarioType.MANUAL,
+        sequential_actions: bool = False,
+        max_concurrent_actions: int = 16,
     ):
         self.scenario_id = scenario_id
         self.name = name
         self.description = description
         self.scenario_type = scenario_type
+        self.sequential_actions = sequential_actions
+        self.max_concurrent_actions = max_concurrent_actions
 
         self.state = ScenarioState.INACTIVE
         self.conditions: List[ScenarioCondition] = []
@@ -207,13 +554,30 @@ class Scenario:
         self.created_at: float = time.time()
         self.activated_at: Optional[float] = None
         self.deactivated_at: Optional[float] = None
+        self._activated_monotonic: Optional[float] = None
+        self._deactivated_monotonic: Optional[float] = None
         self.activation_count: int = 0
         self.last_execution_time: Optional[float] = None
 
-        self._listeners: List[Callable[[Scenario], None]] = []
+        self._listeners: Dict[Callable[[Scenario], None], None] = {}
+        self._evaluation_order: List[ScenarioCondition] = []
+        self._evaluations_since_reorder = 0
+        self._condition_dicts: Optional[List[Dict[str, Any]]] = None
+        self._condition_epoch = ScenarioCondition._epoch
+        self._last_ctx_fp: Optional[tuple] = None
+        self._last_ctx_result = False
+        self._watched_keys: Optional[FrozenSet[str]] = None
+        self._watched_keys_stale = True
+        self._needs_polling = False
+        self._required_context: Optional[Tuple[Tuple[str, Any], ...]] = None
 
     def add_condition(self, condition: ScenarioCondition) -> None:
         self.conditions.append(condition)
+        self._evaluation_order.append(condition)
+        self._condition_dicts = None
+        self._last_ctx_fp = None
+        self._watched_keys_stale = True
+        self._required_context = None
 
     def add_action(self, action: ScenarioAction) -> None:
         self.actions.append(action)
@@ -223,37 +587,163 @@ class Scenario:
 
     def add_transition(self, transition: ScenarioTransition) -> None:
         self.transitions.append(transition)
+        self._watched_keys_stale = True
+
+    # state and scenario_type keep their serialized strings alongside, so
+    # history and to_dict code can skip the per-call enum lookup.
+    @property
+    def state(self) -> ScenarioState:
+        return self._state
+
+    @state.setter
+    def state(self, state: ScenarioState) -> None:
+        self._state = state
+        self._state_value = sys.intern(state.value)
+
+    @property
+    def scenario_type(self) -> ScenarioType:
+        return self._scenario_type
+
+    @scenario_type.setter
+    def scenario_type(self, scenario_type: ScenarioType) -> None:
+        self._scenario_type = scenario_type
+        self._type_value = scenario_type.label
+
+    @property
+    def required_context(self) -> Tuple[Tuple[str, Any], ...]:
+        # Top-level equalities every condition pass needs; a context that
+        # misses one cannot satisfy evaluate_conditions.
+        self._check_condition_epoch()
+        if self._required_context is None:
+            required = []
+            for condition in self.conditions:
+                requirement = condition.required_context()
+                if requirement is not None:
+                    required.append(requirement)
+            self._required_context = tuple(required)
+        return self._required_context
+
+    @property
+    def watched_keys(self) -> Optional[FrozenSet[str]]:
+        # Context keys read by the conditions and transitions; None when a
+        # condition may read anything.
+        self._check_condition_epoch()
+        if self._watched_keys_stale:
+            self._scan_watched_conditions()
+        return self._watched_keys
+
+    @property
+    def needs_polling(self) -> bool:
+        # Whether a clock- or callback-driven condition needs periodic
+        # re-evaluation; cached alongside watched_keys.
+        self._check_condition_epoch()
+        if self._watched_keys_stale:
+            self._scan_watched_conditions()
+        return self._needs_polling
+
+    def _scan_watched_conditions(self) -> None:
+        keys: Optional[Set[str]] = set()
+        needs_polling = False
+        conditions = list(self.conditions)
+        for transition in self.transitions:
+            conditions.extend(transition.conditions)
+        for condition in conditions:
+            if condition.condition_type in ("custom", "expression") or condition.operator == "in_range":
+                needs_polling = True
+            if keys is not None:
+                condition_keys = condition.watched_keys()
+                if condition_keys is None:
+                    keys = None
+                else:
+                    keys |= condition_keys
+        self._watched_keys = frozenset(keys) if keys is not None else None
+        self._needs_polling = needs_polling
+        self._watched_keys_stale = False
+
+    def _check_condition_epoch(self) -> None:
+        # Condition fields may be reassigned after add_condition; anything
+        # derived from them is dropped once any condition has changed.
+        epoch = ScenarioCondition._epoch
+        if self._condition_epoch != epoch:
+            self._condition_epoch = epoch
+            self._condition_dicts = None
+            self._last_ctx_fp = None
+            self._watched_keys_stale = True
+            self._required_context = None
 
     def add_listener(self, listener: Callable[[Scenario], None]) -> None:
-        self._listeners.append(listener)
+        self._listeners[listener] = None
 
     def remove_listener(self, listener: Callable[[Scenario], None]) -> None:
-        if listener in self._listeners:
-            self._listeners.remove(listener)
+        self._listeners.pop(listener, None)
 
     def _notify_listeners(self) -> None:
-        for listener in self._listeners:
+        for listener in tuple(self._listeners):
             try:
                 listener(self)
             except Exception as e:
-                logger.error(f"Error notifying scenario listener: {e}")
+                logger.error("Error notifying scenario listener: %s", e)
 
-    def evaluate_conditions(self, context: Dict[str, Any]) -> bool:
+    def evaluate_conditions(
+        self,
+        context: Dict[str, Any],
+        shared_results: Optional[Dict[Hashable, bool]] = None,
+    ) -> bool:
         if not self.conditions:
             return True
 
+        # The fingerprint covers context inputs only; a changed condition
+        # definition resets it through the epoch check.
+        self._check_condition_epoch()
+        fingerprint = self._context_fingerprint(context)
+        if fingerprint is not None and fingerprint == self._last_ctx_fp:
+            return self._last_ctx_result
+
+        result = self._evaluate_condition_chain(context, shared_results)
+        self._last_ctx_fp = fingerprint
+        self._last_ctx_result = result
+        return result
+
+    def _context_fingerprint(self, context: Dict[str, Any]) -> Optional[tuple]:
+        fingerprint = []
         for condition in self.conditions:
-            if not condition.evaluate(context):
+            inputs = condition._context_inputs(context)
+            if inputs is None:
+                return None
+            fingerprint.append(inputs)
+        return tuple(fingerprint)
+
+    def _evaluate_condition_chain(
+        self,
+        context: Dict[str, Any],
+        shared_results: Optional[Dict[Hashable, bool]] = None,
+    ) -> bool:
+        # Conditions are ANDed, so run the cheapest, most often false ones
+        # first. The order is refreshed from observed statistics periodically.
+        self._evaluations_since_reorder += 1
+        if (
+            self._evaluations_since_reorder >= self._REORDER_INTERVAL
+            or len(self._evaluation_order) != len(self.conditions)
+        ):
+            self._evaluation_order = sorted(self.conditions, key=ScenarioCondition.selectivity_cost)
+            self._evaluations_since_reorder = 0
+
+        for condition in self._evaluation_order:
+            if not _evaluate_shared(condition, context, shared_results):
                 return False
 
         return True
 
-    def check_transitions(self, context: Dict[str, Any]) -> Optional[str]:
+    def check_transitions(
+        self,
+        context: Dict[str, Any],
+        shared_results: Optional[Dict[Hashable, bool]] = None,
+    ) -> Optional[str]:
         for transition in self.transitions:
             all_match = True
 
             for condition in transition.conditions:
-                if not condition.evaluate(context):
+                if not _evaluate_shared(condition, context, shared_results):
                     all_match = False
                     break
 
@@ -262,6 +752,34 @@ class Scenario:
 
         return None
 
+    async def _run_actions(
+        self,
+        actions: List[ScenarioAction],
+        context: Dict[str, Any],
+    ) -> List[ActionResult]:
+        enabled = [action for action in actions if action.enabled]
+
+        # A task only pays off when an action actually waits: a single action,
+        # or undelayed actions on a synchronous executor, run inline instead.
+        executor = context.get("action_executor")
+        if (
+            self.sequential_actions
+            or len(enabled) < 2
+            or (
+                executor is not None
+                and not asyncio.iscoroutinefunction(executor)
+                and all(action.delay <= 0 for action in enabled)
+            )
+        ):
+            return [await action.execute(context) for action in enabled]
+
+        # Actions are independent, so their delays and executor calls overlap;
+        # the semaphore caps how many executor calls are in flight at once.
+        limiter = asyncio.Semaphore(self.max_concurrent_actions)
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(action.execute(context, limiter)) for action in enabled]
+        return [task.result() for task in tasks]
+
     async def activate(self, context: Dict[str, Any]) -> bool:
         if self.state == ScenarioState.ACTIVE:
             return True
@@ -270,22 +788,24 @@ class Scenario:
             self.state = ScenarioState.ACTIVATING
             self._notify_listeners()
 
-            for action in self.actions:
-                result = await action.execute(context)
-                if not result.get("success", False):
-                    logger.warning(f"Action failed during scenario activation: {result}")
+            results = await self._run_actions(self.actions, context)
+            for result in results:
+                if not result.success:
+                    logger.warning("Action failed during scenario activation: %s", result)
 
             self.state = ScenarioState.ACTIVE
             self.activated_at = time.time()
+            self._activated_monotonic = time.monotonic()
+            self._deactivated_monotonic = None
             self.activation_count += 1
             self.context = context
 
-            logger.info(f"Scenario activated: {self.name}")
+            logger.info("Scenario activated: %s", self.name)
             self._notify_listeners()
             return True
 
         except Exception as e:
-            logger.error(f"Error activating scenario {self.name}: {e}")
+            logger.error("Error activating scenario %s: %s", self.name, e)
             self.state = ScenarioState.ERROR
             self._notify_listeners()
             return False
@@ -298,20 +818,21 @@ class Scenario:
             self.state = ScenarioState.DEACTIVATING
             self._notify_listeners()
 
-            for action in self.exit_actions:
-                result = await action.execute(context)
-                if not result.get("success", False):
-                    logger.warning(f"Exit action failed during scenario deactivation: {result}")
+            results = await self._run_actions(self.exit_actions, context)
+            for result in results:
+                if not result.success:
+                    logger.warning("Exit action failed during scenario deactivation: %s", result)
 
             self.state = ScenarioState.INACTIVE
             self.deactivated_at = time.time()
+            self._deactivated_monotonic = time.monotonic()
 
-            logger.info(f"Scenario deactivated: {self.name}")
+            logger.info("Scenario deactivated: %s", self.name)
             self._notify_listeners()
             return True
 
         except Exception as e:
-            logger.error(f"Error deactivating scenario {self.name}: {e}")
+            logger.error("Error deactivating scenario %s: %s", self.name, e)
             self.state = ScenarioState.ERROR
             self._notify_listeners()
             return False
@@ -319,41 +840,42 @@ class Scenario:
     def pause(self) -> None:
         if self.state == ScenarioState.ACTIVE:
             self.state = ScenarioState.PAUSED
-            logger.info(f"Scenario paused: {self.name}")
+            logger.info("Scenario paused: %s", self.name)
             self._notify_listeners()
 
     def resume(self) -> None:
         if self.state == ScenarioState.PAUSED:
             self.state = ScenarioState.ACTIVE
-            logger.info(f"Scenario resumed: {self.name}")
+            logger.info("Scenario resumed: %s", self.name)
             self._notify_listeners()
 
     def get_active_duration(self) -> float:
-        if self.activated_at is None:
+        # Wall-clock timestamps are kept for display; durations use the
+        # monotonic clock so clock adjustments cannot make them negative.
+        if self._activated_monotonic is None:
             return 0.0
 
-        if self.deactivated_at is not None:
-            return self.deactivated_at - self.activated_at
+        if self._deactivated_monotonic is not None:
+            return self._deactivated_monotonic - self._activated_monotonic
+
+        return time.monotonic() - self._activated_monotonic
 
-        return time.time() - self.activated_at
+    def _condition_dicts_cached(self) -> List[Dict[str, Any]]:
+        # Condition dicts are cached until a condition is added or changed;
+        # actions and transitions are small and read fresh on every call.
+        self._check_condition_epoch()
+        if self._condition_dicts is None:
+            self._condition_dicts = [c.to_dict() for c in self.conditions]
+        return self._condition_dicts
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             "scenario_id": self.scenario_id,
             "name": self.name,
             "description": self.description,
-            "scenario_type": self.scenario_type.value,
-            "state": self.state.value,
-            "conditions": [
-                {
-                    "condition_type": c.condition_type,
-                    "parameters": c.parameters,
-                    "operator": c.operator,
-                    "value": c.value,
-                    "enabled": c.enabled,
-                }
-                for c in self.conditions
-            ],
+            "scenario_type": self._type_value,
+            "state": self._state_value,
+            "conditions": self._condition_dicts_cached(),
             "actions": [
                 {
                     "action_type": a.action_type,
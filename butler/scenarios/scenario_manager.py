@@ -1,12 +1,18 @@
 from __future__ import annotations
 
 import asyncio
+import inspect
 import json
 import logging
+import re
+import sys
 import time
-from dataclasses import dataclass, field
-from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Set
+from collections import Counter, deque
+from dataclasses import dataclass, field, replace
+from functools import cache
+from enum import IntEnum
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Mapping, Optional, Set, Tuple
 
 from .scenario import (
     Scenario,
@@ -19,15 +25,85 @@ from .scenario import (
 
 logger = logging.getLogger(__name__)
 
+try:  # optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+_HOUR_BUCKETS = tuple(
+    "morning" if 5 <= hour < 12
+    else "afternoon" if 12 <= hour < 18
+    else "evening" if 18 <= hour < 22
+    else "night"
+    for hour in range(24)
+)
+
+# Read-only placeholder for state that has not been reported yet.
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+_EVENT_ACTIVATED = sys.intern("activated")
+_EVENT_DEACTIVATED = sys.intern("deactivated")
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+# (item, string fields holding their own "{field}" placeholder, non-string
+# fields a parameter value may replace outright)
+_CompiledItem = Tuple[Dict[str, Any], Tuple[Tuple[str, str], ...], Tuple[str, ...]]
+
+
+def _compile_item(data: Dict[str, Any]) -> _CompiledItem:
+    text_fields = tuple(
+        (key, "{" + key + "}")
+        for key, value in data.items()
+        if isinstance(value, str) and key in _PLACEHOLDER.findall(value)
+    )
+    value_fields = tuple(key for key, value in data.items() if not isinstance(value, str))
+    return data, text_fields, value_fields
+
+
+def _substitute(compiled: _CompiledItem, parameter_values: Dict[str, Any]) -> Dict[str, Any]:
+    data, text_fields, value_fields = compiled
+    if not text_fields and parameter_values.keys().isdisjoint(value_fields):
+        return data
+    result = None
+    for key, placeholder in text_fields:
+        if key in parameter_values:
+            if result is None:
+                result = data.copy()
+            result[key] = result[key].replace(placeholder, str(parameter_values[key]))
+    for key in value_fields:
+        if key in parameter_values:
+            if result is None:
+                result = data.copy()
+            result[key] = parameter_values[key]
+    return data if result is None else result
 
-class ScenarioPriority(Enum):
-    CRITICAL = "critical"
-    HIGH = "high"
-    MEDIUM = "medium"
-    LOW = "low"
 
+def _seconds_until_next_hour(now: float) -> float:
+    local = time.localtime(now)
+    elapsed = local.tm_min * 60 + local.tm_sec + (now % 1)
+    return max(3600.0 - elapsed, 0.0) + 0.01
 
-@dataclass
+
+class ScenarioPriority(IntEnum):
+    CRITICAL = 0
+    HIGH = 1
+    MEDIUM = 2
+    LOW = 3
+
+    @property
+    def label(self) -> str:
+        return _PRIORITY_LABELS[self]
+
+    @classmethod
+    def from_label(cls, label: str) -> ScenarioPriority:
+        return cls(_PRIORITY_LABELS.index(label))
+
+
+_PRIORITY_LABELS = ("critical", "high", "medium", "low")
+
+
+@dataclass(slots=True)
 class ScenarioTemplate:
     template_id: str
     name: str
@@ -40,6 +116,19 @@ class ScenarioTemplate:
     priority: ScenarioPriority = ScenarioPriority.MEDIUM
     parameters: Dict[str, Any] = field(default_factory=dict)
     metadata: Dict[str, Any] = field(default_factory=dict)
+    _compiled_conditions: Tuple[_CompiledItem, ...] = field(default=(), init=False, repr=False, compare=False)
+    _compiled_actions: Tuple[_CompiledItem, ...] = field(default=(), init=False, repr=False, compare=False)
+    _dict_cache: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.compile()
+
+    def compile(self) -> None:
+        # Work out once which fields parameter values can touch, so
+        # create_instance skips the substitution loop for everything else.
+        self._compiled_conditions = tuple(_compile_item(c) for c in self.conditions)
+        self._compiled_actions = tuple(_compile_item(a) for a in self.actions)
+        self._dict_cache = None
 
     def create_instance(self, name: str, parameter_values: Optional[Dict[str, Any]] = None) -> Scenario:
         scenario = Scenario(
@@ -49,34 +138,24 @@ class ScenarioTemplate:
             scenario_type=self.scenario_type,
         )
 
-        for cond_data in self.conditions:
-            parameters = cond_data.copy()
-            for param_name, param_value in (parameter_values or {}).items():
-                if param_name in parameters:
-                    if isinstance(parameters[param_name], str):
-                        parameters[param_name] = parameters[param_name].replace(f"{{{param_name}}}", str(param_value))
-                    else:
-                        parameters[param_name] = param_value
-
-            scenario.add_condition(ScenarioCondition(**parameters))
-
-        for action_data in self.actions:
-            parameters = action_data.copy()
-            for param_name, param_value in (parameter_values or {}).items():
-                if param_name in parameters:
-                    if isinstance(parameters[param_name], str):
-                        parameters[param_name] = parameters[param_name].replace(f"{{{param_name}}}", str(param_value))
-                    else:
-                        parameters[param_name] = param_value
-
-            scenario.add_action(ScenarioAction(**parameters))
+        if parameter_values:
+            for compiled in self._compiled_conditions:
+                scenario.add_condition(ScenarioCondition(**_substitute(compiled, parameter_values)))
+            for compiled in self._compiled_actions:
+                scenario.add_action(ScenarioAction(**_substitute(compiled, parameter_values)))
+        else:
+            # Nothing to substitute: build straight from the template items.
+            for data, _, _ in self._compiled_conditions:
+                scenario.add_condition(ScenarioCondition(**data))
+            for data, _, _ in self._compiled_actions:
+                scenario.add_action(ScenarioAction(**data))
 
         for action_data in self.exit_actions:
             scenario.add_exit_action(ScenarioAction(**action_data))
 
         for trans_data in self.transitions:
             conditions = [
-                ScenarioCondition(**cond_data)
+                ScenarioCondition.from_dict(cond_data)
                 for cond_data in trans_data.get("conditions", [])
             ]
             scenario.add_transition(ScenarioTransition(
@@ -89,340 +168,396 @@ class ScenarioTemplate:
 
         return scenario
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> ScenarioTemplate:
+        data = dict(data)
+        data["scenario_type"] = ScenarioType.from_label(data["scenario_type"])
+        if "priority" in data:
+            data["priority"] = ScenarioPriority.from_label(data["priority"])
+        return cls(**data)
+
     def to_dict(self) -> Dict[str, Any]:
+        # Templates are fixed once compiled; compile() drops the cached form.
+        if self._dict_cache is None:
+            self._dict_cache = self._build_dict()
+        return self._dict_cache
+
+    def _build_dict(self) -> Dict[str, Any]:
         return {
             "template_id": self.template_id,
             "name": self.name,
             "description": self.description,
-            "scenario_type": self.scenario_type.value,
+            "scenario_type": self.scenario_type.label,
             "conditions": self.conditions,
             "actions": self.actions,
             "exit_actions": self.exit_actions,
             "transitions": self.transitions,
-            "priority": self.priority.value,
+            "priority": self.priority.label,
             "parameters": self.parameters,
             "metadata": self.metadata,
         }
 
 
+@cache
+def _default_templates() -> Tuple[ScenarioTemplate, ...]:
+    # Built once per process; each manager takes its own copies, see
+    # ScenarioManager._init_default_templates.
+    return (
+        ScenarioTemplate(
+            template_id="wake_up",
+            name="起床模式",
+            description="早上起床时的场景",
+            scenario_type=ScenarioType.TIME_BASED,
+            conditions=[
+                {
+                    "condition_type": "time",
+                    "operator": "equals",
+                    "value": "morning",
+                },
+            ],
+            actions=[
+                {
+                    "action_type": "set_brightness",
+                    "parameters": {"target": "bedroom_light", "brightness": 80},
+                    "delay": 0.0,
+                },
+                {
+                    "action_type": "set_temperature",
+                    "parameters": {"target": "thermostat", "value": 22},
+                    "delay": 5.0,
+                },
+                {
+                    "action_type": "play_music",
+                    "parameters": {"playlist": "morning", "volume": 30},
+                    "delay": 10.0,
+                },
+                {
+                    "action_type": "notify",
+                    "parameters": {"message": "早上好！新的一天开始了。"},
+                    "delay": 15.0,
+                },
+            ],
+            exit_actions=[
+                {
+                    "action_type": "set_brightness",
+                    "parameters": {"target": "bedroom_light", "brightness": 0},
+                },
+            ],
+            priority=ScenarioPriority.HIGH,
+        ),
+        ScenarioTemplate(
+            template_id="sleep",
+            name="睡眠模式",
+            description="晚上睡觉时的场景",
+            scenario_type=ScenarioType.TIME_BASED,
+            conditions=[
+                {
+                    "condition_type": "time",
+                    "operator": "equals",
+                    "value": "night",
+                },
+            ],
+            actions=[
+                {
+                    "action_type": "turn_off",
+                    "parameters": {"target": "living_room_light"},
+                },
+                {
+                    "action_type": "turn_off",
+                    "parameters": {"target": "kitchen_light"},
+                },
+                {
+                    "action_type": "set_brightness",
+                    "parameters": {"target": "bedroom_light", "brightness": 10},
+                    "delay": 2.0,
+                },
+                {
+                    "action_type": "set_temperature",
+                    "parameters": {"target": "thermostat", "value": 20},
+                    "delay": 5.0,
+                },
+                {
+                    "action_type": "arm_security",
+                    "parameters": {"mode": "night"},
+                    "delay": 10.0,
+                },
+            ],
+            exit_actions=[
+                {
+                    "action_type": "disarm_security",
+                    "parameters": {},
+                },
+            ],
+            priority=ScenarioPriority.HIGH,
+        ),
+        ScenarioTemplate(
+            template_id="away",
+            name="离家模式",
+            description="离开家时的场景",
+            scenario_type=ScenarioType.LOCATION_BASED,
+            conditions=[
+                {
+                    "condition_type": "location",
+                    "operator": "not_equals",
+                    "value": "home",
+                },
+            ],
+            actions=[
+                {
+                    "action_type": "turn_off",
+                    "parameters": {"target": "all_lights"},
+                },
+                {
+                    "action_type": "set_temperature",
+                    "parameters": {"target": "thermostat", "value": 18},
+                    "delay": 2.0,
+                },
+                {
+                    "action_type": "arm_security",
+                    "parameters": {"mode": "away"},
+                    "delay": 5.0,
+                },
+                {
+                    "action_type": "close_cover",
+                    "parameters": {"target": "curtains"},
+                    "delay": 8.0,
+                },
+            ],
+            exit_actions=[
+                {
+                    "action_type": "disarm_security",
+                    "parameters": {},
+                },
+            ],
+            priority=ScenarioPriority.HIGH,
+        ),
+        ScenarioTemplate(
+            template_id="home",
+            name="回家模式",
+            description="回到家时的场景",
+            scenario_type=ScenarioType.LOCATION_BASED,
+            conditions=[
+                {
+                    "condition_type": "location",
+                    "operator": "equals",
+                    "value": "home",
+                },
+            ],
+            actions=[
+                {
+                    "action_type": "disarm_security",
+                    "parameters": {},
+                },
+                {
+                    "action_type": "turn_on",
+                    "parameters": {"target": "living_room_light"},
+                    "delay": 2.0,
+                },
+                {
+                    "action_type": "set_temperature",
+                    "parameters": {"target": "thermostat", "value": 24},
+                    "delay": 5.0,
+                },
+                {
+                    "action_type": "notify",
+                    "parameters": {"message": "欢迎回家！"},
+                    "delay": 10.0,
+                },
+            ],
+            priority=ScenarioPriority.HIGH,
+        ),
+        ScenarioTemplate(
+            template_id="relax",
+            name="放松模式",
+            description="放松休息时的场景",
+            scenario_type=ScenarioType.MANUAL,
+            conditions=[],
+            actions=[
+                {
+                    "action_type": "set_brightness",
+                    "parameters": {"target": "living_room_light", "brightness": 50},
+                },
+                {
+                    "action_type": "set_temperature",
+                    "parameters": {"target": "thermostat", "value": 23},
+                    "delay": 2.0,
+                },
+                {
+                    "action_type": "play_music",
+                    "parameters": {"playlist": "relax", "volume": 40},
+                    "delay": 5.0,
+                },
+                {
+                    "action_type": "open_cover",
+                    "parameters": {"target": "curtains"},
+                    "delay": 8.0,
+                },
+            ],
+            exit_actions=[
+                {
+                    "action_type": "stop_music",
+                    "parameters": {},
+                },
+            ],
+            priority=ScenarioPriority.MEDIUM,
+        ),
+        ScenarioTemplate(
+            template_id="movie",
+            name="观影模式",
+            description="观看电影时的场景",
+            scenario_type=ScenarioType.MANUAL,
+            conditions=[],
+            actions=[
+                {
+                    "action_type": "turn_off",
+                    "parameters": {"target": "ambient_lights"},
+                },
+                {
+                    "action_type": "set_brightness",
+                    "parameters": {"target": "tv_backlight", "brightness": 20},
+                    "delay": 1.0,
+                },
+                {
+                    "action_type": "turn_on",
+                    "parameters": {"target": "tv"},
+                    "delay": 2.0,
+                },
+                {
+                    "action_type": "set_temperature",
+                    "parameters": {"target": "thermostat", "value": 22},
+                    "delay": 5.0,
+                },
+            ],
+            exit_actions=[
+                {
+                    "action_type": "turn_off",
+                    "parameters": {"target": "tv"},
+                },
+                {
+                    "action_type": "turn_on",
+                    "parameters": {"target": "ambient_lights"},
+                },
+            ],
+            priority=ScenarioPriority.MEDIUM,
+        ),
+        ScenarioTemplate(
+            template_id="guest",
+            name="客人模式",
+            description="有客人来访时的场景",
+            scenario_type=ScenarioType.USER_ACTIVITY,
+            conditions=[
+                {
+                    "condition_type": "user_presence",
+                    "operator": "equals",
+                    "value": True,
+                    "parameters": {"user_id": "guest"},
+                },
+            ],
+            actions=[
+                {
+                    "action_type": "set_brightness",
+                    "parameters": {"target": "living_room_light", "brightness": 80},
+                },
+                {
+                    "action_type": "play_music",
+                    "parameters": {"playlist": "ambient", "volume": 35},
+                    "delay": 2.0,
+                },
+                {
+                    "action_type": "notify",
+                    "parameters": {"message": "欢迎客人！"},
+                    "delay": 5.0,
+                },
+            ],
+            priority=ScenarioPriority.MEDIUM,
+        ),
+        ScenarioTemplate(
+            template_id="work",
+            name="工作模式",
+            description="在家工作时的场景",
+            scenario_type=ScenarioType.MANUAL,
+            conditions=[],
+            actions=[
+                {
+                    "action_type": "set_brightness",
+                    "parameters": {"target": "desk_light", "brightness": 100},
+                },
+                {
+                    "action_type": "set_temperature",
+                    "parameters": {"target": "thermostat", "value": 22},
+                    "delay": 2.0,
+                },
+                {
+                    "action_type": "turn_on",
+                    "parameters": {"target": "air_purifier"},
+                    "delay": 5.0,
+                },
+            ],
+            exit_actions=[
+                {
+                    "action_type": "turn_off",
+                    "parameters": {"target": "desk_light"},
+                },
+            ],
+            priority=ScenarioPriority.MEDIUM,
+        ),
+    )
+
+
 class ScenarioManager:
     def __init__(self):
         self.scenarios: Dict[str, Scenario] = {}
         self.templates: Dict[str, ScenarioTemplate] = {}
         self.active_scenarios: Set[str] = set()
-        self.scenario_history: List[Dict[str, Any]] = []
         self._max_history_size = 100
+        self.scenario_history: deque[Dict[str, Any]] = deque(maxlen=self._max_history_size)
+        # Activations per scenario name among the events still in history.
+        self._activation_counts: Counter[str] = Counter()
 
         self._running = False
         self._task: Optional[asyncio.Task] = None
-        self._listeners: List[Callable[[Scenario, str], None]] = []
+        self._sync_listeners: List[Callable[[Scenario, str], None]] = []
+        self._async_listeners: List[Callable[[Scenario, str], Awaitable[None]]] = []
+        self._listener_tasks: Set[asyncio.Task] = set()
+        self._listeners_safe = True
+        self._ctx_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+
+        # Reported state is replaced, never mutated, so contexts handed out
+        # earlier keep the values they were built with.
+        self._user_location = "home"
+        self._weather: Mapping[str, Any] = _EMPTY
+        self._user_presence: Mapping[str, bool] = _EMPTY
+        self._device_states: Mapping[str, Any] = _EMPTY
+        self._wake = asyncio.Event()
+        self._poll_interval = 5.0
+
+        # Incremental evaluation: only scenarios whose watched context keys
+        # changed since the previous pass, or that are new or changed state,
+        # are re-evaluated.
+        self._last_context: Dict[str, Any] = {}
+        self._dirty: Set[str] = set()
+
+        # Per-scenario state and type columns, so statistics scan two small
+        # dicts instead of every Scenario object.
+        self._state_by_id: Dict[str, str] = {}
+        self._type_by_id: Dict[str, ScenarioType] = {}
 
         self._init_default_templates()
 
     def _init_default_templates(self) -> None:
-        templates = [
-            ScenarioTemplate(
-                template_id="wake_up",
-                name="起床模式",
-                description="早上起床时的场景",
-                scenario_type=ScenarioType.TIME_BASED,
-                conditions=[
-                    {
-                        "condition_type": "time",
-                        "operator": "equals",
-                        "value": "morning",
-                    },
-                ],
-                actions=[
-                    {
-                        "action_type": "set_brightness",
-                        "parameters": {"target": "bedroom_light", "brightness": 80},
-                        "delay": 0.0,
-                    },
-                    {
-                        "action_type": "set_temperature",
-                        "parameters": {"target": "thermostat", "value": 22},
-                        "delay": 5.0,
-                    },
-                    {
-                        "action_type": "play_music",
-                        "parameters": {"playlist": "morning", "volume": 30},
-                        "delay": 10.0,
-                    },
-                    {
-                        "action_type": "notify",
-                        "parameters": {"message": "早上好！新的一天开始了。"},
-                        "delay": 15.0,
-                    },
-                ],
-                exit_actions=[
-                    {
-                        "action_type": "set_brightness",
-                        "parameters": {"target": "bedroom_light", "brightness": 0},
-                    },
-                ],
-                priority=ScenarioPriority.HIGH,
-            ),
-            ScenarioTemplate(
-                template_id="sleep",
-                name="睡眠模式",
-                description="晚上睡觉时的场景",
-                scenario_type=ScenarioType.TIME_BASED,
-                conditions=[
-                    {
-                        "condition_type": "time",
-                        "operator": "equals",
-                        "value": "night",
-                    },
-                ],
-                actions=[
-                    {
-                        "action_type": "turn_off",
-                        "parameters": {"target": "living_room_light"},
-                    },
-                    {
-                        "action_type": "turn_off",
-                        "parameters": {"target": "kitchen_light"},
-                    },
-                    {
-                        "action_type": "set_brightness",
-                        "parameters": {"target": "bedroom_light", "brightness": 10},
-                        "delay": 2.0,
-                    },
-                    {
-                        "action_type": "set_temperature",
-                        "parameters": {"target": "thermostat", "value": 20},
-                        "delay": 5.0,
-                    },
-                    {
-                        "action_type": "arm_security",
-                        "parameters": {"mode": "night"},
-                        "delay": 10.0,
-                    },
-                ],
-                exit_actions=[
-                    {
-                        "action_type": "disarm_security",
-                        "parameters": {},
-                    },
-                ],
-                priority=ScenarioPriority.HIGH,
-            ),
-            ScenarioTemplate(
-                template_id="away",
-                name="离家模式",
-                description="离开家时的场景",
-                scenario_type=ScenarioType.LOCATION_BASED,
-                conditions=[
-                    {
-                        "condition_type": "location",
-                        "operator": "not_equals",
-                        "value": "home",
-                    },
-                ],
-                actions=[
-                    {
-                        "action_type": "turn_off",
-                        "parameters": {"target": "all_lights"},
-                    },
-                    {
-                        "action_type": "set_temperature",
-                        "parameters": {"target": "thermostat", "value": 18},
-                        "delay": 2.0,
-                    },
-                    {
-                        "action_type": "arm_security",
-                        "parameters": {"mode": "away"},
-                        "delay": 5.0,
-                    },
-                    {
-                        "action_type": "close_cover",
-                        "parameters": {"target": "curtains"},
-                        "delay": 8.0,
-                    },
-                ],
-                exit_actions=[
-                    {
-                        "action_type": "disarm_security",
-                        "parameters": {},
-                    },
-                ],
-                priority=ScenarioPriority.HIGH,
-            ),
-            ScenarioTemplate(
-                template_id="home",
-                name="回家模式",
-                description="回到家时的场景",
-                scenario_type=ScenarioType.LOCATION_BASED,
-                conditions=[
-                    {
-                        "condition_type": "location",
-                        "operator": "equals",
-                        "value": "home",
-                    },
-                ],
-                actions=[
-                    {
-                        "action_type": "disarm_security",
-                        "parameters": {},
-                    },
-                    {
-                        "action_type": "turn_on",
-                        "parameters": {"target": "living_room_light"},
-                        "delay": 2.0,
-                    },
-                    {
-                        "action_type": "set_temperature",
-                        "parameters": {"target": "thermostat", "value": 24},
-                        "delay": 5.0,
-                    },
-                    {
-                        "action_type": "notify",
-                        "parameters": {"message": "欢迎回家！"},
-                        "delay": 10.0,
-                    },
-                ],
-                priority=ScenarioPriority.HIGH,
-            ),
-            ScenarioTemplate(
-                template_id="relax",
-                name="放松模式",
-                description="放松休息时的场景",
-                scenario_type=ScenarioType.MANUAL,
-                conditions=[],
-                actions=[
-                    {
-                        "action_type": "set_brightness",
-                        "parameters": {"target": "living_room_light", "brightness": 50},
-                    },
-                    {
-                        "action_type": "set_temperature",
-                        "parameters": {"target": "thermostat", "value": 23},
-                        "delay": 2.0,
-                    },
-                    {
-                        "action_type": "play_music",
-                        "parameters": {"playlist": "relax", "volume": 40},
-                        "delay": 5.0,
-                    },
-                    {
-                        "action_type": "open_cover",
-                        "parameters": {"target": "curtains"},
-                        "delay": 8.0,
-                    },
-                ],
-                exit_actions=[
-                    {
-                        "action_type": "stop_music",
-                        "parameters": {},
-                    },
-                ],
-                priority=ScenarioPriority.MEDIUM,
-            ),
-            ScenarioTemplate(
-                template_id="movie",
-                name="观影模式",
-                description="观看电影时的场景",
-                scenario_type=ScenarioType.MANUAL,
-                conditions=[],
-                actions=[
-                    {
-                        "action_type": "turn_off",
-                        "parameters": {"target": "ambient_lights"},
-                    },
-                    {
-                        "action_type": "set_brightness",
-                        "parameters": {"target": "tv_backlight", "brightness": 20},
-                        "delay": 1.0,
-                    },
-                    {
-                        "action_type": "turn_on",
-                        "parameters": {"target": "tv"},
-                        "delay": 2.0,
-                    },
-                    {
-                        "action_type": "set_temperature",
-                        "parameters": {"target": "thermostat", "value": 22},
-                        "delay": 5.0,
-                    },
-                ],
-                exit_actions=[
-                    {
-                        "action_type": "turn_off",
-                        "parameters": {"target": "tv"},
-                    },
-                    {
-                        "action_type": "turn_on",
-                        "parameters": {"target": "ambient_lights"},
-                    },
-                ],
-                priority=ScenarioPriority.MEDIUM,
-            ),
-            ScenarioTemplate(
-                template_id="guest",
-                name="客人模式",
-                description="有客人来访时的场景",
-                scenario_type=ScenarioType.USER_ACTIVITY,
-                conditions=[
-                    {
-                        "condition_type": "user_presence",
-                        "operator": "equals",
-                        "value": True,
-                        "parameters": {"user_id": "guest"},
-                    },
-                ],
-                actions=[
-                    {
-                        "action_type": "set_brightness",
-                        "parameters": {"target": "living_room_light", "brightness": 80},
-                    },
-                    {
-                        "action_type": "play_music",
-                        "parameters": {"playlist": "ambient", "volume": 35},
-                        "delay": 2.0,
-                    },
-                    {
-                        "action_type": "notify",
-                        "parameters": {"message": "欢迎客人！"},
-                        "delay": 5.0,
-                    },
-                ],
-                priority=ScenarioPriority.MEDIUM,
-            ),
-            ScenarioTemplate(
-                template_id="work",
-                name="工作模式",
-                description="在家工作时的场景",
-                scenario_type=ScenarioType.MANUAL,
-                conditions=[],
-                actions=[
-                    {
-                        "action_type": "set_brightness",
-                        "parameters": {"target": "desk_light", "brightness": 100},
-                    },
-                    {
-                        "action_type": "set_temperature",
-                        "parameters": {"target": "thermostat", "value": 22},
-                        "delay": 2.0,
-                    },
-                    {
-                        "action_type": "turn_on",
-                        "parameters": {"target": "air_purifier"},
-                        "delay": 5.0,
-                    },
-                ],
-                exit_actions=[
-                    {
-                        "action_type": "turn_off",
-                        "parameters": {"target": "desk_light"},
-                    },
-                ],
-                priority=ScenarioPriority.MEDIUM,
-            ),
-        ]
-
+        templates = _default_templates()
         for template in templates:
-            self.templates[template.template_id] = template
+            # Fresh template objects (and item lists) per manager; the
+            # prebuilt item dicts themselves are shared.
+            self.templates[template.template_id] = replace(
+                template,
+                conditions=list(template.conditions),
+                actions=list(template.actions),
+                exit_actions=list(template.exit_actions),
+                transitions=list(template.transitions),
+                parameters=dict(template.parameters),
+                metadata=dict(template.metadata),
+            )
 
         logger.info(f"Initialized {len(templates)} scenario templates")
 
@@ -450,49 +585,124 @@ class ScenarioManager:
         logger.info("Scenario manager stopped")
 
     async def _evaluation_loop(self) -> None:
+        # Re-evaluate when reported state changes or the hour rolls over;
+        # only scenarios with clock- or callback-driven conditions need the
+        # old fixed poll.
         while self._running:
             await self._evaluate_scenarios()
-            await asyncio.sleep(5.0)
+            timeout = _seconds_until_next_hour(time.time())
+            if self._needs_polling():
+                timeout = min(timeout, self._poll_interval)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def _needs_polling(self) -> bool:
+        return any(scenario.needs_polling for scenario in self.scenarios.values())
+
+    def _state_changed(self) -> None:
+        self._ctx_cache = None
+        self._wake.set()
+
+    def update_user_location(self, location: str) -> None:
+        self._user_location = location
+        self._state_changed()
+
+    def update_weather(self, weather: Dict[str, Any]) -> None:
+        self._weather = dict(weather)
+        self._state_changed()
+
+    def update_user_presence(self, user_id: str, present: bool) -> None:
+        self._user_presence = {**self._user_presence, user_id: present}
+        self._state_changed()
+
+    def update_device_state(self, device_id: str, state: Any) -> None:
+        self._device_states = {**self._device_states, device_id: state}
+        self._state_changed()
 
     async def _evaluate_scenarios(self) -> None:
         context = self._build_context()
+        # Conditions shared by several scenarios are evaluated once per pass.
+        shared_results: Dict[Hashable, bool] = {}
 
-        for scenario_id, scenario in self.scenarios.items():
-            if scenario.state == ScenarioState.INACTIVE:
-                if scenario.evaluate_conditions(context):
-                    await self._activate_scenario(scenario_id, context)
-            elif scenario.state == ScenarioState.ACTIVE:
-                transition_target = scenario.check_transitions(context)
+        last_context = self._last_context
+        changed = frozenset(
+            key for key, value in context.items()
+            if key not in last_context or last_context[key] != value
+        )
+        self._last_context = context
+        dirty, self._dirty = self._dirty, set()
+
+        # Decide everything against the same snapshot first, then run the
+        # activations concurrently: they drive unrelated devices, so the pass
+        # takes as long as the slowest one rather than the sum.
+        scenarios = self.scenarios
+        inactive = ScenarioState.INACTIVE
+        active = ScenarioState.ACTIVE
+        activate = self._activate_scenario
+        deactivate = self._deactivate_scenario
+
+        to_activate: List[str] = []
+        transitions: List[Tuple[str, str]] = []
+        for scenario_id, scenario in list(scenarios.items()):
+            watched = scenario.watched_keys
+            if scenario_id not in dirty and watched is not None and watched.isdisjoint(changed):
+                continue
+
+            state = scenario.state
+            if state is inactive:
+                required = scenario.required_context
+                if required and any(context.get(key) != value for key, value in required):
+                    continue
+                if scenario.evaluate_conditions(context, shared_results):
+                    to_activate.append(scenario_id)
+            elif state is active:
+                transition_target = scenario.check_transitions(context, shared_results)
                 if transition_target:
-                    await self._deactivate_scenario(scenario_id, context)
-                    await self._activate_scenario(transition_target, context)
+                    transitions.append((scenario_id, transition_target))
 
-    def _build_context(self) -> Dict[str, Any]:
-        import datetime
-
-        now = datetime.datetime.now()
-        current_time = now.timestamp()
-        hour = now.hour
-
-        time_of_day = "day"
-        if 5 <= hour < 12:
-            time_of_day = "morning"
-        elif 12 <= hour < 18:
-            time_of_day = "afternoon"
-        elif 18 <= hour < 22:
-            time_of_day = "evening"
-        else:
-            time_of_day = "night"
+        if not to_activate and not transitions:
+            return
 
-        return {
+        # Transition sources are deactivated before any target is activated;
+        # targets already being activated above are not started twice.
+        await asyncio.gather(
+            *(activate(scenario_id, context) for scenario_id in to_activate),
+            *(deactivate(scenario_id, context) for scenario_id, _ in transitions),
+        )
+        activated = set(to_activate)
+        targets = dict.fromkeys(
+            target for _, target in transitions if target not in activated
+        )
+        if targets:
+            await asyncio.gather(*(activate(target, context) for target in targets))
+
+    def _build_context(self) -> Dict[str, Any]:
+        # Nothing in the context changes faster than once a second, so calls
+        # within the same second share one dict.
+        current_time = time.time()
+        second = int(current_time)
+        cached = self._ctx_cache
+        if cached is not None and cached[0] == second:
+            return cached[1]
+
+        hour = time.localtime(current_time).tm_hour
+        context = {
             "current_time": current_time,
-            "time_of_day": time_of_day,
+            "time_of_day": _HOUR_BUCKETS[hour],
             "hour": hour,
-            "weather": {},
-            "user_location": "home",
-            "user_presence": {},
-            "device_states": {},
+            "weather": self._weather,
+            "user_location": self._user_location,
+            "user_presence": self._user_presence,
+            "device_states": self._device_states,
         }
+        self._ctx_cache = (second, context)
+        return context
+
+    def invalidate_context(self) -> None:
+        self._ctx_cache = None
 
     async def _activate_scenario(self, scenario_id: str, context: Dict[str, Any]) -> bool:
         scenario = self.scenarios.get(scenario_id)
@@ -500,10 +710,15 @@ class ScenarioManager:
             return False
 
         success = await scenario.activate(context)
+        # remove_scenario may have run while the actions were awaited.
+        if self.scenarios.get(scenario_id) is not scenario:
+            return success
+
+        self._dirty.add(scenario_id)
         if success:
             self.active_scenarios.add(scenario_id)
-            self._record_scenario_event(scenario, "activated")
-            self._notify_listeners(scenario, "activated")
+            self._record_scenario_event(scenario, _EVENT_ACTIVATED)
+            self._notify_listeners(scenario, _EVENT_ACTIVATED)
 
         return success
 
@@ -513,10 +728,14 @@ class ScenarioManager:
             return False
 
         success = await scenario.deactivate(context)
+        if self.scenarios.get(scenario_id) is not scenario:
+            return success
+
+        self._dirty.add(scenario_id)
         if success:
             self.active_scenarios.discard(scenario_id)
-            self._record_scenario_event(scenario, "deactivated")
-            self._notify_listeners(scenario, "deactivated")
+            self._record_scenario_event(scenario, _EVENT_DEACTIVATED)
+            self._notify_listeners(scenario, _EVENT_DEACTIVATED)
 
         return success
 
@@ -526,28 +745,81 @@ class ScenarioManager:
             "scenario_name": scenario.name,
             "event_type": event_type,
             "timestamp": time.time(),
-            "state": scenario.state.value,
+            "state": scenario._state_value,
         }
-        self.scenario_history.append(event)
-
-        if len(self.scenario_history) > self._max_history_size:
-            self.scenario_history = self.scenario_history[-self._max_history_size:]
+        history = self.scenario_history
+        if len(history) == history.maxlen:
+            evicted = history[0]
+            if evicted["event_type"] == _EVENT_ACTIVATED:
+                evicted_name = evicted["scenario_name"]
+                self._activation_counts[evicted_name] -= 1
+                if self._activation_counts[evicted_name] <= 0:
+                    del self._activation_counts[evicted_name]
+        history.append(event)
+        if event_type == _EVENT_ACTIVATED:
+            self._activation_counts[scenario.name] += 1
 
     def _notify_listeners(self, scenario: Scenario, event: str) -> None:
-        for listener in self._listeners:
+        if self._async_listeners:
+            self._schedule_async_listeners(scenario, event)
+
+        listeners = self._sync_listeners
+        # Until a listener has raised, dispatch in one unguarded loop; after
+        # the first failure every call is wrapped individually.
+        if self._listeners_safe:
+            notified = 0
+            try:
+                for listener in listeners:
+                    listener(scenario, event)
+                    notified += 1
+                return
+            except Exception as e:
+                self._listeners_safe = False
+                logger.error(f"Error notifying scenario listener: {e}")
+                listeners = listeners[notified + 1:]
+
+        for listener in listeners:
             try:
                 listener(scenario, event)
             except Exception as e:
                 logger.error(f"Error notifying scenario listener: {e}")
 
-    def add_listener(self, listener: Callable[[Scenario, str], None]) -> None:
-        self._listeners.append(listener)
+    def _schedule_async_listeners(self, scenario: Scenario, event: str) -> None:
+        # Coroutine listeners run concurrently as tasks instead of holding up
+        # the activation that triggered them.
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            for listener in self._async_listeners:
+                try:
+                    asyncio.run(listener(scenario, event))
+                except Exception as e:
+                    logger.error(f"Error notifying scenario listener: {e}")
+            return
+
+        for listener in self._async_listeners:
+            task = loop.create_task(listener(scenario, event))
+            self._listener_tasks.add(task)
+            task.add_done_callback(self._on_listener_done)
 
-    def remove_listener(self, listener: Callable[[Scenario, str], None]) -> None:
-        if listener in self._listeners:
-            self._listeners.remove(listener)
+    def _on_listener_done(self, task: asyncio.Task) -> None:
+        self._listener_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error notifying scenario listener: {task.exception()}")
+
+    def add_listener(self, listener: Callable[[Scenario, str], Any]) -> None:
+        if inspect.iscoroutinefunction(listener):
+            self._async_listeners.append(listener)
+        else:
+            self._sync_listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Scenario, str], Any]) -> None:
+        for listeners in (self._sync_listeners, self._async_listeners):
+            if listener in listeners:
+                listeners.remove(listener)
 
     def register_template(self, template: ScenarioTemplate) -> None:
+        template.compile()
         self.templates[template.template_id] = template
         logger.info(f"Registered scenario template: {template.name}")
 
@@ -568,15 +840,36 @@ class ScenarioManager:
             return None
 
         scenario = template.create_instance(name, parameter_values)
-        self.scenarios[scenario.scenario_id] = scenario
+        self._register_scenario(scenario)
 
         logger.info(f"Created scenario from template: {name}")
         return scenario
 
     def add_scenario(self, scenario: Scenario) -> None:
-        self.scenarios[scenario.scenario_id] = scenario
+        self._register_scenario(scenario)
         logger.info(f"Added scenario: {scenario.name}")
 
+    def _register_scenario(self, scenario: Scenario) -> None:
+        scenario_id = scenario.scenario_id
+        self.scenarios[scenario_id] = scenario
+        self._state_by_id[scenario_id] = scenario._state_value
+        self._type_by_id[scenario_id] = scenario.scenario_type
+        # Also catches state changes made on the scenario directly (pause,
+        # resume) rather than through the manager.
+        scenario.add_listener(self._on_scenario_changed)
+        self._dirty.add(scenario_id)
+        self._wake.set()
+
+    def _on_scenario_changed(self, scenario: Scenario) -> None:
+        # Scenario listeners fire synchronously on every transition, so this
+        # is the only writer of the state column for registered scenarios.
+        # Changes made on the scenario itself (pause, resume, a direct
+        # deactivate) also need its conditions and transitions rechecked.
+        if self.scenarios.get(scenario.scenario_id) is scenario:
+            self._state_by_id[scenario.scenario_id] = scenario._state_value
+            self._dirty.add(scenario.scenario_id)
+            self._wake.set()
+
     def remove_scenario(self, scenario_id: str) -> bool:
         if scenario_id in self.scenarios:
             scenario = self.scenarios[scenario_id]
@@ -584,7 +877,11 @@ class ScenarioManager:
                 context = self._build_context()
                 asyncio.create_task(self._deactivate_scenario(scenario_id, context))
 
+            self.active_scenarios.discard(scenario_id)
+            scenario.remove_listener(self._on_scenario_changed)
             del self.scenarios[scenario_id]
+            self._state_by_id.pop(scenario_id, None)
+            self._type_by_id.pop(scenario_id, None)
             logger.info(f"Removed scenario: {scenario_id}")
             return True
         return False
@@ -604,10 +901,8 @@ class ScenarioManager:
         return list(self.scenarios.values())
 
     def get_active_scenarios(self) -> List[Scenario]:
-        return [
-            self.scenarios[sid] for sid in self.active_scenarios
-            if sid in self.scenarios
-        ]
+        scenarios = self.scenarios
+        return [scenarios[sid] for sid in self.active_scenarios if sid in scenarios]
 
     def get_template(self, template_id: str) -> Optional[ScenarioTemplate]:
         return self.templates.get(template_id)
@@ -616,34 +911,21 @@ class ScenarioManager:
         return list(self.templates.values())
 
     def get_history(self, limit: int = 50) -> List[Dict[str, Any]]:
-        return self.scenario_history[-limit:]
+        return list(self.scenario_history)[-limit:]
 
     def get_statistics(self) -> Dict[str, Any]:
         total = len(self.scenarios)
         active = len(self.active_scenarios)
-        by_type = {}
-        by_state = {}
-
-        for scenario in self.scenarios.values():
-            type_name = scenario.scenario_type.value
-            state_name = scenario.state.value
-
-            by_type[type_name] = by_type.get(type_name, 0) + 1
-            by_state[state_name] = by_state.get(state_name, 0) + 1
-
-        activation_counts = {}
-        for event in self.scenario_history:
-            if event["event_type"] == "activated":
-                scenario_name = event["scenario_name"]
-                activation_counts[scenario_name] = activation_counts.get(scenario_name, 0) + 1
+        by_type = Counter(self._type_by_id.values())
+        by_state = Counter(self._state_by_id.values())
 
-        most_used = sorted(activation_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+        most_used = self._activation_counts.most_common(5)
 
         return {
             "total_scenarios": total,
             "active_scenarios": active,
-            "by_type": by_type,
-            "by_state": by_state,
+            "by_type": {scenario_type.label: count for scenario_type, count in by_type.items()},
+            "by_state": dict(by_state),
             "total_history_events": len(self.scenario_history),
             "most_used_scenarios": [{"name": name, "count": count} for name, count in most_used],
         }
@@ -656,25 +938,45 @@ class ScenarioManager:
             "statistics": self.get_statistics(),
         }
 
-    def save_to_file(self, filepath: str) -> None:
+    def _encode_snapshot(self) -> bytes:
         data = {
             "scenarios": [scenario.to_dict() for scenario in self.scenarios.values()],
             "templates": [template.to_dict() for template in self.templates.values()],
-            "history": self.scenario_history,
+            "history": list(self.scenario_history),
         }
+        if orjson is not None:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+    @staticmethod
+    def _write_bytes(filepath: str, payload: bytes) -> None:
+        with open(filepath, "wb") as f:
+            f.write(payload)
 
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    def save_to_file(self, filepath: str) -> None:
+        self._write_bytes(filepath, self._encode_snapshot())
+        logger.info(f"Scenario manager saved to {filepath}")
 
+    async def save_to_file_async(self, filepath: str) -> None:
+        # Encode on the loop so the snapshot is consistent; only the file
+        # write moves to a worker thread.
+        payload = self._encode_snapshot()
+        await asyncio.to_thread(self._write_bytes, filepath, payload)
         logger.info(f"Scenario manager saved to {filepath}")
 
     def load_from_file(self, filepath: str) -> None:
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            with open(filepath, "rb") as f:
+                raw = f.read()
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
 
             for template_data in data.get("templates", []):
-                template = ScenarioTemplate(**template_data)
+                # Reloading a file saved from this manager leaves templates
+                # that have not changed in place instead of rebuilding them.
+                existing = self.templates.get(template_data.get("template_id"))
+                if existing is not None and existing.to_dict() == template_data:
+                    continue
+                template = ScenarioTemplate.from_dict(template_data)
                 self.templates[template.template_id] = template
 
             logger.info(f"Scenario manager loaded from {filepath}")
@@ -2,14 +2,61 @@ from __future__ import annotations
 
 import json
 import logging
+import mmap
+import sys
 import time
+from array import array
 from dataclasses import dataclass, field
-from typing import Any, Callable, Dict, List, Optional
+from functools import cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+try:  # optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 
-@dataclass
+try:  # optional dependency
+    import ujson
+except ImportError:  # pragma: no cover - optional dependency
+    ujson = None
+
+# Used when orjson is unavailable; ujson accepts the same arguments as json.
+_json = ujson if ujson is not None else json
+
+
+def _read_json(filepath: str) -> Any:
+    with open(filepath, "rb") as f:
+        if orjson is not None:
+            # orjson parses straight from the mapped pages, skipping the
+            # intermediate bytes copy of the whole file.
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):  # empty file or unmappable handle
+                return orjson.loads(f.read())
+            with mm, memoryview(mm) as view:
+                return orjson.loads(view)
+        return _json.loads(f.read())
+
+
+# Opcodes index SceneReplayer's handler table; anything else is unknown.
+_OPCODES: Dict[str, int] = {
+    "voice_command": 0,
+    "device_action": 1,
+    "sensor_reading": 2,
+}
+_OP_UNKNOWN = 3
+
+
+def _deadlines(timestamps: array, speed: float, start: float) -> array:
+    # Absolute monotonic deadlines for each event, computed in one pass so
+    # the replay loop only has to read the clock and subtract.
+    scale = 1.0 / speed
+    return array("d", [start + t * scale for t in timestamps])
+
+
+@dataclass(slots=True)
 class ReplayEvent:
     timestamp: float
     event_type: str
@@ -18,6 +65,14 @@ class ReplayEvent:
     params: Dict[str, Any] = field(default_factory=dict)
     metadata: Dict[str, Any] = field(default_factory=dict)
 
+    def __post_init__(self) -> None:
+        # A handful of types, devices and actions repeat across every session.
+        self.event_type = sys.intern(self.event_type)
+        if self.device_id is not None:
+            self.device_id = sys.intern(self.device_id)
+        if self.action is not None:
+            self.action = sys.intern(self.action)
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "timestamp": self.timestamp,
@@ -29,7 +84,7 @@ class ReplayEvent:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class ReplaySession:
     session_id: str
     name: str
@@ -38,6 +93,54 @@ class ReplaySession:
     duration: float = 0.0
     created_at: float = field(default_factory=time.time)
     status: str = "ready"
+    # Column-wise copy of events for the replay loop. _compile() rebuilds it
+    # at the start of every replay: events (and the list) are freely mutable,
+    # and one pass over them is cheap next to the replay itself.
+    _ts: array = field(default_factory=lambda: array("d"), init=False, repr=False, compare=False)
+    _ops: array = field(default_factory=lambda: array("B"), init=False, repr=False, compare=False)
+    _types: List[str] = field(default_factory=list, init=False, repr=False, compare=False)
+    _device_ids: List[Optional[str]] = field(default_factory=list, init=False, repr=False, compare=False)
+    _actions: List[Optional[str]] = field(default_factory=list, init=False, repr=False, compare=False)
+    _params: List[Dict[str, Any]] = field(default_factory=list, init=False, repr=False, compare=False)
+    # Consecutive events sharing a millisecond form one bucket: bucket b
+    # covers events [_bucket_bounds[b], _bucket_bounds[b + 1]) and is due at
+    # _bucket_ts[b].
+    _bucket_ts: array = field(default_factory=lambda: array("d"), init=False, repr=False, compare=False)
+    _bucket_bounds: array = field(default_factory=lambda: array("I"), init=False, repr=False, compare=False)
+    # (name, description) and their lowercased forms for search_sessions.
+    _search_cache: Optional[Tuple[Tuple[str, str], Tuple[str, str]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def _compile(self) -> None:
+        events = self.events
+        self._ts = array("d", [e.timestamp for e in events])
+        self._ops = array("B", [_OPCODES.get(e.event_type, _OP_UNKNOWN) for e in events])
+        self._types = [e.event_type for e in events]
+        self._device_ids = [e.device_id for e in events]
+        self._actions = [e.action for e in events]
+        self._params = [e.params for e in events]
+
+        bucket_ts = array("d")
+        bounds = array("I")
+        previous = None
+        for i, timestamp in enumerate(self._ts):
+            bucket = round(timestamp * 1000)
+            if bucket != previous:
+                bucket_ts.append(timestamp)
+                bounds.append(i)
+                previous = bucket
+        bounds.append(len(events))
+        self._bucket_ts = bucket_ts
+        self._bucket_bounds = bounds
+
+    def _search_text(self) -> Tuple[str, str]:
+        source = (self.name, self.description)
+        cache = self._search_cache
+        if cache is None or cache[0] != source:
+            cache = (source, (self.name.lower(), self.description.lower()))
+            self._search_cache = cache
+        return cache[1]
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -51,6 +154,69 @@ class ReplaySession:
         }
 
 
+@cache
+def _default_sessions() -> Tuple[ReplaySession, ...]:
+    # Built once per process; SceneReplayer copies the sessions it adds.
+    return (
+        ReplaySession(
+            session_id="session_morning_routine",
+            name="晨间例行",
+            description="模拟早晨起床后的典型操作",
+            events=[
+                ReplayEvent(timestamp=0.0, event_type="voice_command", params={"text": "我要起床"}),
+                ReplayEvent(timestamp=1.0, event_type="device_action", device_id="bedroom_curtain", action="open"),
+                ReplayEvent(timestamp=1.5, event_type="device_action", device_id="bedroom_light", action="turn_on", params={"brightness": 80}),
+                ReplayEvent(timestamp=2.0, event_type="device_action", device_id="living_room_curtain", action="open"),
+                ReplayEvent(timestamp=2.5, event_type="device_action", device_id="living_room_light", action="turn_on", params={"brightness": 100}),
+                ReplayEvent(timestamp=3.0, event_type="device_action", device_id="temperature_sensor", action="simulate_value", params={"value": 22.5}),
+                ReplayEvent(timestamp=3.5, event_type="device_action", device_id="humidity_sensor", action="simulate_value", params={"value": 55.0}),
+            ],
+            duration=4.0,
+        ),
+        ReplaySession(
+            session_id="session_evening_routine",
+            name="晚间例行",
+            description="模拟晚上的典型操作",
+            events=[
+                ReplayEvent(timestamp=0.0, event_type="voice_command", params={"text": "我要看电影"}),
+                ReplayEvent(timestamp=1.0, event_type="device_action", device_id="living_room_curtain", action="close"),
+                ReplayEvent(timestamp=1.5, event_type="device_action", device_id="living_room_light", action="set_brightness", params={"value": 20}),
+                ReplayEvent(timestamp=2.0, event_type="device_action", device_id="living_room_ac", action="set_temperature", params={"value": 23}),
+                ReplayEvent(timestamp=2.5, event_type="device_action", device_id="living_room_camera", action="start_recording"),
+            ],
+            duration=3.0,
+        ),
+        ReplaySession(
+            session_id="session_sleep_routine",
+            name="睡眠例行",
+            description="模拟睡前的操作",
+            events=[
+                ReplayEvent(timestamp=0.0, event_type="voice_command", params={"text": "我要睡了"}),
+                ReplayEvent(timestamp=1.0, event_type="device_action", device_id="living_room_light", action="turn_off"),
+                ReplayEvent(timestamp=1.5, event_type="device_action", device_id="bedroom_light", action="turn_off"),
+                ReplayEvent(timestamp=2.0, event_type="device_action", device_id="living_room_curtain", action="close"),
+                ReplayEvent(timestamp=2.5, event_type="device_action", device_id="bedroom_curtain", action="close"),
+                ReplayEvent(timestamp=3.0, event_type="device_action", device_id="living_room_ac", action="set_temperature", params={"value": 22}),
+                ReplayEvent(timestamp=3.5, event_type="device_action", device_id="bedroom_ac", action="set_temperature", params={"value": 21}),
+            ],
+            duration=4.0,
+        ),
+        ReplaySession(
+            session_id="session_away_routine",
+            name="离家例行",
+            description="模拟离家前的操作",
+            events=[
+                ReplayEvent(timestamp=0.0, event_type="voice_command", params={"text": "我要出门"}),
+                ReplayEvent(timestamp=1.0, event_type="device_action", device_id="living_room_light", action="turn_off"),
+                ReplayEvent(timestamp=1.5, event_type="device_action", device_id="bedroom_light", action="turn_off"),
+                ReplayEvent(timestamp=2.0, event_type="device_action", device_id="living_room_ac", action="turn_off"),
+                ReplayEvent(timestamp=2.5, event_type="device_action", device_id="front_door_lock", action="lock"),
+            ],
+            duration=3.0,
+        ),
+    )
+
+
 class SceneReplayer:
     def __init__(self) -> None:
         self.sessions: Dict[str, ReplaySession] = {}
@@ -59,67 +225,17 @@ class SceneReplayer:
         self._init_default_sessions()
 
     def _init_default_sessions(self) -> None:
-        default_sessions = [
-            ReplaySession(
-                session_id="session_morning_routine",
-                name="晨间例行",
-                description="模拟早晨起床后的典型操作",
-                events=[
-                    ReplayEvent(timestamp=0.0, event_type="voice_command", params={"text": "我要起床"}),
-                    ReplayEvent(timestamp=1.0, event_type="device_action", device_id="bedroom_curtain", action="open", params={}),
-                    ReplayEvent(timestamp=1.5, event_type="device_action", device_id="bedroom_light", action="turn_on", params={"brightness": 80}),
-                    ReplayEvent(timestamp=2.0, event_type="device_action", device_id="living_room_curtain", action="open", params={}),
-                    ReplayEvent(timestamp=2.5, event_type="device_action", device_id="living_room_light", action="turn_on", params={"brightness": 100}),
-                    ReplayEvent(timestamp=3.0, event_type="device_action", device_id="temperature_sensor", action="simulate_value", params={"value": 22.5}),
-                    ReplayEvent(timestamp=3.5, event_type="device_action", device_id="humidity_sensor", action="simulate_value", params={"value": 55.0}),
-                ],
-                duration=4.0,
-            ),
-            ReplaySession(
-                session_id="session_evening_routine",
-                name="晚间例行",
-                description="模拟晚上的典型操作",
-                events=[
-                    ReplayEvent(timestamp=0.0, event_type="voice_command", params={"text": "我要看电影"}),
-                    ReplayEvent(timestamp=1.0, event_type="device_action", device_id="living_room_curtain", action="close", params={}),
-                    ReplayEvent(timestamp=1.5, event_type="device_action", device_id="living_room_light", action="set_brightness", params={"value": 20}),
-                    ReplayEvent(timestamp=2.0, event_type="device_action", device_id="living_room_ac", action="set_temperature", params={"value": 23}),
-                    ReplayEvent(timestamp=2.5, event_type="device_action", device_id="living_room_camera", action="start_recording", params={}),
-                ],
-                duration=3.0,
-            ),
-            ReplaySession(
-                session_id="session_sleep_routine",
-                name="睡眠例行",
-                description="模拟睡前的操作",
-                events=[
-                    ReplayEvent(timestamp=0.0, event_type="voice_command", params={"text": "我要睡了"}),
-                    ReplayEvent(timestamp=1.0, event_type="device_action", device_id="living_room_light", action="turn_off", params={}),
-                    ReplayEvent(timestamp=1.5, event_type="device_action", device_id="bedroom_light", action="turn_off", params={}),
-                    ReplayEvent(timestamp=2.0, event_type="device_action", device_id="living_room_curtain", action="close", params={}),
-                    ReplayEvent(timestamp=2.5, event_type="device_action", device_id="bedroom_curtain", action="close", params={}),
-                    ReplayEvent(timestamp=3.0, event_type="device_action", device_id="living_room_ac", action="set_temperature", params={"value": 22}),
-                    ReplayEvent(timestamp=3.5, event_type="device_action", device_id="bedroom_ac", action="set_temperature", params={"value": 21}),
-                ],
-                duration=4.0,
-            ),
-            ReplaySession(
-                session_id="session_away_routine",
-                name="离家例行",
-                description="模拟离家前的操作",
-                events=[
-                    ReplayEvent(timestamp=0.0, event_type="voice_command", params={"text": "我要出门"}),
-                    ReplayEvent(timestamp=1.0, event_type="device_action", device_id="living_room_light", action="turn_off", params={}),
-                    ReplayEvent(timestamp=1.5, event_type="device_action", device_id="bedroom_light", action="turn_off", params={}),
-                    ReplayEvent(timestamp=2.0, event_type="device_action", device_id="living_room_ac", action="turn_off", params={}),
-                    ReplayEvent(timestamp=2.5, event_type="device_action", device_id="front_door_lock", action="lock", params={}),
-                ],
-                duration=3.0,
-            ),
-        ]
-
-        for session in default_sessions:
-            self.add_session(session)
+        default_sessions = _default_sessions()
+        for template in default_sessions:
+            # Fresh session objects (and event lists) per replayer; the
+            # prebuilt ReplayEvents themselves are shared.
+            self.add_session(ReplaySession(
+                session_id=template.session_id,
+                name=template.name,
+                description=template.description,
+                events=list(template.events),
+                duration=template.duration,
+            ))
 
         logger.info(f"Initialized {len(default_sessions)} replay sessions")
 
@@ -171,28 +287,48 @@ class SceneReplayer:
         try:
             logger.info(f"Starting replay session: {session.name}")
 
-            start_time = time.time()
+            # Event timestamps are offsets from the start of the session, so
+            # each event waits for its own deadline instead of sleeping after
+            # the previous one; the monotonic clock keeps wall-clock jumps out.
+            session._compile()
+            bounds = session._bucket_bounds
+            ops = session._ops
+            event_types = session._types
+            device_ids = session._device_ids
+            actions = session._actions
+            params = session._params
+            handlers = _HANDLER_TABLE
+            monotonic = time.monotonic
+            sleep = time.sleep
+            log_error = logger.error
+
+            start_time = monotonic()
+            deadlines = _deadlines(session._bucket_ts, speed, start_time)
             events_executed = 0
             events_failed = 0
+            stopped = False
+
+            for b in range(len(deadlines)):
+                delay = deadlines[b] - monotonic()
+                if delay > 0:
+                    sleep(delay)
+
+                for i in range(bounds[b], bounds[b + 1]):
+                    try:
+                        handlers[ops[i]](self, event_types[i], device_ids[i], actions[i], params[i])
+                        events_executed += 1
+                    except Exception as e:
+                        log_error(f"Event execution failed: {e}")
+                        events_failed += 1
+
+                        if stop_on_error:
+                            stopped = True
+                            break
+                if stopped:
+                    break
 
-            for event in session.events:
-                try:
-                    self._execute_event(event, speed)
-                    events_executed += 1
-                    
-                    if event.timestamp > 0:
-                        delay = (event.timestamp / speed)
-                        time.sleep(delay)
-                except Exception as e:
-                    logger.error(f"Event execution failed: {e}")
-                    events_failed += 1
-                    
-                    if stop_on_error:
-                        break
-
-            end_time = time.time()
-            result["end_time"] = end_time
-            result["duration"] = end_time - start_time
+            result["end_time"] = time.time()
+            result["duration"] = monotonic() - start_time
             result["events_executed"] = events_executed
             result["events_failed"] = events_failed
             result["success"] = events_failed == 0
@@ -216,24 +352,30 @@ class SceneReplayer:
         event: ReplayEvent,
         speed: float
     ) -> None:
-        if event.event_type == "voice_command":
-            logger.info(f"Voice command: {event.params.get('text')}")
-        elif event.event_type == "device_action":
-            if self.device_executor and event.device_id and event.action:
-                self.device_executor(
-                    event.device_id,
-                    event.action,
-                    event.params
-                )
-            else:
-                logger.warning(
-                    f"Cannot execute device action: device_executor={self.device_executor is not None}, "
-                    f"device_id={event.device_id}, action={event.action}"
-                )
-        elif event.event_type == "sensor_reading":
-            logger.info(f"Sensor reading: {event.device_id} = {event.params}")
+        handler = _EVENT_HANDLERS.get(event.event_type, SceneReplayer._handle_unknown)
+        handler(self, event.event_type, event.device_id, event.action, event.params)
+
+    def _handle_voice(self, event_type: str, device_id: Optional[str], action: Optional[str],
+                      params: Dict[str, Any]) -> None:
+        logger.info(f"Voice command: {params.get('text')}")
+
+    def _handle_device(self, event_type: str, device_id: Optional[str], action: Optional[str],
+                       params: Dict[str, Any]) -> None:
+        if self.device_executor and device_id and action:
+            self.device_executor(device_id, action, params)
         else:
-            logger.info(f"Unknown event type: {event.event_type}")
+            logger.warning(
+                f"Cannot execute device action: device_executor={self.device_executor is not None}, "
+                f"device_id={device_id}, action={action}"
+            )
+
+    def _handle_sensor(self, event_type: str, device_id: Optional[str], action: Optional[str],
+                       params: Dict[str, Any]) -> None:
+        logger.info(f"Sensor reading: {device_id} = {params}")
+
+    def _handle_unknown(self, event_type: str, device_id: Optional[str], action: Optional[str],
+                        params: Dict[str, Any]) -> None:
+        logger.info(f"Unknown event type: {event_type}")
 
     def create_session_from_events(
         self,
@@ -267,7 +409,8 @@ class SceneReplayer:
             return False
 
         session.events.append(event)
-        session.duration = max(e.timestamp for e in session.events)
+        if event.timestamp > session.duration:
+            session.duration = event.timestamp
         logger.debug(f"Recorded event to session {session_id}")
         return True
 
@@ -285,11 +428,12 @@ class SceneReplayer:
 
     def search_sessions(self, query: str) -> List[ReplaySession]:
         query_lower = query.lower()
-        return [
-            session for session in self.sessions.values()
-            if (query_lower in session.name.lower() or 
-                query_lower in session.description.lower())
-        ]
+        matches = []
+        for session in self.sessions.values():
+            name, description = session._search_text()
+            if query_lower in name or query_lower in description:
+                matches.append(session)
+        return matches
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -299,15 +443,34 @@ class SceneReplayer:
         }
 
     def save_to_file(self, filepath: str) -> None:
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        # Sessions are encoded and written one at a time so the whole
+        # replayer never has to exist as a single document in memory.
+        if orjson is not None:
+            # orjson serializes the dataclasses itself, so the per-event
+            # to_dict() copies are skipped.
+            def encode(session: Optional[ReplaySession]) -> bytes:
+                return orjson.dumps(session, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        else:
+            def encode(session: Optional[ReplaySession]) -> bytes:
+                data = session.to_dict() if session is not None else None
+                return _json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+        sessions = list(self.sessions.values())
+        with open(filepath, "wb") as f:
+            f.write(b'{\n"sessions": [\n')
+            for i, session in enumerate(sessions):
+                if i:
+                    f.write(b",\n")
+                f.write(encode(session))
+            f.write(b'\n],\n"session_count": %d,\n"active_session": ' % len(sessions))
+            f.write(encode(self.active_session))
+            f.write(b"\n}\n")
         logger.info(f"Replay sessions saved to {filepath}")
 
     @classmethod
     def load_from_file(cls, filepath: str) -> "SceneReplayer":
         replayer = cls()
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = _read_json(filepath)
 
         for session_data in data.get("sessions", []):
             events = []
@@ -335,3 +498,15 @@ class SceneReplayer:
 
         logger.info(f"Replay sessions loaded from {filepath}")
         return replayer
+
+
+# Handlers indexed by the opcodes in _OPCODES, with _OP_UNKNOWN last.
+_HANDLER_TABLE: Tuple[Callable[..., None], ...] = (
+    SceneReplayer._handle_voice,
+    SceneReplayer._handle_device,
+    SceneReplayer._handle_sensor,
+    SceneReplayer._handle_unknown,
+)
+_EVENT_HANDLERS: Dict[str, Callable[..., None]] = {
+    event_type: _HANDLER_TABLE[op] for event_type, op in _OPCODES.items()
+}
@@ -1,14 +1,34 @@
 from __future__ import annotations
 
+import copy
 import json
 import logging
+import sys
+import threading
 import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+try:  # optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:  # optional dependency
+    import ujson
+except ImportError:  # pragma: no cover - optional dependency
+    ujson = None
+
+# Used when orjson is unavailable; ujson accepts the same arguments as json.
+_json = ujson if ujson is not None else json
+
 
 class TestStatus(Enum):
     PENDING = "pending"
@@ -18,7 +38,7 @@ class TestStatus(Enum):
     SKIPPED = "skipped"
 
 
-@dataclass
+@dataclass(slots=True)
 class TestResult:
     test_id: str
     test_name: str
@@ -30,6 +50,10 @@ class TestResult:
     assertion_results: List[Dict[str, Any]] = field(default_factory=list)
     metadata: Dict[str, Any] = field(default_factory=dict)
 
+    def __post_init__(self) -> None:
+        self.test_id = sys.intern(self.test_id)
+        self.test_name = sys.intern(self.test_name)
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "test_id": self.test_id,
@@ -44,7 +68,7 @@ class TestResult:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class TestCase:
     test_id: str
     name: str
@@ -55,6 +79,22 @@ class TestCase:
     expected_results: Optional[Dict[str, Any]] = None
     timeout: float = 30.0
     enabled: bool = True
+    # (name, description, test_id) and their lowercased forms for search_tests.
+    _search_cache: Optional[Tuple[Tuple[str, str, str], Tuple[str, str, str]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        self.test_id = sys.intern(self.test_id)
+        self.name = sys.intern(self.name)
+
+    def _search_text(self) -> Tuple[str, str, str]:
+        source = (self.name, self.description, self.test_id)
+        cache = self._search_cache
+        if cache is None or cache[0] != source:
+            cache = (source, (self.name.lower(), self.description.lower(), self.test_id.lower()))
+            self._search_cache = cache
+        return cache[1]
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -67,10 +107,24 @@ class TestCase:
         }
 
 
+class _TestTimedOut(Exception):
+    """Raised when a test function outlives its TestCase.timeout."""
+
+
+# Upper bound on test functions running under a timeout at once; matches the
+# worker cap used by run_all_tests(parallel=True).
+_TIMEOUT_WORKERS = 8
+
+
 class TestFramework:
     def __init__(self) -> None:
         self.test_cases: Dict[str, TestCase] = {}
-        self.test_results: List[TestResult] = []
+        self.test_results: Deque[TestResult] = deque(maxlen=500)
+        # Per-status tallies of test_results, kept in step by run_test.
+        self._status_counts: Counter = Counter()
+        self._results_lock = threading.Lock()
+        self._timeout_executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         self.before_all: Optional[Callable] = None
         self.after_all: Optional[Callable] = None
         self._init_default_tests()
@@ -199,7 +253,7 @@ class TestFramework:
                 test_case.setup(context)
 
             if test_case.test_func:
-                test_result = test_case.test_func(context)
+                test_result = self._call_with_timeout(test_case.test_func, context, test_case.timeout)
                 if isinstance(test_result, dict):
                     result.metadata.update(test_result)
                     result.assertion_results.append({
@@ -216,6 +270,12 @@ class TestFramework:
 
             logger.info(f"Test passed: {test_case.name}")
 
+        except _TestTimedOut:
+            result.status = TestStatus.FAILED
+            result.end_time = time.time()
+            result.duration = result.end_time - result.start_time
+            result.error_message = f"Timeout after {test_case.timeout}s"
+            logger.error(f"Test failed (timeout): {test_case.name} - {test_case.timeout}s")
         except AssertionError as e:
             result.status = TestStatus.FAILED
             result.end_time = time.time()
@@ -229,9 +289,48 @@ class TestFramework:
             result.error_message = str(e)
             logger.error(f"Test failed (error): {test_case.name} - {e}")
 
-        self.test_results.append(result)
+        self._record_result(result)
         return result
 
+    def _call_with_timeout(self, func: Callable, context: Dict[str, Any], timeout: Optional[float]) -> Any:
+        # A timeout of None or <= 0 means no limit: the test runs inline on
+        # the calling thread.
+        if timeout is None or timeout <= 0:
+            return func(context)
+
+        with self._executor_lock:
+            executor = self._timeout_executor
+            if executor is None:
+                executor = self._timeout_executor = ThreadPoolExecutor(
+                    max_workers=_TIMEOUT_WORKERS, thread_name_prefix="test-timeout"
+                )
+
+        future = executor.submit(func, context)
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            # On 3.11+ this is the builtin TimeoutError, so a test that raised
+            # one itself lands here too; only a pending future is a timeout.
+            if future.done():
+                return future.result()
+
+        # The stuck test keeps its worker thread (Python threads can't be
+        # cancelled), so later tests get a fresh pool instead of queueing
+        # behind it.
+        with self._executor_lock:
+            if self._timeout_executor is executor:
+                self._timeout_executor = None
+        executor.shutdown(wait=False)
+        raise _TestTimedOut
+
+    def _record_result(self, result: TestResult) -> None:
+        with self._results_lock:
+            results = self.test_results
+            if len(results) == results.maxlen:
+                self._status_counts[results[0].status] -= 1
+            results.append(result)
+            self._status_counts[result.status] += 1
+
     def run_all_tests(
         self,
         context: Optional[Dict[str, Any]] = None,
@@ -256,16 +355,26 @@ class TestFramework:
             enabled_tests = self.list_test_cases(enabled_only=True)
             results["total"] = len(enabled_tests)
 
-            for test_case in enabled_tests:
-                test_result = self.run_test(test_case.test_id, context)
-                results["results"].append(test_result.to_dict())
-
-                if test_result.status == TestStatus.PASSED:
-                    results["passed"] += 1
-                elif test_result.status == TestStatus.FAILED:
-                    results["failed"] += 1
-                elif test_result.status == TestStatus.SKIPPED:
-                    results["skipped"] += 1
+            run_test = self.run_test
+            if parallel and len(enabled_tests) > 1:
+                # Each test gets its own shallow copy of the context so
+                # concurrent setups don't overwrite each other's keys.
+                with ThreadPoolExecutor(max_workers=min(8, len(enabled_tests))) as executor:
+                    test_results = list(executor.map(
+                        lambda test_case: run_test(test_case.test_id, copy.copy(context)),
+                        enabled_tests,
+                    ))
+            else:
+                test_results = [run_test(test_case.test_id, context) for test_case in enabled_tests]
+
+            result_dicts = results["results"]
+            counts = Counter(test_result.status for test_result in test_results)
+            for test_result in test_results:
+                result_dicts.append(test_result.to_dict())
+
+            results["passed"] = counts[TestStatus.PASSED]
+            results["failed"] = counts[TestStatus.FAILED]
+            results["skipped"] = counts[TestStatus.SKIPPED]
 
             if self.after_all:
                 self.after_all(context)
@@ -284,33 +393,28 @@ class TestFramework:
         limit: int = 50,
         status: Optional[TestStatus] = None
     ) -> List[TestResult]:
-        results = self.test_results[-limit:]
+        results = self._recent_results(limit)
 
         if status:
             results = [r for r in results if r.status == status]
 
         return results
 
-    def get_statistics(self) -> Dict[str, Any]:
-        if not self.test_results:
-            return {
-                "total_runs": 0,
-                "passed": 0,
-                "failed": 0,
-                "skipped": 0,
-                "success_rate": 0.0,
-            }
+    def _recent_results(self, limit: int) -> List[TestResult]:
+        history = self.test_results
+        start = max(len(history) - limit, 0) if limit else 0
+        return list(islice(history, start, None))
 
+    def get_statistics(self) -> Dict[str, Any]:
+        counts = self._status_counts
         total = len(self.test_results)
-        passed = sum(1 for r in self.test_results if r.status == TestStatus.PASSED)
-        failed = sum(1 for r in self.test_results if r.status == TestStatus.FAILED)
-        skipped = sum(1 for r in self.test_results if r.status == TestStatus.SKIPPED)
+        passed = counts[TestStatus.PASSED]
 
         return {
             "total_runs": total,
             "passed": passed,
-            "failed": failed,
-            "skipped": skipped,
+            "failed": counts[TestStatus.FAILED],
+            "skipped": counts[TestStatus.SKIPPED],
             "success_rate": (passed / total * 100) if total > 0 else 0.0,
         }
 
@@ -340,34 +444,48 @@ class TestFramework:
 
     def clear_results(self) -> None:
         self.test_results.clear()
+        self._status_counts.clear()
         logger.info("Cleared test results")
 
     def search_tests(self, query: str) -> List[TestCase]:
         query_lower = query.lower()
-        return [
-            test for test in self.test_cases.values()
-            if (query_lower in test.name.lower() or 
-                query_lower in test.description.lower() or
-                query_lower in test.test_id.lower())
-        ]
+        matches = []
+        for test in self.test_cases.values():
+            name, description, test_id = test._search_text()
+            if query_lower in name or query_lower in description or query_lower in test_id:
+                matches.append(test)
+        return matches
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             "test_cases": [tc.to_dict() for tc in self.test_cases.values()],
-            "test_results": [tr.to_dict() for tr in self.test_results[-50:]],
+            "test_results": [tr.to_dict() for tr in self._recent_results(50)],
             "statistics": self.get_statistics(),
         }
 
     def save_to_file(self, filepath: str) -> None:
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            # Results go to orjson as dataclasses (status enums included);
+            # test cases still use to_dict to leave out their callables.
+            data = {
+                "test_cases": [tc.to_dict() for tc in self.test_cases.values()],
+                "test_results": self._recent_results(50),
+                "statistics": self.get_statistics(),
+            }
+            with open(filepath, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            data = self.to_dict()
+            with open(filepath, "w", encoding="utf-8") as f:
+                _json.dump(data, f, ensure_ascii=False, indent=2)
         logger.info(f"Test framework data saved to {filepath}")
 
     @classmethod
     def load_from_file(cls, filepath: str) -> "TestFramework":
         framework = cls()
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(filepath, "rb") as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else _json.loads(raw)
 
         for test_data in data.get("test_cases", []):
             test_case = TestCase(
@@ -3,12 +3,26 @@ from __future__ import annotations
 import json
 import logging
 import time
+from collections import defaultdict
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+try:  # optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:  # optional dependency
+    import ujson
+except ImportError:  # pragma: no cover - optional dependency
+    ujson = None
+
+# Used when orjson is unavailable; ujson accepts the same arguments as json.
+_json = ujson if ujson is not None else json
+
 
 class VirtualDeviceType(Enum):
     LIGHT = "light"
@@ -22,19 +36,69 @@ class VirtualDeviceType(Enum):
     OTHER = "other"
 
 
-@dataclass
+# Capability sets shared by every device of the same kind.
+_LIGHT_FULL_CAPABILITIES = frozenset({"turn_on", "turn_off", "set_brightness", "set_color_temp"})
+_LIGHT_NO_CT_CAPABILITIES = frozenset({"turn_on", "turn_off", "set_brightness"})
+_SWITCH_CAPABILITIES = frozenset({"turn_on", "turn_off"})
+_CLIMATE_CAPABILITIES = frozenset({"turn_on", "turn_off", "set_temperature", "set_mode"})
+_COVER_CAPABILITIES = frozenset({"open", "close", "set_position"})
+_SENSOR_CAPABILITIES = frozenset({"read", "simulate_value"})
+_LOCK_CAPABILITIES = frozenset({"lock", "unlock"})
+_CAMERA_CAPABILITIES = frozenset({"start_recording", "stop_recording", "capture_image"})
+
+# Equal capability sets (e.g. read back from a saved file) are swapped for
+# the shared instances above.
+_SHARED_CAPABILITIES: Dict[FrozenSet[str], FrozenSet[str]] = {
+    caps: caps for caps in (
+        _LIGHT_FULL_CAPABILITIES,
+        _LIGHT_NO_CT_CAPABILITIES,
+        _SWITCH_CAPABILITIES,
+        _CLIMATE_CAPABILITIES,
+        _COVER_CAPABILITIES,
+        _SENSOR_CAPABILITIES,
+        _LOCK_CAPABILITIES,
+        _CAMERA_CAPABILITIES,
+    )
+}
+
+
+_STR_TO_TYPE: Dict[str, VirtualDeviceType] = {t.value: t for t in VirtualDeviceType}
+
+
+def _device_type(value: str) -> VirtualDeviceType:
+    device_type = _STR_TO_TYPE.get(value)
+    # Unknown values still raise the Enum's own ValueError.
+    return device_type if device_type is not None else VirtualDeviceType(value)
+
+
+@dataclass(slots=True)
 class VirtualDevice:
     device_id: str
     name: str
     device_type: VirtualDeviceType
     state: Dict[str, Any] = field(default_factory=dict)
     attributes: Dict[str, Any] = field(default_factory=dict)
-    capabilities: List[str] = field(default_factory=list)
+    capabilities: FrozenSet[str] = field(default_factory=frozenset)
     is_available: bool = True
     event_callback: Optional[Callable] = None
     created_at: float = field(default_factory=time.time)
+    # device_type.value, read by to_dict; the type is fixed once a device
+    # is built (the manager's type index relies on that too).
+    _type_value: str = field(default="", init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._type_value = self.device_type.value
+        capabilities = self.capabilities
+        if not isinstance(capabilities, frozenset):
+            capabilities = frozenset(capabilities)
+        self.capabilities = _SHARED_CAPABILITIES.get(capabilities, capabilities)
+
+    def set_state(self, key: str, value: Any, ts: Optional[float] = None) -> None:
+        if self.event_callback is None and not logger.isEnabledFor(logging.DEBUG):
+            # Nobody is listening: skip the old-value lookup, log and event.
+            self.state[key] = value
+            return
 
-    def set_state(self, key: str, value: Any) -> None:
         old_value = self.state.get(key)
         self.state[key] = value
         logger.debug(f"{self.name}: {key} changed from {old_value} to {value}")
@@ -46,9 +110,42 @@ class VirtualDevice:
                 "key": key,
                 "old_value": old_value,
                 "new_value": value,
-                "timestamp": time.time(),
+                "timestamp": time.time() if ts is None else ts,
+            })
+
+    def set_states_bulk(self, updates: Dict[str, Any], ts: Optional[float] = None) -> None:
+        # Multi-key commands apply their changes in one update and report
+        # them as a single state_change_bulk event.
+        if len(updates) == 1:
+            for key, value in updates.items():
+                self.set_state(key, value, ts)
+            return
+
+        state = self.state
+        if self.event_callback is None and not logger.isEnabledFor(logging.DEBUG):
+            state.update(updates)
+            return
+
+        old_values = {key: state.get(key) for key in updates}
+        state.update(updates)
+        logger.debug(f"{self.name}: {old_values} changed to {updates}")
+
+        if self.event_callback:
+            self.event_callback({
+                "device_id": self.device_id,
+                "event_type": "state_change_bulk",
+                "changes": updates,
+                "old_values": old_values,
+                "timestamp": time.time() if ts is None else ts,
             })
 
+    def _ok(self, message: str, *args: Any) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "message": message.format(self.name, *args),
+            "state": self.state,
+        }
+
     def get_state(self, key: str, default: Any = None) -> Any:
         return self.state.get(key, default)
 
@@ -60,428 +157,445 @@ class VirtualDevice:
         return capability in self.capabilities
 
     def execute_command(self, command: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        # One clock read per command, shared by the result and every
+        # state-change event the handler emits.
+        now = time.time()
         result = {
             "success": False,
             "message": "",
             "device_id": self.device_id,
             "command": command,
             "params": params,
-            "timestamp": time.time(),
+            "timestamp": now,
         }
 
         if not self.is_available:
-            result["message"] = f"设备 {self.name} 不可用"
+            result["message"] = _ERR_UNAVAILABLE.format(self.name)
             return result
 
         try:
-            if self.device_type == VirtualDeviceType.LIGHT:
-                result = self._handle_light_command(command, params)
-            elif self.device_type == VirtualDeviceType.SWITCH:
-                result = self._handle_switch_command(command, params)
-            elif self.device_type == VirtualDeviceType.SENSOR:
-                result = self._handle_sensor_command(command, params)
-            elif self.device_type == VirtualDeviceType.CLIMATE:
-                result = self._handle_climate_command(command, params)
-            elif self.device_type == VirtualDeviceType.CAMERA:
-                result = self._handle_camera_command(command, params)
-            elif self.device_type == VirtualDeviceType.LOCK:
-                result = self._handle_lock_command(command, params)
-            elif self.device_type == VirtualDeviceType.COVER:
-                result = self._handle_cover_command(command, params)
-            elif self.device_type == VirtualDeviceType.MEDIA_PLAYER:
-                result = self._handle_media_player_command(command, params)
+            handler = self._COMMAND_DISPATCH.get(self.device_type)
+            if handler is not None:
+                result = handler(self, command, params, now)
             else:
-                result["message"] = f"不支持的设备类型: {self.device_type}"
+                result["message"] = _ERR_UNSUPPORTED_TYPE.format(self.device_type)
 
         except Exception as e:
             logger.error(f"Command execution failed: {e}")
-            result["message"] = f"命令执行失败: {str(e)}"
+            result["message"] = _ERR_COMMAND_FAILED.format(e)
 
         return result
 
-    def _handle_light_command(
+    def _run_command(
         self,
+        handlers: Dict[str, CommandHandler],
+        unsupported: str,
         command: str,
-        params: Dict[str, Any]
+        params: Dict[str, Any],
+        now: Optional[float]
     ) -> Dict[str, Any]:
-        if command == "turn_on":
-            self.set_state("state", "on")
-            if "brightness" in params:
-                self.set_state("brightness", params["brightness"])
-            if "color" in params:
-                self.set_state("color", params["color"])
-            return {
-                "success": True,
-                "message": f"已打开 {self.name}",
-                "state": self.state,
-            }
-        elif command == "turn_off":
-            self.set_state("state", "off")
+        handler = handlers.get(command)
+        if handler is None:
             return {
-                "success": True,
-                "message": f"已关闭 {self.name}",
-                "state": self.state,
-            }
-        elif command == "set_brightness":
-            brightness = params.get("value", 100)
-            self.set_state("brightness", brightness)
-            self.set_state("state", "on")
-            return {
-                "success": True,
-                "message": f"已设置 {self.name} 亮度为 {brightness}%",
-                "state": self.state,
-            }
-        elif command == "set_color_temp":
-            color_temp = params.get("value", 3000)
-            self.set_state("color_temp", color_temp)
-            return {
-                "success": True,
-                "message": f"已设置 {self.name} 色温为 {color_temp}K",
-                "state": self.state,
+                "success": False,
+                "message": unsupported.format(command),
             }
+        return handler(self, params, time.time() if now is None else now)
 
-        return {
-            "success": False,
-            "message": f"不支持的灯光命令: {command}",
-        }
+    def _handle_light_command(
+        self,
+        command: str,
+        params: Dict[str, Any],
+        now: Optional[float] = None
+    ) -> Dict[str, Any]:
+        return self._run_command(_LIGHT_HANDLERS, _ERR_UNSUPPORTED_LIGHT, command, params, now)
 
     def _handle_switch_command(
         self,
         command: str,
-        params: Dict[str, Any]
+        params: Dict[str, Any],
+        now: Optional[float] = None
     ) -> Dict[str, Any]:
-        if command == "turn_on":
-            self.set_state("state", "on")
-            return {
-                "success": True,
-                "message": f"已打开 {self.name}",
-                "state": self.state,
-            }
-        elif command == "turn_off":
-            self.set_state("state", "off")
-            return {
-                "success": True,
-                "message": f"已关闭 {self.name}",
-                "state": self.state,
-            }
-
-        return {
-            "success": False,
-            "message": f"不支持的开关命令: {command}",
-        }
+        return self._run_command(_SWITCH_HANDLERS, _ERR_UNSUPPORTED_SWITCH, command, params, now)
 
     def _handle_sensor_command(
         self,
         command: str,
-        params: Dict[str, Any]
+        params: Dict[str, Any],
+        now: Optional[float] = None
     ) -> Dict[str, Any]:
-        if command == "read":
-            return {
-                "success": True,
-                "message": f"读取 {self.name} 传感器数据",
-                "state": self.state,
-            }
-        elif command == "simulate_value":
-            value = params.get("value")
-            self.set_state("value", value)
-            return {
-                "success": True,
-                "message": f"已模拟 {self.name} 值为 {value}",
-                "state": self.state,
-            }
-
-        return {
-            "success": False,
-            "message": f"不支持的传感器命令: {command}",
-        }
+        return self._run_command(_SENSOR_HANDLERS, _ERR_UNSUPPORTED_SENSOR, command, params, now)
 
     def _handle_climate_command(
         self,
         command: str,
-        params: Dict[str, Any]
+        params: Dict[str, Any],
+        now: Optional[float] = None
     ) -> Dict[str, Any]:
-        if command == "turn_on":
-            self.set_state("state", "on")
-            return {
-                "success": True,
-                "message": f"已打开 {self.name}",
-                "state": self.state,
-            }
-        elif command == "turn_off":
-            self.set_state("state", "off")
-            return {
-                "success": True,
-                "message": f"已关闭 {self.name}",
-                "state": self.state,
-            }
-        elif command == "set_temperature":
-            temp = params.get("value", 24)
-            self.set_state("temperature", temp)
-            self.set_state("state", "on")
-            return {
-                "success": True,
-                "message": f"已设置 {self.name} 温度为 {temp}℃",
-                "state": self.state,
-            }
-        elif command == "set_mode":
-            mode = params.get("mode", "auto")
-            self.set_state("mode", mode)
-            return {
-                "success": True,
-                "message": f"已设置 {self.name} 模式为 {mode}",
-                "state": self.state,
-            }
-
-        return {
-            "success": False,
-            "message": f"不支持的空调命令: {command}",
-        }
+        return self._run_command(_CLIMATE_HANDLERS, _ERR_UNSUPPORTED_CLIMATE, command, params, now)
 
     def _handle_camera_command(
         self,
         command: str,
-        params: Dict[str, Any]
+        params: Dict[str, Any],
+        now: Optional[float] = None
     ) -> Dict[str, Any]:
-        if command == "start_recording":
-            self.set_state("recording", True)
-            return {
-                "success": True,
-                "message": f"已开始录制 {self.name}",
-                "state": self.state,
-            }
-        elif command == "stop_recording":
-            self.set_state("recording", False)
-            return {
-                "success": True,
-                "message": f"已停止录制 {self.name}",
-                "state": self.state,
-            }
-        elif command == "capture_image":
-            return {
-                "success": True,
-                "message": f"已捕获 {self.name} 图像",
-                "state": self.state,
-            }
-
-        return {
-            "success": False,
-            "message": f"不支持的摄像头命令: {command}",
-        }
+        return self._run_command(_CAMERA_HANDLERS, _ERR_UNSUPPORTED_CAMERA, command, params, now)
 
     def _handle_lock_command(
         self,
         command: str,
-        params: Dict[str, Any]
+        params: Dict[str, Any],
+        now: Optional[float] = None
     ) -> Dict[str, Any]:
-        if command == "lock":
-            self.set_state("state", "locked")
-            return {
-                "success": True,
-                "message": f"已锁定 {self.name}",
-                "state": self.state,
-            }
-        elif command == "unlock":
-            self.set_state("state", "unlocked")
-            return {
-                "success": True,
-                "message": f"已解锁 {self.name}",
-                "state": self.state,
-            }
-
-        return {
-            "success": False,
-            "message": f"不支持的门锁命令: {command}",
-        }
+        return self._run_command(_LOCK_HANDLERS, _ERR_UNSUPPORTED_LOCK, command, params, now)
 
     def _handle_cover_command(
         self,
         command: str,
-        params: Dict[str, Any]
+        params: Dict[str, Any],
+        now: Optional[float] = None
     ) -> Dict[str, Any]:
-        if command == "open":
-            self.set_state("state", "open")
-            self.set_state("position", 100)
-            return {
-                "success": True,
-                "message": f"已打开 {self.name}",
-                "state": self.state,
-            }
-        elif command == "close":
-            self.set_state("state", "closed")
-            self.set_state("position", 0)
-            return {
-                "success": True,
-                "message": f"已关闭 {self.name}",
-                "state": self.state,
-            }
-        elif command == "set_position":
-            position = params.get("value", 50)
-            self.set_state("position", position)
-            state = "open" if position > 0 else "closed"
-            self.set_state("state", state)
-            return {
-                "success": True,
-                "message": f"已设置 {self.name} 位置为 {position}%",
-                "state": self.state,
-            }
-
-        return {
-            "success": False,
-            "message": f"不支持的窗帘命令: {command}",
-        }
+        return self._run_command(_COVER_HANDLERS, _ERR_UNSUPPORTED_COVER, command, params, now)
 
     def _handle_media_player_command(
         self,
         command: str,
-        params: Dict[str, Any]
+        params: Dict[str, Any],
+        now: Optional[float] = None
     ) -> Dict[str, Any]:
-        if command == "turn_on":
-            self.set_state("state", "on")
-            return {
-                "success": True,
-                "message": f"已打开 {self.name}",
-                "state": self.state,
-            }
-        elif command == "turn_off":
-            self.set_state("state", "off")
-            return {
-                "success": True,
-                "message": f"已关闭 {self.name}",
-                "state": self.state,
-            }
-        elif command == "play":
-            self.set_state("state", "playing")
-            return {
-                "success": True,
-                "message": f"已播放 {self.name}",
-                "state": self.state,
-            }
-        elif command == "pause":
-            self.set_state("state", "paused")
-            return {
-                "success": True,
-                "message": f"已暂停 {self.name}",
-                "state": self.state,
-            }
-        elif command == "set_volume":
-            volume = params.get("value", 50)
-            self.set_state("volume", volume)
-            return {
-                "success": True,
-                "message": f"已设置 {self.name} 音量为 {volume}",
-                "state": self.state,
-            }
-
-        return {
-            "success": False,
-            "message": f"不支持的媒体播放器命令: {command}",
-        }
+        return self._run_command(_MEDIA_PLAYER_HANDLERS, _ERR_UNSUPPORTED_MEDIA_PLAYER, command, params, now)
+
+    _COMMAND_DISPATCH = {
+        VirtualDeviceType.LIGHT: _handle_light_command,
+        VirtualDeviceType.SWITCH: _handle_switch_command,
+        VirtualDeviceType.SENSOR: _handle_sensor_command,
+        VirtualDeviceType.CLIMATE: _handle_climate_command,
+        VirtualDeviceType.CAMERA: _handle_camera_command,
+        VirtualDeviceType.LOCK: _handle_lock_command,
+        VirtualDeviceType.COVER: _handle_cover_command,
+        VirtualDeviceType.MEDIA_PLAYER: _handle_media_player_command,
+    }
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             "device_id": self.device_id,
             "name": self.name,
-            "device_type": self.device_type.value,
+            "device_type": self._type_value,
             "state": self.state,
             "attributes": self.attributes,
-            "capabilities": self.capabilities,
+            "capabilities": sorted(self.capabilities),
             "is_available": self.is_available,
             "created_at": self.created_at,
         }
 
 
+# Failure messages; formatted only on the failure path.
+_ERR_NO_DEVICE = "设备不存在: {}"
+_ERR_UNAVAILABLE = "设备 {} 不可用"
+_ERR_UNSUPPORTED_TYPE = "不支持的设备类型: {}"
+_ERR_COMMAND_FAILED = "命令执行失败: {}"
+_ERR_UNSUPPORTED_LIGHT = "不支持的灯光命令: {}"
+_ERR_UNSUPPORTED_SWITCH = "不支持的开关命令: {}"
+_ERR_UNSUPPORTED_SENSOR = "不支持的传感器命令: {}"
+_ERR_UNSUPPORTED_CLIMATE = "不支持的空调命令: {}"
+_ERR_UNSUPPORTED_CAMERA = "不支持的摄像头命令: {}"
+_ERR_UNSUPPORTED_LOCK = "不支持的门锁命令: {}"
+_ERR_UNSUPPORTED_COVER = "不支持的窗帘命令: {}"
+_ERR_UNSUPPORTED_MEDIA_PLAYER = "不支持的媒体播放器命令: {}"
+
+# Success messages, formatted with the device name and any command value.
+_MSG_TURN_ON = "已打开 {}"
+_MSG_TURN_OFF = "已关闭 {}"
+_MSG_SET_BRIGHTNESS = "已设置 {} 亮度为 {}%"
+_MSG_SET_COLOR_TEMP = "已设置 {} 色温为 {}K"
+_MSG_SENSOR_READ = "读取 {} 传感器数据"
+_MSG_SIMULATE_VALUE = "已模拟 {} 值为 {}"
+_MSG_SET_TEMPERATURE = "已设置 {} 温度为 {}℃"
+_MSG_SET_MODE = "已设置 {} 模式为 {}"
+_MSG_START_RECORDING = "已开始录制 {}"
+_MSG_STOP_RECORDING = "已停止录制 {}"
+_MSG_CAPTURE_IMAGE = "已捕获 {} 图像"
+_MSG_LOCK = "已锁定 {}"
+_MSG_UNLOCK = "已解锁 {}"
+_MSG_SET_POSITION = "已设置 {} 位置为 {}%"
+_MSG_PLAY = "已播放 {}"
+_MSG_PAUSE = "已暂停 {}"
+_MSG_SET_VOLUME = "已设置 {} 音量为 {}"
+
+
+# Per-type command tables: each handler takes (device, params, now) and returns
+# the command result.
+
+def _turn_on(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    device.set_state("state", "on", now)
+    return device._ok(_MSG_TURN_ON)
+
+
+def _turn_off(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    device.set_state("state", "off", now)
+    return device._ok(_MSG_TURN_OFF)
+
+
+def _light_turn_on(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    updates = {"state": "on"}
+    if "brightness" in params:
+        updates["brightness"] = params["brightness"]
+    if "color" in params:
+        updates["color"] = params["color"]
+    device.set_states_bulk(updates, now)
+    return device._ok(_MSG_TURN_ON)
+
+
+def _light_set_brightness(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    brightness = params.get("value", 100)
+    device.set_states_bulk({"brightness": brightness, "state": "on"}, now)
+    return device._ok(_MSG_SET_BRIGHTNESS, brightness)
+
+
+def _light_set_color_temp(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    color_temp = params.get("value", 3000)
+    device.set_state("color_temp", color_temp, now)
+    return device._ok(_MSG_SET_COLOR_TEMP, color_temp)
+
+
+def _sensor_read(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    return device._ok(_MSG_SENSOR_READ)
+
+
+def _sensor_simulate_value(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    value = params.get("value")
+    device.set_state("value", value, now)
+    return device._ok(_MSG_SIMULATE_VALUE, value)
+
+
+def _climate_set_temperature(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    temp = params.get("value", 24)
+    device.set_states_bulk({"temperature": temp, "state": "on"}, now)
+    return device._ok(_MSG_SET_TEMPERATURE, temp)
+
+
+def _climate_set_mode(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    mode = params.get("mode", "auto")
+    device.set_state("mode", mode, now)
+    return device._ok(_MSG_SET_MODE, mode)
+
+
+def _camera_start_recording(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    device.set_state("recording", True, now)
+    return device._ok(_MSG_START_RECORDING)
+
+
+def _camera_stop_recording(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    device.set_state("recording", False, now)
+    return device._ok(_MSG_STOP_RECORDING)
+
+
+def _camera_capture_image(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    return device._ok(_MSG_CAPTURE_IMAGE)
+
+
+def _lock_lock(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    device.set_state("state", "locked", now)
+    return device._ok(_MSG_LOCK)
+
+
+def _lock_unlock(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    device.set_state("state", "unlocked", now)
+    return device._ok(_MSG_UNLOCK)
+
+
+def _cover_open(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    device.set_states_bulk({"state": "open", "position": 100}, now)
+    return device._ok(_MSG_TURN_ON)
+
+
+def _cover_close(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    device.set_states_bulk({"state": "closed", "position": 0}, now)
+    return device._ok(_MSG_TURN_OFF)
+
+
+def _cover_set_position(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    position = params.get("value", 50)
+    state = "open" if position > 0 else "closed"
+    device.set_states_bulk({"position": position, "state": state}, now)
+    return device._ok(_MSG_SET_POSITION, position)
+
+
+def _media_play(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    device.set_state("state", "playing", now)
+    return device._ok(_MSG_PLAY)
+
+
+def _media_pause(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    device.set_state("state", "paused", now)
+    return device._ok(_MSG_PAUSE)
+
+
+def _media_set_volume(device: VirtualDevice, params: Dict[str, Any], now: float) -> Dict[str, Any]:
+    volume = params.get("value", 50)
+    device.set_state("volume", volume, now)
+    return device._ok(_MSG_SET_VOLUME, volume)
+
+
+CommandHandler = Callable[[VirtualDevice, Dict[str, Any], float], Dict[str, Any]]
+
+_LIGHT_HANDLERS: Dict[str, CommandHandler] = {
+    "turn_on": _light_turn_on,
+    "turn_off": _turn_off,
+    "set_brightness": _light_set_brightness,
+    "set_color_temp": _light_set_color_temp,
+}
+_SWITCH_HANDLERS: Dict[str, CommandHandler] = {
+    "turn_on": _turn_on,
+    "turn_off": _turn_off,
+}
+_SENSOR_HANDLERS: Dict[str, CommandHandler] = {
+    "read": _sensor_read,
+    "simulate_value": _sensor_simulate_value,
+}
+_CLIMATE_HANDLERS: Dict[str, CommandHandler] = {
+    "turn_on": _turn_on,
+    "turn_off": _turn_off,
+    "set_temperature": _climate_set_temperature,
+    "set_mode": _climate_set_mode,
+}
+_CAMERA_HANDLERS: Dict[str, CommandHandler] = {
+    "start_recording": _camera_start_recording,
+    "stop_recording": _camera_stop_recording,
+    "capture_image": _camera_capture_image,
+}
+_LOCK_HANDLERS: Dict[str, CommandHandler] = {
+    "lock": _lock_lock,
+    "unlock": _lock_unlock,
+}
+_COVER_HANDLERS: Dict[str, CommandHandler] = {
+    "open": _cover_open,
+    "close": _cover_close,
+    "set_position": _cover_set_position,
+}
+_MEDIA_PLAYER_HANDLERS: Dict[str, CommandHandler] = {
+    "turn_on": _turn_on,
+    "turn_off": _turn_off,
+    "play": _media_play,
+    "pause": _media_pause,
+    "set_volume": _media_set_volume,
+}
+
+
+# Specs for the devices every manager starts with. Each manager gets its own
+# VirtualDevice objects and state dicts built from these.
+_DEFAULT_DEVICE_SPECS: Tuple[Dict[str, Any], ...] = (
+    {
+        "device_id": "living_room_light",
+        "name": "客厅灯",
+        "device_type": VirtualDeviceType.LIGHT,
+        "state": {"state": "off", "brightness": 100, "color_temp": 4000},
+        "capabilities": _LIGHT_FULL_CAPABILITIES,
+    },
+    {
+        "device_id": "bedroom_light",
+        "name": "卧室灯",
+        "device_type": VirtualDeviceType.LIGHT,
+        "state": {"state": "off", "brightness": 80, "color_temp": 3000},
+        "capabilities": _LIGHT_FULL_CAPABILITIES,
+    },
+    {
+        "device_id": "kitchen_light",
+        "name": "厨房灯",
+        "device_type": VirtualDeviceType.LIGHT,
+        "state": {"state": "off", "brightness": 100, "color_temp": 4000},
+        "capabilities": _LIGHT_NO_CT_CAPABILITIES,
+    },
+    {
+        "device_id": "living_room_ac",
+        "name": "客厅空调",
+        "device_type": VirtualDeviceType.CLIMATE,
+        "state": {"state": "off", "temperature": 24, "mode": "auto"},
+        "capabilities": _CLIMATE_CAPABILITIES,
+    },
+    {
+        "device_id": "bedroom_ac",
+        "name": "卧室空调",
+        "device_type": VirtualDeviceType.CLIMATE,
+        "state": {"state": "off", "temperature": 22, "mode": "cool"},
+        "capabilities": _CLIMATE_CAPABILITIES,
+    },
+    {
+        "device_id": "living_room_curtain",
+        "name": "客厅窗帘",
+        "device_type": VirtualDeviceType.COVER,
+        "state": {"state": "closed", "position": 0},
+        "capabilities": _COVER_CAPABILITIES,
+    },
+    {
+        "device_id": "temperature_sensor",
+        "name": "温度传感器",
+        "device_type": VirtualDeviceType.SENSOR,
+        "state": {"value": 24.5, "unit": "℃"},
+        "capabilities": _SENSOR_CAPABILITIES,
+    },
+    {
+        "device_id": "humidity_sensor",
+        "name": "湿度传感器",
+        "device_type": VirtualDeviceType.SENSOR,
+        "state": {"value": 45.0, "unit": "%"},
+        "capabilities": _SENSOR_CAPABILITIES,
+    },
+    {
+        "device_id": "living_room_camera",
+        "name": "客厅摄像头",
+        "device_type": VirtualDeviceType.CAMERA,
+        "state": {"recording": False, "motion": False},
+        "capabilities": _CAMERA_CAPABILITIES,
+    },
+    {
+        "device_id": "front_door_lock",
+        "name": "前门锁",
+        "device_type": VirtualDeviceType.LOCK,
+        "state": {"state": "locked"},
+        "capabilities": _LOCK_CAPABILITIES,
+    },
+)
+
+
 class VirtualDeviceManager:
-    def __init__(self) -> None:
+    def __init__(self, load_defaults: bool = True) -> None:
         self.devices: Dict[str, VirtualDevice] = {}
-        self._init_default_devices()
+        # device_id -> (device, name, name.lower(), device_id.lower()); entries
+        # are refreshed on search if the device or its name has changed.
+        self._search_index: Dict[str, Tuple[VirtualDevice, str, str, str]] = {}
+        self._by_type: Dict[VirtualDeviceType, Dict[str, VirtualDevice]] = defaultdict(dict)
+        if load_defaults:
+            self._init_default_devices()
 
     def _init_default_devices(self) -> None:
-        default_devices = [
-            VirtualDevice(
-                device_id="living_room_light",
-                name="客厅灯",
-                device_type=VirtualDeviceType.LIGHT,
-                state={"state": "off", "brightness": 100, "color_temp": 4000},
-                capabilities=["turn_on", "turn_off", "set_brightness", "set_color_temp"],
-            ),
-            VirtualDevice(
-                device_id="bedroom_light",
-                name="卧室灯",
-                device_type=VirtualDeviceType.LIGHT,
-                state={"state": "off", "brightness": 80, "color_temp": 3000},
-                capabilities=["turn_on", "turn_off", "set_brightness", "set_color_temp"],
-            ),
-            VirtualDevice(
-                device_id="kitchen_light",
-                name="厨房灯",
-                device_type=VirtualDeviceType.LIGHT,
-                state={"state": "off", "brightness": 100, "color_temp": 4000},
-                capabilities=["turn_on", "turn_off", "set_brightness"],
-            ),
-            VirtualDevice(
-                device_id="living_room_ac",
-                name="客厅空调",
-                device_type=VirtualDeviceType.CLIMATE,
-                state={"state": "off", "temperature": 24, "mode": "auto"},
-                capabilities=["turn_on", "turn_off", "set_temperature", "set_mode"],
-            ),
-            VirtualDevice(
-                device_id="bedroom_ac",
-                name="卧室空调",
-                device_type=VirtualDeviceType.CLIMATE,
-                state={"state": "off", "temperature": 22, "mode": "cool"},
-                capabilities=["turn_on", "turn_off", "set_temperature", "set_mode"],
-            ),
-            VirtualDevice(
-                device_id="living_room_curtain",
-                name="客厅窗帘",
-                device_type=VirtualDeviceType.COVER,
-                state={"state": "closed", "position": 0},
-                capabilities=["open", "close", "set_position"],
-            ),
-            VirtualDevice(
-                device_id="temperature_sensor",
-                name="温度传感器",
-                device_type=VirtualDeviceType.SENSOR,
-                state={"value": 24.5, "unit": "℃"},
-                capabilities=["read", "simulate_value"],
-            ),
-            VirtualDevice(
-                device_id="humidity_sensor",
-                name="湿度传感器",
-                device_type=VirtualDeviceType.SENSOR,
-                state={"value": 45.0, "unit": "%"},
-                capabilities=["read", "simulate_value"],
-            ),
-            VirtualDevice(
-                device_id="living_room_camera",
-                name="客厅摄像头",
-                device_type=VirtualDeviceType.CAMERA,
-                state={"recording": False, "motion": False},
-                capabilities=["start_recording", "stop_recording", "capture_image"],
-            ),
-            VirtualDevice(
-                device_id="front_door_lock",
-                name="前门锁",
-                device_type=VirtualDeviceType.LOCK,
-                state={"state": "locked"},
-                capabilities=["lock", "unlock"],
-            ),
-        ]
-
-        for device in default_devices:
-            self.add_device(device)
-
-        logger.info(f"Initialized {len(default_devices)} virtual devices")
+        for spec in _DEFAULT_DEVICE_SPECS:
+            self.add_device(VirtualDevice(
+                device_id=spec["device_id"],
+                name=spec["name"],
+                device_type=spec["device_type"],
+                state=dict(spec["state"]),
+                capabilities=spec["capabilities"],
+            ))
+
+        logger.info(f"Initialized {len(_DEFAULT_DEVICE_SPECS)} virtual devices")
 
     def add_device(self, device: VirtualDevice) -> None:
+        previous = self.devices.get(device.device_id)
+        if previous is not None and previous.device_type != device.device_type:
+            self._by_type[previous.device_type].pop(device.device_id, None)
         self.devices[device.device_id] = device
+        self._by_type[device.device_type][device.device_id] = device
+        self._index_for_search(device)
         logger.info(f"Added virtual device: {device.name}")
 
     def remove_device(self, device_id: str) -> bool:
         if device_id not in self.devices:
             return False
         device = self.devices.pop(device_id)
+        self._by_type[device.device_type].pop(device_id, None)
+        self._search_index.pop(device_id, None)
         logger.info(f"Removed virtual device: {device.name}")
         return True
 
@@ -491,11 +605,13 @@ class VirtualDeviceManager:
     def list_devices(
         self,
         device_type: Optional[VirtualDeviceType] = None
-    ) -> List[VirtualDevice]:
-        devices = list(self.devices.values())
-        if device_type:
-            devices = [d for d in devices if d.device_type == device_type]
-        return devices
+    ) -> Iterable[VirtualDevice]:
+        # Live views, not copies; wrap in list() to keep a snapshot or to
+        # add/remove devices while iterating.
+        if device_type is None:
+            return self.devices.values()
+        by_type = self._by_type.get(device_type)
+        return by_type.values() if by_type is not None else ()
 
     def execute_command(
         self,
@@ -507,7 +623,7 @@ class VirtualDeviceManager:
         if not device:
             return {
                 "success": False,
-                "message": f"设备不存在: {device_id}",
+                "message": _ERR_NO_DEVICE.format(device_id),
             }
 
         return device.execute_command(command, params)
@@ -516,13 +632,12 @@ class VirtualDeviceManager:
         self,
         commands: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
+        execute = self.execute_command
         results = []
+        append = results.append
         for cmd in commands:
-            device_id = cmd.get("device_id")
-            command = cmd.get("command")
-            params = cmd.get("params", {})
-            result = self.execute_command(device_id, command, params)
-            results.append(result)
+            get = cmd.get
+            append(execute(get("device_id"), get("command"), get("params") or {}))
         return results
 
     def set_device_availability(
@@ -539,11 +654,20 @@ class VirtualDeviceManager:
 
     def search_devices(self, query: str) -> List[VirtualDevice]:
         query_lower = query.lower()
-        return [
-            device for device in self.devices.values()
-            if (query_lower in device.name.lower() or 
-                query_lower in device.device_id.lower())
-        ]
+        index = self._search_index
+        matches = []
+        for device_id, device in self.devices.items():
+            entry = index.get(device_id)
+            if entry is None or entry[0] is not device or entry[1] != device.name:
+                entry = self._index_for_search(device)
+            if query_lower in entry[2] or query_lower in entry[3]:
+                matches.append(device)
+        return matches
+
+    def _index_for_search(self, device: VirtualDevice) -> Tuple[VirtualDevice, str, str, str]:
+        entry = (device, device.name, device.name.lower(), device.device_id.lower())
+        self._search_index[device.device_id] = entry
+        return entry
 
     def get_all_states(self) -> Dict[str, Dict[str, Any]]:
         return {
@@ -563,21 +687,29 @@ class VirtualDeviceManager:
         }
 
     def save_to_file(self, filepath: str) -> None:
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        data = self.to_dict()
+        if orjson is not None:
+            with open(filepath, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(filepath, "w", encoding="utf-8") as f:
+                _json.dump(data, f, ensure_ascii=False, indent=2)
         logger.info(f"Virtual devices saved to {filepath}")
 
     @classmethod
     def load_from_file(cls, filepath: str) -> "VirtualDeviceManager":
-        manager = cls()
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        # The file is a full snapshot, so start empty rather than building
+        # the defaults only to overwrite them.
+        manager = cls(load_defaults=False)
+        with open(filepath, "rb") as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else _json.loads(raw)
 
         for device_data in data.get("devices", []):
             device = VirtualDevice(
                 device_id=device_data["device_id"],
                 name=device_data["name"],
-                device_type=VirtualDeviceType(device_data["device_type"]),
+                device_type=_device_type(device_data["device_type"]),
                 state=device_data.get("state", {}),
                 attributes=device_data.get("attributes", {}),
                 capabilities=device_data.get("capabilities", []),
@@ -72,6 +72,12 @@ class DeviceSkill(Skill):
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(config)
         self.devices: Dict[str, Any] = {}
+        self._dispatch = {
+            "turn_on": self._turn_on,
+            "turn_off": self._turn_off,
+            "toggle": self._toggle,
+            "set_brightness": self._set_brightness,
+        }
 
     async def initialize(self) -> bool:
         logger.info("DeviceSkill initialized")
@@ -85,18 +91,12 @@ class DeviceSkill(Skill):
         self, command: str, params: Dict[str, Any], context: SkillContext
     ) -> SkillResult:
         try:
-            if command == "turn_on":
-                return await self._turn_on(params, context)
-            elif command == "turn_off":
-                return await self._turn_off(params, context)
-            elif command == "toggle":
-                return await self._toggle(params, context)
-            elif command == "set_brightness":
-                return await self._set_brightness(params, context)
-            else:
+            handler = self._dispatch.get(command)
+            if handler is None:
                 return SkillResult(
                     success=False, error=f"Unknown command: {command}"
                 )
+            return await handler(params, context)
 
         except Exception as e:
             logger.error(f"DeviceSkill error: {e}")
@@ -208,6 +208,7 @@ class NotificationSkill(Skill):
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(config)
         self.notifications: list = []
+        self._dispatch = {"send": self._send}
 
     async def initialize(self) -> bool:
         logger.info("NotificationSkill initialized")
@@ -221,12 +222,12 @@ class NotificationSkill(Skill):
         self, command: str, params: Dict[str, Any], context: SkillContext
     ) -> SkillResult:
         try:
-            if command == "send":
-                return await self._send(params, context)
-            else:
+            handler = self._dispatch.get(command)
+            if handler is None:
                 return SkillResult(
                     success=False, error=f"Unknown command: {command}"
                 )
+            return await handler(params, context)
 
         except Exception as e:
             logger.error(f"NotificationSkill error: {e}")
@@ -0,0 +1,155 @@
+import pytest
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from butler.proactive.energy_optimizer import EnergyOptimizer, EnergyProfile, EnergySuggestion
+
+
+@pytest.fixture
+def optimizer():
+    optimizer = EnergyOptimizer()
+    optimizer.add_device_profile("living_room_light", "客厅灯", 60.0)
+    optimizer.add_device_profile("air_conditioner", "空调", 2000.0)
+    return optimizer
+
+
+class TestEnergyOptimizer:
+    def test_current_total_power_tracks_latest_reading(self, optimizer):
+        optimizer.record_consumption("living_room_light", 60.0)
+        optimizer.record_consumption("air_conditioner", 1800.0)
+        assert optimizer._current_total_power == pytest.approx(1860.0)
+
+        optimizer.record_consumption("air_conditioner", 2500.0)
+        assert optimizer._current_total_power == pytest.approx(2560.0)
+
+    def test_save_and_load_round_trip(self, optimizer, tmp_path):
+        optimizer.record_consumption("air_conditioner", 2200.0)
+        optimizer.suggestions["s1"] = EnergySuggestion(
+            suggestion_id="s1",
+            title="关闭待机设备",
+            description="测试",
+            potential_savings=0.5,
+            priority=2,
+        )
+
+        filepath = str(tmp_path / "energy.json")
+        optimizer.save_to_file(filepath)
+        loaded = EnergyOptimizer.load_from_file(filepath)
+
+        assert set(loaded.energy_profiles) == {"living_room_light", "air_conditioner"}
+        assert loaded.energy_profiles["air_conditioner"].base_power == 2000.0
+        assert loaded.suggestions["s1"].title == "关闭待机设备"
+
+    def test_device_classification_on_registration(self, optimizer):
+        optimizer.add_device_profile("bedroom_lamp", "卧室灯", 40.0)
+        optimizer.add_device_profile("heater", "取暖器", 1500.0)
+
+        assert list(optimizer._lighting_ids) == ["living_room_light", "bedroom_lamp"]
+        assert list(optimizer._high_power_ids) == ["air_conditioner", "heater"]
+
+        optimizer.add_device_profile("heater", "取暖器", 800.0)
+        assert list(optimizer._high_power_ids) == ["air_conditioner"]
+
+    def test_loaded_profiles_are_classified(self, optimizer, tmp_path):
+        filepath = str(tmp_path / "energy.json")
+        optimizer.save_to_file(filepath)
+        loaded = EnergyOptimizer.load_from_file(filepath)
+
+        assert list(loaded._lighting_ids) == ["living_room_light"]
+        assert list(loaded._high_power_ids) == ["air_conditioner"]
+
+    def test_suggestion_actions_do_not_share_params(self, optimizer, monkeypatch):
+        from butler.proactive import energy_optimizer as module
+
+        class _Evening(module.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return module.datetime(2024, 3, 1, 18, 30)
+
+        monkeypatch.setattr(module, "datetime", _Evening)
+        optimizer.add_device_profile("kitchen_light", "厨房灯", 30.0)
+
+        suggestions = optimizer._optimize_lighting({})
+        actions = [s.actions[0] for s in suggestions]
+
+        assert [a["params"]["target"] for a in actions] == ["living_room_light", "kitchen_light"]
+        assert all(a["action_type"] == "set_brightness" for a in actions)
+        assert all(a["params"]["value"] == 70 for a in actions)
+        actions[0]["params"]["value"] = 10
+        assert actions[1]["params"]["value"] == 70
+        assert module._LIGHTING_ACTION["params"] == {"value": 70}
+
+    def test_profiles_removed_directly_are_skipped(self, optimizer, monkeypatch):
+        from butler.proactive import energy_optimizer as module
+
+        class _Evening(module.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return module.datetime(2024, 3, 1, 18, 30)
+
+        monkeypatch.setattr(module, "datetime", _Evening)
+        optimizer.record_consumption("air_conditioner", 1900.0)
+        del optimizer.energy_profiles["living_room_light"]
+        del optimizer.energy_profiles["air_conditioner"]
+
+        assert optimizer._optimize_lighting({}) == []
+        assert optimizer._suggest_usage_shift({}) == []
+
+    def test_load_without_streaming_parser(self, optimizer, tmp_path, monkeypatch):
+        from butler.proactive import energy_optimizer as module
+
+        filepath = str(tmp_path / "energy.json")
+        optimizer.save_to_file(filepath)
+        monkeypatch.setattr(module, "ijson", None)
+        loaded = EnergyOptimizer.load_from_file(filepath)
+
+        assert set(loaded.energy_profiles) == set(optimizer.energy_profiles)
+
+    def test_record_consumption_uses_local_hour(self, optimizer):
+        from datetime import datetime
+
+        optimizer.record_consumption("air_conditioner", 1800.0, datetime(2024, 3, 1, 14, 45).timestamp())
+        assert optimizer.consumption_history["air_conditioner"][-1]["hour"] == 14
+
+    def test_record_consumption_batch_matches_single_samples(self, optimizer):
+        from datetime import datetime
+
+        timestamps = [datetime(2024, 3, 1, h, 0).timestamp() for h in (17, 18, 18, 19)]
+        powers = [1500.0, 3200.0, 3100.0, 900.0]
+
+        reference = EnergyOptimizer()
+        reference.add_device_profile("air_conditioner", "空调", 2000.0)
+        for power, ts in zip(powers, timestamps):
+            reference.record_consumption("air_conditioner", power, ts)
+        optimizer.record_consumption_batch("air_conditioner", powers, timestamps)
+
+        expected = reference.energy_profiles["air_conditioner"]
+        profile = optimizer.energy_profiles["air_conditioner"]
+        assert profile.avg_hourly_consumption == pytest.approx(expected.avg_hourly_consumption)
+        assert profile.avg_daily_consumption == pytest.approx(expected.avg_daily_consumption)
+        assert profile.peak_hours == expected.peak_hours == [18]
+        assert list(optimizer.consumption_history["air_conditioner"]) == list(
+            reference.consumption_history["air_conditioner"]
+        )
+        assert optimizer._current_total_power == pytest.approx(900.0)
+
+    def test_record_consumption_batch_rejects_mismatched_lengths(self, optimizer):
+        with pytest.raises(ValueError):
+            optimizer.record_consumption_batch("air_conditioner", [1.0, 2.0], [0.0])
+
+    def test_check_standby_devices(self, optimizer):
+        now = time.time()
+        optimizer.record_consumption("air_conditioner", 1900.0, now - 6 * 3600)
+        for i in range(10):
+            optimizer.record_consumption("air_conditioner", 150.0, now - (10 - i) * 60)
+
+        suggestions = optimizer._check_standby_devices({"threshold_hours": 4})
+
+        assert len(suggestions) == 1
+        assert suggestions[0].title == "关闭待机设备: 空调"
+        assert suggestions[0].potential_savings == pytest.approx(200.0 * 24 / 1000)
+        assert suggestions[0].actions[0]["params"] == {"target": "air_conditioner"}
+        assert optimizer._check_standby_devices({"threshold_hours": 8}) == []
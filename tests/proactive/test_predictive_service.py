@@ -0,0 +1,177 @@
+import pytest
+import sys
+import os
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from butler.proactive.predictive_service import PredictiveService, Prediction
+
+
+def _ts(hour, minute=0, day=1):
+    return datetime(2024, 3, day, hour, minute).timestamp()
+
+
+@pytest.fixture
+def service():
+    return PredictiveService()
+
+
+class TestPredictiveService:
+    def test_predict_user_arrival_uses_average_local_time(self, service):
+        for day, minute in ((1, 0), (2, 30), (3, 0)):
+            service.record_user_activity("user_1", "arrival", _ts(18, minute, day))
+
+        prediction = service.predict_user_arrival("user_1", "evening")
+
+        assert prediction is not None
+        predicted = datetime.fromisoformat(prediction.predicted_value)
+        assert (predicted.hour, predicted.minute) == (18, 10)
+
+    def test_predict_user_arrival_requires_history(self, service):
+        service.record_user_activity("user_1", "arrival", _ts(18))
+        assert service.predict_user_arrival("user_1", "evening") is None
+
+    def test_user_pattern_summary_formats_local_time(self, service):
+        service.record_user_activity("user_1", "departure", _ts(8, 15))
+        summary = service.get_user_pattern_summary("user_1")
+        assert summary["departure_times"]["morning"] == ["08:15"]
+
+    def test_user_patterns_are_bounded(self, service):
+        from butler.proactive.predictive_service import PATTERN_HISTORY_SIZE
+
+        for i in range(PATTERN_HISTORY_SIZE + 50):
+            service.record_user_activity("user_1", "arrival", _ts(18, i % 60))
+
+        assert len(service.user_patterns["arrival_times"]["evening"]) == PATTERN_HISTORY_SIZE
+        for times in service.user_patterns["activity_times"].values():
+            assert len(times) <= PATTERN_HISTORY_SIZE
+
+    def test_save_and_load_round_trip(self, service, tmp_path):
+        for day in (1, 2, 3):
+            service.record_user_activity("user_1", "arrival", _ts(19, 0, day))
+        service.predict_user_arrival("user_1", "evening")
+
+        filepath = str(tmp_path / "predictive.json")
+        service.save_to_file(filepath)
+        loaded = PredictiveService.load_from_file(filepath)
+
+        assert set(loaded.predictions) == set(service.predictions)
+        assert list(loaded.user_patterns["arrival_times"]["evening"]) == list(
+            service.user_patterns["arrival_times"]["evening"]
+        )
+        assert loaded.predict_user_arrival("user_1", "evening") is not None
+
+    def test_hour_counts_follow_evicted_records(self, service):
+        for _ in range(100):
+            service.record_device_usage("lamp", "on", _ts(7))
+        for _ in range(30):
+            service.record_device_usage("lamp", "off", _ts(21))
+
+        hour_counts = service._hour_counts["lamp"]
+        assert hour_counts[7] == 70
+        assert hour_counts[21] == 30
+        assert sum(hour_counts) == len(service.device_usage["lamp"])
+
+    def test_predict_device_need_for_current_hour(self, service):
+        now = time.time()
+        for _ in range(2):
+            service.record_device_usage("kettle", "on", now)
+        service.record_device_usage("kettle", "on", now - 12 * 3600)
+        service.record_device_usage("kettle", "off", now - 12 * 3600)
+        service.record_device_usage("kettle", "off", now - 12 * 3600)
+        assert service.predict_device_need("kettle", {}) is None
+
+        service.record_device_usage("kettle", "on", now)
+        prediction = service.predict_device_need("kettle", {})
+        assert prediction is not None
+        assert prediction.prediction_type == "device_need"
+
+    def test_device_usage_summary_active_percentage(self, service):
+        for i in range(120):
+            service.record_device_usage("tv", "on" if i % 4 == 0 else "off", _ts(20))
+
+        summary = service.get_device_usage_summary("tv")
+
+        assert summary["total_records"] == 100
+        assert summary["active_percentage"] == pytest.approx(25.0)
+        assert service.get_device_usage_summary("unknown") == {"error": "No usage data"}
+
+    def test_load_without_streaming_parser(self, service, tmp_path, monkeypatch):
+        from butler.proactive import predictive_service as module
+
+        for day in (1, 2, 3):
+            service.record_user_activity("user_1", "arrival", _ts(19, 0, day))
+        filepath = str(tmp_path / "predictive.json")
+        service.save_to_file(filepath)
+        monkeypatch.setattr(module, "ijson", None)
+        loaded = PredictiveService.load_from_file(filepath)
+
+        assert len(loaded.user_patterns["arrival_times"]["evening"]) == 3
+
+    def test_clear_old_predictions_by_age(self, service):
+        fresh = Prediction("fresh", "device_need", 0.7, "likely_needed", time.time(), "")
+        stale = Prediction(
+            "stale", "device_need", 0.7, "likely_needed", time.time(), "",
+            created_at=time.time() - 30 * 3600,
+        )
+        service._track_prediction(fresh)
+        service._track_prediction(stale)
+
+        assert [p.prediction_id for p in service.get_all_predictions()] == ["fresh"]
+        assert service.clear_old_predictions() == 1
+        assert list(service.predictions) == ["fresh"]
+        assert [p.prediction_id for p in service.prediction_history] == ["stale"]
+        assert service.clear_old_predictions() == 0
+
+    def test_untracked_predictions_fall_back_to_created_at(self, service):
+        service.predictions["fresh"] = Prediction("fresh", "device_need", 0.7, "likely_needed", time.time(), "")
+        service.predictions["stale"] = Prediction(
+            "stale", "device_need", 0.7, "likely_needed", time.time(), "",
+            created_at=time.time() - 30 * 3600,
+        )
+
+        assert [p.prediction_id for p in service.get_all_predictions()] == ["fresh"]
+        assert service.clear_old_predictions() == 1
+        assert list(service.predictions) == ["fresh"]
+
+    def test_directly_removed_prediction_is_not_cleared_twice(self, service):
+        stale = Prediction(
+            "stale", "device_need", 0.7, "likely_needed", time.time(), "",
+            created_at=time.time() - 30 * 3600,
+        )
+        service._track_prediction(stale)
+        del service.predictions["stale"]
+
+        assert service.clear_old_predictions() == 0
+        assert service.prediction_history == []
+
+    def test_untracked_prediction_found_when_sizes_match(self, service):
+        service._track_prediction(Prediction("fresh", "device_need", 0.7, "likely_needed", time.time(), ""))
+        del service.predictions["fresh"]
+        service.predictions["stale"] = Prediction(
+            "stale", "device_need", 0.7, "likely_needed", time.time(), "",
+            created_at=time.time() - 30 * 3600,
+        )
+
+        assert service.clear_old_predictions() == 1
+        assert service.predictions == {}
+
+    def test_activity_key_uses_local_weekday_and_hour(self, service):
+        service.record_user_activity("user_1", "arrival", _ts(18, 5, day=4))
+        assert list(service.user_patterns["activity_times"]) == ["user_1_arrival_0_18"]
+
+    def test_prediction_to_dict_is_cached(self):
+        prediction = Prediction("p1", "device_need", 0.7, "likely_needed", 0.0, "")
+        first = prediction.to_dict()
+        assert prediction._dict_cache is not None
+        assert "_dict_cache" not in first
+
+        first["confidence"] = 0.0
+        assert prediction.to_dict()["confidence"] == 0.7
+        assert prediction == Prediction(
+            "p1", "device_need", 0.7, "likely_needed", 0.0, "", created_at=prediction.created_at
+        )
+        prediction.confidence = 0.9
+        assert prediction.to_dict()["confidence"] == 0.9
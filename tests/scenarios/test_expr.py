@@ -0,0 +1,55 @@
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from butler.scenarios.expr import compile_expr, expr_names
+
+
+@pytest.fixture
+def context():
+    return {
+        "hour": 19,
+        "temperature": 28.5,
+        "user_location": "home",
+        "device_states": {"tv": "on"},
+    }
+
+
+class TestCompileExpr:
+    @pytest.mark.parametrize("src,expected", [
+        ("hour >= 18", True),
+        ("18 <= hour < 22", True),
+        ("0 < hour < 6", False),
+        ("hour % 2 == 1 and temperature > 25", True),
+        ("hour * 2 - 8 == 30", True),
+        ("temperature / 2 > 20 or user_location == 'home'", True),
+        ("not user_location == 'office'", True),
+        ("-hour < 0", True),
+        ("user_location in ['home', 'garden']", True),
+        ("device_states['tv'] == 'on'", True),
+    ])
+    def test_evaluates_like_python(self, context, src, expected):
+        assert compile_expr(src)(context) == expected == eval(src, {"__builtins__": {}}, dict(context))
+
+    @pytest.mark.parametrize("src", [
+        "len(device_states) == 1",
+        "user_location.upper() == 'HOME'",
+        "[x for x in device_states]",
+        "__import__('os')",
+        "lambda: 1",
+    ])
+    def test_rejects_unsupported_syntax(self, src):
+        with pytest.raises(ValueError):
+            compile_expr(src)
+
+    def test_unknown_name_raises_name_error(self, context):
+        with pytest.raises(NameError):
+            compile_expr("missing > 1")(context)
+
+    def test_names_are_collected_once(self):
+        assert expr_names("hour > 6 and hour < 22 or user_location == 'home'") == ("hour", "user_location")
+
+    def test_compiled_once(self):
+        assert compile_expr("hour > 1") is compile_expr("hour > 1")
@@ -0,0 +1,423 @@
+import pytest
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from butler.scenarios.scenario import (
+    Scenario, ScenarioCondition, ScenarioAction, ActionResult,
+    ScenarioTransition, ScenarioType, ScenarioState,
+    DeviceStateCondition, LocationCondition, TimeCondition, _evaluate_shared
+)
+
+
+@pytest.fixture
+def context():
+    return {
+        "current_time": 1000.0,
+        "time_of_day": "evening",
+        "weather": {"temperature": 28, "condition": "sunny"},
+        "user_location": "home",
+        "user_presence": {"alice": True},
+        "device_states": {"thermostat": 23, "tv": "on"},
+    }
+
+
+class TestScenarioCondition:
+    @pytest.mark.parametrize("condition, expected", [
+        (ScenarioCondition("time", value="evening"), True),
+        (ScenarioCondition("time", operator="not_equals", value="evening"), False),
+        (ScenarioCondition("time", operator="in_range",
+                           parameters={"start_time": 500.0, "end_time": 1500.0}), True),
+        (ScenarioCondition("device_state", parameters={"device_id": "tv"}, value="on"), True),
+        (ScenarioCondition("device_state", parameters={"device_id": "thermostat"},
+                           operator="greater_than", value=25), False),
+        (ScenarioCondition("device_state", parameters={"device_id": "missing"}, value="on"), False),
+        (ScenarioCondition("weather", parameters={"condition": "temperature"},
+                           operator="greater_than", value=25), True),
+        (ScenarioCondition("weather", parameters={"condition": "condition"}, value="rainy"), False),
+        (ScenarioCondition("location", value=["home", "office"]), True),
+        (ScenarioCondition("location", operator="not_equals", value="home"), False),
+        (ScenarioCondition("user_presence", parameters={"user_id": "alice"}, value=True), True),
+        (ScenarioCondition("custom", parameters={"callback": lambda ctx: "tv" in ctx["device_states"]}), True),
+        (ScenarioCondition("expression", parameters={"expression": "user_location == 'home'"}), True),
+        (ScenarioCondition("unknown"), False),
+        (ScenarioCondition("unknown", enabled=False), True),
+    ])
+    def test_evaluate(self, condition, context, expected):
+        assert condition.evaluate(context) is expected
+
+    def test_invalid_expression_is_false(self, context):
+        condition = ScenarioCondition("expression", parameters={"expression": "undefined_name > 1"})
+        assert condition.evaluate(context) is False
+
+    def test_expression_is_compiled_once(self, context):
+        from butler.scenarios.expr import _compile
+
+        condition = ScenarioCondition("expression", parameters={"expression": "time_of_day == 'evening'"})
+        condition.evaluate(context)
+        hits = _compile.cache_info().hits
+        assert condition.evaluate(context) is True
+        assert _compile.cache_info().hits == hits + 1
+
+    def test_expression_has_no_builtins(self, context):
+        condition = ScenarioCondition("expression", parameters={"expression": "len(device_states) == 2"})
+        assert condition.evaluate(context) is False
+
+    def test_constructor_returns_type_subclass(self):
+        assert type(ScenarioCondition("time", value="evening")) is TimeCondition
+        assert type(ScenarioCondition(condition_type="location", value="home")) is LocationCondition
+        assert type(ScenarioCondition("unknown")) is ScenarioCondition
+        assert TimeCondition(value="evening").condition_type == "time"
+        assert not hasattr(TimeCondition(), "__dict__")
+
+    def test_location_condition_follows_value_changes(self, context):
+        condition = ScenarioCondition("location", value="home")
+        assert condition.evaluate(context) is True
+
+        condition.value = "office"
+        assert condition.evaluate(context) is False
+        assert condition.evaluate({**context, "user_location": "office"}) is True
+        assert condition.required_context() == ("user_location", "office")
+
+    def test_dict_round_trip(self, context):
+        condition = ScenarioCondition("device_state", parameters={"device_id": "tv"}, value="on")
+        restored = ScenarioCondition.from_dict(condition.to_dict())
+        assert isinstance(restored, DeviceStateCondition)
+        assert restored == condition
+        assert restored.evaluate(context) is True
+
+
+class TestScenario:
+    def test_conditions_reordered_by_selectivity(self, context):
+        scenario = Scenario("s1", "Test")
+        always_true = ScenarioCondition("time", value="evening")
+        often_false = ScenarioCondition("device_state", parameters={"device_id": "tv"}, value="off")
+        scenario.add_condition(always_true)
+        scenario.add_condition(often_false)
+
+        for i in range(Scenario._REORDER_INTERVAL):
+            context["device_states"] = {"tv": f"standby_{i}"}
+            assert scenario.evaluate_conditions(context) is False
+
+        assert scenario._evaluation_order == [often_false, always_true]
+        assert scenario.conditions == [always_true, often_false]
+        evaluated = always_true._eval_count
+        context["device_states"] = {"tv": "on"}
+        scenario.evaluate_conditions(context)
+        assert always_true._eval_count == evaluated
+
+    def test_evaluate_conditions_without_conditions(self, context):
+        assert Scenario("s1", "Test").evaluate_conditions(context) is True
+
+    def test_activate_runs_actions_concurrently(self):
+        calls = []
+
+        async def executor(action_type, parameters):
+            calls.append(action_type)
+            return action_type
+
+        scenario = Scenario("s1", "Test")
+        scenario.add_action(ScenarioAction("slow", delay=0.2))
+        scenario.add_action(ScenarioAction("fast"))
+        scenario.add_action(ScenarioAction("disabled", enabled=False))
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            assert await scenario.activate({"action_executor": executor}) is True
+            return loop.time() - start
+
+        elapsed = asyncio.run(run())
+        assert calls == ["fast", "slow"]
+        assert elapsed < 0.35
+        assert scenario.state == ScenarioState.ACTIVE
+        assert scenario.activation_count == 1
+
+    def test_sequential_actions_preserve_order(self):
+        calls = []
+
+        async def executor(action_type, parameters):
+            calls.append(action_type)
+
+        scenario = Scenario("s1", "Test", sequential_actions=True)
+        scenario.add_action(ScenarioAction("first", delay=0.05))
+        scenario.add_action(ScenarioAction("second"))
+        scenario.add_exit_action(ScenarioAction("exit"))
+
+        async def run():
+            await scenario.activate({"action_executor": executor})
+            await scenario.deactivate({"action_executor": executor})
+
+        asyncio.run(run())
+        assert calls == ["first", "second", "exit"]
+        assert scenario.state == ScenarioState.INACTIVE
+
+    def test_synchronous_executor_runs_inline(self, monkeypatch):
+        calls = []
+
+        def executor(action_type, parameters):
+            calls.append(action_type)
+            return parameters.get("value")
+
+        def fail_task_group():
+            raise AssertionError("TaskGroup should not be used")
+
+        monkeypatch.setattr(asyncio, "TaskGroup", fail_task_group)
+        scenario = Scenario("s1", "Test")
+        scenario.add_action(ScenarioAction("a", parameters={"value": 1}))
+        scenario.add_action(ScenarioAction("b", parameters={"value": 2}))
+
+        results = asyncio.run(scenario._run_actions(scenario.actions, {"action_executor": executor}))
+
+        assert calls == ["a", "b"]
+        assert [r.result for r in results] == [1, 2]
+
+    def test_to_dict_reflects_structure_and_state(self):
+        scenario = Scenario("s1", "Test", scenario_type=ScenarioType.TIME_BASED)
+        scenario.add_condition(ScenarioCondition("time", value="morning"))
+        first = scenario.to_dict()
+        assert first["scenario_type"] == "time_based"
+        assert first["state"] == "inactive"
+        assert len(first["conditions"]) == 1
+        assert scenario.to_dict()["conditions"] is first["conditions"]
+
+        scenario.add_action(ScenarioAction("turn_on", parameters={"target": "light"}))
+        scenario.add_transition(ScenarioTransition("s1", "s2"))
+        scenario.state = ScenarioState.PAUSED
+        second = scenario.to_dict()
+        assert second["state"] == "paused"
+        assert second["actions"][0]["action_type"] == "turn_on"
+        assert second["transitions"] == [
+            {"from_scenario_id": "s1", "to_scenario_id": "s2", "conditions_count": 0}
+        ]
+
+    def test_to_dict_sees_field_updates(self):
+        scenario = Scenario("s1", "Test")
+        condition = ScenarioCondition("time", value="morning")
+        action = ScenarioAction("turn_on")
+        scenario.add_condition(condition)
+        scenario.add_action(action)
+        scenario.to_dict()
+
+        action.enabled = False
+        action.delay = 2.0
+        condition.value = "evening"
+        data = scenario.to_dict()
+        assert data["actions"][0]["enabled"] is False
+        assert data["actions"][0]["delay"] == 2.0
+        assert data["conditions"][0]["value"] == "evening"
+
+    def test_state_and_type_values_follow_assignment(self):
+        scenario = Scenario("s1", "Test", scenario_type=ScenarioType.TIME_BASED)
+        assert scenario._type_value == "time_based"
+        assert scenario._state_value == "inactive"
+
+        scenario.state = ScenarioState.PAUSED
+        scenario.scenario_type = ScenarioType.MANUAL
+        assert scenario._state_value is ScenarioState.PAUSED.value
+        assert scenario._type_value == "manual"
+
+    def test_condition_and_action_use_slots(self):
+        condition = ScenarioCondition("time", value="morning")
+        action = ScenarioAction("turn_on")
+        assert not hasattr(condition, "__dict__")
+        assert not hasattr(action, "__dict__")
+        with pytest.raises(AttributeError):
+            condition.unexpected = True
+
+    def test_listener_registry(self):
+        events = []
+
+        class Recorder:
+            def on_change(self, scenario):
+                events.append(scenario.state)
+
+        recorder = Recorder()
+        scenario = Scenario("s1", "Test")
+        scenario.add_listener(recorder.on_change)
+        scenario.add_listener(recorder.on_change)
+        scenario.state = ScenarioState.ACTIVE
+        scenario.pause()
+        assert events == [ScenarioState.PAUSED]
+
+        scenario.remove_listener(recorder.on_change)
+        scenario.remove_listener(recorder.on_change)
+        scenario.resume()
+        assert events == [ScenarioState.PAUSED]
+
+    def test_unchanged_context_reuses_last_result(self, context):
+        scenario = Scenario("s1", "Test")
+        condition = ScenarioCondition("expression", parameters={"expression": "hour >= 18"})
+        scenario.add_condition(condition)
+
+        assert scenario.evaluate_conditions({**context, "hour": 19}) is True
+        assert scenario.evaluate_conditions({**context, "hour": 19}) is True
+        assert condition._eval_count == 1
+
+        assert scenario.evaluate_conditions({**context, "hour": 9}) is False
+        assert condition._eval_count == 2
+
+    def test_changed_condition_is_not_served_from_last_result(self, context):
+        scenario = Scenario("s1", "Test")
+        condition = ScenarioCondition("time", value="morning")
+        scenario.add_condition(condition)
+        morning = {**context, "time_of_day": "morning"}
+
+        assert scenario.evaluate_conditions(morning) is True
+        condition.value = "evening"
+        assert scenario.evaluate_conditions(morning) is False
+        condition.value = "morning"
+        condition.enabled = False
+        assert scenario.evaluate_conditions({**context, "time_of_day": "night"}) is True
+
+    def test_callbacks_are_never_memoized(self, context):
+        calls = []
+        scenario = Scenario("s1", "Test")
+        scenario.add_condition(ScenarioCondition("custom", parameters={"callback": lambda ctx: calls.append(1) or True}))
+
+        scenario.evaluate_conditions(context)
+        scenario.evaluate_conditions(context)
+        assert len(calls) == 2
+
+
+class TestScenarioAction:
+    def test_constant_results_are_shared_and_read_only(self):
+        skipped = asyncio.run(ScenarioAction("noop", enabled=False).execute({}))
+        missing = asyncio.run(ScenarioAction("noop").execute({}))
+
+        assert skipped == ActionResult(success=True, skipped=True)
+        assert missing == ActionResult(success=False, error="No action executor")
+        assert asyncio.run(ScenarioAction("noop", enabled=False).execute({})) is skipped
+        with pytest.raises(AttributeError):
+            missing.success = True
+
+    def test_result_supports_dict_access(self):
+        result = ActionResult(success=True, result=None)
+        assert result.to_dict() == {"success": True, "result": None}
+        assert result["success"] is True
+        assert result.get("error") is None
+        assert ActionResult(success=False, error="No action executor").get("error") == "No action executor"
+        with pytest.raises(KeyError):
+            result["error"]
+
+        failed = ActionResult(success=False, error="boom")
+        assert "error" in failed and "result" not in failed
+        assert dict(failed) == failed.to_dict() == {"success": False, "error": "boom"}
+        assert list(failed.keys()) == list(failed) == ["success", "error"]
+        assert dict(ActionResult(success=True, skipped=True)) == {"success": True, "skipped": True}
+
+
+class TestSharedConditionResults:
+    def test_identical_conditions_evaluated_once(self, context):
+        first, second = Scenario("s1", "A"), Scenario("s2", "B")
+        first_condition = ScenarioCondition("location", value=["home"])
+        second_condition = ScenarioCondition("location", value=["home"])
+        first.add_condition(first_condition)
+        second.add_condition(second_condition)
+
+        shared = {}
+        assert first.evaluate_conditions(context, shared) is True
+        assert second.evaluate_conditions(context, shared) is True
+        assert first_condition._eval_count == 1
+        assert second_condition._eval_count == 0
+
+    def test_custom_conditions_are_not_shared(self):
+        condition = ScenarioCondition("custom", parameters={"callback": lambda ctx: True})
+        assert condition._share_key() is None
+
+    def test_changed_condition_gets_its_own_result(self, context):
+        first = ScenarioCondition("time", value="morning")
+        second = ScenarioCondition("time", value="morning")
+        morning = {**context, "time_of_day": "morning"}
+
+        shared = {}
+        second.value = "evening"
+        assert _evaluate_shared(first, morning, shared) is True
+        assert _evaluate_shared(second, morning, shared) is False
+
+    def test_list_and_tuple_values_do_not_share(self):
+        as_list = ScenarioCondition("location", value=["home"])
+        as_tuple = ScenarioCondition("location", value=("home",))
+        assert as_list._share_key() != as_tuple._share_key()
+
+
+class TestConcurrentActions:
+    def test_executor_concurrency_is_bounded(self):
+        in_flight = 0
+        peak = 0
+
+        async def executor(action_type, parameters):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+        scenario = Scenario("s1", "Test", max_concurrent_actions=3)
+        for i in range(10):
+            scenario.add_action(ScenarioAction(f"action_{i}"))
+
+        results = asyncio.run(scenario._run_actions(scenario.actions, {"action_executor": executor}))
+
+        assert len(results) == 10
+        assert all(r.success for r in results)
+        assert peak == 3
+
+    def test_failed_action_is_retried(self, monkeypatch):
+        from butler.scenarios import scenario as module
+
+        attempts = []
+        delays = []
+        real_sleep = asyncio.sleep
+
+        async def fake_sleep(seconds):
+            delays.append(seconds)
+            await real_sleep(0)
+
+        async def flaky(action_type, parameters):
+            attempts.append(action_type)
+            if len(attempts) < 3:
+                raise ConnectionError("broker unavailable")
+            return "ok"
+
+        monkeypatch.setattr(module.asyncio, "sleep", fake_sleep)
+        action = ScenarioAction("turn_on")
+        action.retry_count = 2
+
+        result = asyncio.run(action.execute({"action_executor": flaky}))
+        assert result == ActionResult(success=True, result="ok")
+        assert len(attempts) == 3
+        assert len(delays) == 2
+        assert 0.05 <= delays[0] <= 0.1 and 0.1 <= delays[1] <= 0.15
+
+    def test_retries_exhausted(self):
+        async def broken(action_type, parameters):
+            raise ConnectionError("broker unavailable")
+
+        result = asyncio.run(ScenarioAction("turn_on", retry_count=1).execute({"action_executor": broken}))
+        assert result == ActionResult(success=False, error="broker unavailable")
+
+    def test_active_duration_uses_monotonic_clock(self, monkeypatch):
+        from butler.scenarios import scenario as module
+
+        clock = {"wall": 1000.0, "mono": 50.0}
+        monkeypatch.setattr(module.time, "time", lambda: clock["wall"])
+        monkeypatch.setattr(module.time, "monotonic", lambda: clock["mono"])
+
+        scenario = Scenario("s1", "Test")
+        assert scenario.get_active_duration() == 0.0
+        asyncio.run(scenario.activate({}))
+
+        clock["wall"] -= 3600.0
+        clock["mono"] += 30.0
+        assert scenario.get_active_duration() == 30.0
+
+        asyncio.run(scenario.deactivate({}))
+        clock["mono"] += 100.0
+        assert scenario.get_active_duration() == 30.0
+
+        asyncio.run(scenario.activate({}))
+        clock["mono"] += 5.0
+        assert scenario.get_active_duration() == 5.0
@@ -0,0 +1,545 @@
+import pytest
+import asyncio
+import json
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from butler.scenarios.scenario import (
+    Scenario, ScenarioAction, ScenarioCondition, ScenarioState, ScenarioTransition, ScenarioType
+)
+from butler.scenarios.scenario_manager import ScenarioManager, ScenarioPriority, ScenarioTemplate, _substitute
+
+
+@pytest.fixture
+def manager():
+    return ScenarioManager()
+
+
+class TestBuildContext:
+    @pytest.mark.parametrize("hour,expected", [
+        (4, "night"), (5, "morning"), (11, "morning"), (12, "afternoon"),
+        (17, "afternoon"), (18, "evening"), (21, "evening"), (22, "night"),
+    ])
+    def test_time_of_day_buckets(self, manager, monkeypatch, hour, expected):
+        stamp = time.mktime((2024, 6, 1, hour, 30, 0, 0, 0, -1))
+        monkeypatch.setattr(time, "time", lambda: stamp)
+
+        context = manager._build_context()
+
+        assert context["hour"] == hour
+        assert context["time_of_day"] == expected
+        assert context["current_time"] == stamp
+
+    def test_context_reused_within_same_second(self, manager, monkeypatch):
+        now = [1000.2]
+        monkeypatch.setattr(time, "time", lambda: now[0])
+
+        first = manager._build_context()
+        now[0] = 1000.9
+        assert manager._build_context() is first
+
+        now[0] = 1001.0
+        second = manager._build_context()
+        assert second is not first
+        assert second["current_time"] == 1001.0
+
+        manager.invalidate_context()
+        assert manager._build_context() is not second
+
+    def test_context_placeholders_are_read_only(self, manager):
+        context = manager._build_context()
+        with pytest.raises(TypeError):
+            context["device_states"]["tv"] = "on"
+
+
+class TestHistory:
+    def test_history_is_bounded(self, manager):
+        scenario = Scenario("s1", "Test")
+        for _ in range(manager._max_history_size + 20):
+            manager._record_scenario_event(scenario, "activated")
+
+        assert len(manager.scenario_history) == manager._max_history_size
+        history = manager.get_history(limit=10)
+        assert isinstance(history, list)
+        assert len(history) == 10
+
+
+class TestScenarioTemplate:
+    def test_parameter_substitution(self):
+        template = ScenarioTemplate(
+            template_id="t",
+            name="Template",
+            description="",
+            scenario_type=ScenarioType.MANUAL,
+            conditions=[{"condition_type": "location", "value": "{value}"}],
+            actions=[
+                {"action_type": "set_temperature", "parameters": {"target": "thermostat"}, "delay": 1.0},
+                {"action_type": "notify", "parameters": {"message": "hi"}},
+            ],
+        )
+
+        scenario = template.create_instance("Instance", {"value": "office", "delay": 3.0})
+
+        assert scenario.conditions[0].value == "office"
+        assert [a.delay for a in scenario.actions] == [3.0, 0.0]
+        assert template.conditions[0]["value"] == "{value}"
+        assert template.actions[0]["delay"] == 1.0
+
+    def test_no_parameters_skips_substitution(self, manager, monkeypatch):
+        from butler.scenarios import scenario_manager as module
+
+        def fail(*args):
+            raise AssertionError("substitution should be skipped")
+
+        monkeypatch.setattr(module, "_substitute", fail)
+        scenario = manager.get_template("sleep").create_instance("Night")
+        assert len(scenario.actions) == 5
+
+    def test_default_templates_not_shared_between_managers(self, manager):
+        other = ScenarioManager()
+        assert other.get_template("wake_up") is not manager.get_template("wake_up")
+        assert other.templates is not manager.templates
+
+        other.get_template("wake_up").conditions.append({"condition_type": "custom"})
+        assert len(manager.get_template("wake_up").conditions) == 1
+        assert len(ScenarioManager().get_template("wake_up").conditions) == 1
+
+        other.unregister_template("wake_up")
+        assert manager.get_template("wake_up") is not None
+
+    def test_priority_and_type_are_int_enums_with_labels(self):
+        assert ScenarioPriority.CRITICAL < ScenarioPriority.LOW
+        assert ScenarioPriority.from_label("high") is ScenarioPriority.HIGH
+        assert ScenarioPriority.MEDIUM.label == "medium"
+        assert ScenarioType.from_label("weather_based") is ScenarioType.WEATHER_BASED
+        assert all(ScenarioType.from_label(t.label) is t for t in ScenarioType)
+
+    def test_template_uses_slots(self, manager):
+        template = manager.get_template("wake_up")
+        assert not hasattr(template, "__dict__")
+        with pytest.raises(AttributeError):
+            template.unexpected = True
+
+    def test_untemplated_items_are_not_copied(self, manager):
+        template = manager.get_template("wake_up")
+        compiled = template._compiled_conditions[0]
+        assert _substitute(compiled, {"unrelated": 1}) is template.conditions[0]
+
+        scenario = manager.create_scenario_from_template("wake_up", "Morning")
+        assert scenario.conditions[0].value == "morning"
+        assert len(scenario.actions) == len(template.actions)
+
+
+class TestListeners:
+    def test_failing_listener_does_not_block_others(self, manager):
+        events = []
+
+        def broken(scenario, event):
+            raise RuntimeError("boom")
+
+        manager.add_listener(lambda s, e: events.append(("first", e)))
+        manager.add_listener(broken)
+        manager.add_listener(lambda s, e: events.append(("last", e)))
+        scenario = Scenario("s1", "Test")
+
+        manager._notify_listeners(scenario, "activated")
+        assert manager._listeners_safe is False
+        manager._notify_listeners(scenario, "deactivated")
+
+        assert events == [
+            ("first", "activated"), ("last", "activated"),
+            ("first", "deactivated"), ("last", "deactivated"),
+        ]
+
+
+class TestActiveScenarios:
+    def test_removed_scenario_leaves_active_set(self, manager):
+        async def run():
+            scenario = Scenario("s1", "Test")
+            manager.add_scenario(scenario)
+            assert await manager.activate_scenario("s1") is True
+            assert manager.get_active_scenarios() == [scenario]
+
+            assert manager.remove_scenario("s1") is True
+            assert manager.get_active_scenarios() == []
+            await asyncio.sleep(0)
+
+        asyncio.run(run())
+
+    def test_scenario_removed_during_activation_is_not_readded(self, manager):
+        events = []
+        manager.add_listener(lambda scenario, event: events.append(event))
+        scenario = Scenario("s1", "Test")
+        scenario.add_action(ScenarioAction("notify", delay=0.01))
+        manager.add_scenario(scenario)
+
+        async def run():
+            activation = asyncio.create_task(manager.activate_scenario("s1"))
+            await asyncio.sleep(0)
+            assert manager.remove_scenario("s1") is True
+            assert await activation is True
+
+        asyncio.run(run())
+        assert manager.get_active_scenarios() == []
+        assert not manager.active_scenarios
+        assert not manager.scenario_history
+        assert events == []
+
+
+class TestStatistics:
+    def test_activation_counts_follow_history_window(self, manager):
+        manager.scenario_history = type(manager.scenario_history)(maxlen=5)
+        first, second = Scenario("s1", "First"), Scenario("s2", "Second")
+        manager.add_scenario(first)
+        manager.add_scenario(second)
+
+        for _ in range(3):
+            manager._record_scenario_event(first, "activated")
+        for _ in range(4):
+            manager._record_scenario_event(second, "activated")
+
+        stats = manager.get_statistics()
+        assert stats["most_used_scenarios"] == [
+            {"name": "Second", "count": 4},
+            {"name": "First", "count": 1},
+        ]
+        assert stats["by_type"] == {"manual": 2}
+        assert stats["by_state"] == {"inactive": 2}
+        assert stats["total_history_events"] == 5
+
+    def test_state_columns_track_scenario_changes(self, manager):
+        scenario = Scenario("s1", "Test")
+        manager.add_scenario(scenario)
+
+        assert asyncio.run(manager.activate_scenario("s1")) is True
+        assert manager.get_statistics()["by_state"] == {"active": 1}
+
+        scenario.pause()
+        assert manager.get_statistics()["by_state"] == {"paused": 1}
+
+        manager.remove_scenario("s1")
+        assert manager.get_statistics()["by_state"] == {}
+        assert manager.get_statistics()["by_type"] == {}
+
+    def test_state_column_updates_immediately_inside_event_loop(self, manager):
+        scenario = Scenario("s1", "Test")
+        manager.add_scenario(scenario)
+
+        async def run():
+            assert await manager.activate_scenario("s1") is True
+            scenario.pause()
+            assert manager.get_statistics()["by_state"] == {"paused": 1}
+            scenario.resume()
+            assert manager.get_statistics()["by_state"] == {"active": 1}
+
+        asyncio.run(run())
+
+    def test_scenario_removed_during_activation_leaves_no_state(self, manager):
+        scenario = Scenario("s1", "Test")
+        scenario.add_action(ScenarioAction("notify", delay=0.01))
+        manager.add_scenario(scenario)
+
+        async def run():
+            activation = asyncio.create_task(manager.activate_scenario("s1"))
+            await asyncio.sleep(0)
+            manager.remove_scenario("s1")
+            await activation
+
+        asyncio.run(run())
+        stats = manager.get_statistics()
+        assert stats["total_scenarios"] == 0
+        assert stats["by_state"] == {}
+
+    def test_async_listeners_run_concurrently(self, manager):
+        events = []
+
+        async def slow(scenario, event):
+            await asyncio.sleep(0.05)
+            events.append(("slow", event))
+
+        async def failing(scenario, event):
+            raise RuntimeError("boom")
+
+        manager.add_listener(slow)
+        manager.add_listener(failing)
+        manager.add_listener(lambda s, e: events.append(("sync", e)))
+        assert manager._async_listeners == [slow, failing]
+
+        async def run():
+            manager._notify_listeners(Scenario("s1", "Test"), "activated")
+            assert events == [("sync", "activated")]
+            await asyncio.gather(*manager._listener_tasks, return_exceptions=True)
+
+        asyncio.run(run())
+        assert events == [("sync", "activated"), ("slow", "activated")]
+        assert not manager._listener_tasks
+
+        manager.remove_listener(slow)
+        assert manager._async_listeners == [failing]
+
+
+class TestEventDrivenEvaluation:
+    def test_state_update_wakes_evaluation_loop(self, manager):
+        scenario = Scenario("s1", "Office")
+        scenario.add_condition(ScenarioCondition("location", value="office"))
+        manager.add_scenario(scenario)
+        assert manager._needs_polling() is False
+
+        async def run():
+            await manager.start()
+            await asyncio.sleep(0.01)
+            assert scenario.state == ScenarioState.INACTIVE
+
+            manager.update_user_location("office")
+            for _ in range(50):
+                if scenario.state == ScenarioState.ACTIVE:
+                    break
+                await asyncio.sleep(0.01)
+            await manager.stop()
+
+        asyncio.run(run())
+        assert scenario.state == ScenarioState.ACTIVE
+
+    def test_updates_replace_state_and_rebuild_context(self, manager):
+        before = manager._build_context()
+        manager.update_device_state("tv", "on")
+        manager.update_user_presence("alice", True)
+        manager.update_weather({"temperature": 21})
+        after = manager._build_context()
+
+        assert after is not before
+        assert before["device_states"] == {}
+        assert after["device_states"] == {"tv": "on"}
+        assert after["user_presence"] == {"alice": True}
+        assert after["weather"] == {"temperature": 21}
+
+    def test_clock_driven_conditions_keep_polling(self, manager):
+        scenario = Scenario("s1", "Window")
+        scenario.add_condition(ScenarioCondition("time", operator="in_range",
+                                                 parameters={"start_time": 0, "end_time": 1}))
+        manager.add_scenario(scenario)
+        assert manager._needs_polling() is True
+
+    def test_polling_flag_is_cached_with_watched_keys(self, manager):
+        scenario = Scenario("s1", "Office")
+        scenario.add_condition(ScenarioCondition("location", value="office"))
+        manager.add_scenario(scenario)
+        assert manager._needs_polling() is False
+        assert scenario._watched_keys_stale is False
+
+        scenario.add_transition(ScenarioTransition("s1", "s2", conditions=[
+            ScenarioCondition("expression", parameters={"expression": "hour > 20"}),
+        ]))
+        assert manager._needs_polling() is True
+
+    def test_seconds_until_next_hour(self):
+        from butler.scenarios.scenario_manager import _seconds_until_next_hour
+
+        stamp = time.mktime((2024, 6, 1, 10, 59, 30, 0, 0, -1))
+        assert _seconds_until_next_hour(stamp) == pytest.approx(30.01)
+
+
+class TestIncrementalEvaluation:
+    def test_only_scenarios_with_changed_inputs_are_evaluated(self, manager):
+        condition = ScenarioCondition("location", value=["office", "lab"])
+        scenario = Scenario("s1", "Office")
+        scenario.add_condition(condition)
+        manager.add_scenario(scenario)
+        assert scenario.watched_keys == frozenset({"user_location"})
+
+        asyncio.run(manager._evaluate_scenarios())
+        assert condition._eval_count == 1
+
+        manager.update_device_state("tv", "on")
+        asyncio.run(manager._evaluate_scenarios())
+        assert condition._eval_count == 1
+
+        manager.update_user_location("office")
+        asyncio.run(manager._evaluate_scenarios())
+        assert condition._eval_count == 2
+        assert scenario.state == ScenarioState.ACTIVE
+
+    def test_paused_and_resumed_scenario_rechecks_transitions(self, manager):
+        source = Scenario("s1", "Source")
+        source.add_transition(ScenarioTransition("s1", "s2", conditions=[
+            ScenarioCondition("location", value="home"),
+        ]))
+        target = Scenario("s2", "Target")
+        manager.add_scenario(source)
+        manager.add_scenario(target)
+        manager.update_user_location("home")
+
+        async def run():
+            assert await manager.activate_scenario("s1") is True
+            source.pause()
+            await manager._evaluate_scenarios()
+            manager._wake.clear()
+
+            source.resume()
+            assert "s1" in manager._dirty
+            assert manager._wake.is_set()
+            await manager._evaluate_scenarios()
+
+        asyncio.run(run())
+        assert source.state == ScenarioState.INACTIVE
+        assert target.state == ScenarioState.ACTIVE
+
+    def test_enabling_a_condition_updates_watched_keys(self, manager):
+        condition = ScenarioCondition("weather", parameters={"condition": "condition"}, value="rain", enabled=False)
+        scenario = Scenario("s1", "Rain")
+        scenario.add_condition(ScenarioCondition("location", value="home"))
+        scenario.add_condition(condition)
+        assert scenario.watched_keys == frozenset({"user_location"})
+
+        condition.enabled = True
+        assert scenario.watched_keys == frozenset({"user_location", "weather"})
+
+    def test_required_context_filters_before_evaluation(self, manager):
+        condition = ScenarioCondition("time", value="never")
+        scenario = Scenario("s1", "Filtered")
+        scenario.add_condition(condition)
+        scenario.add_condition(ScenarioCondition("location", value="home"))
+        manager.add_scenario(scenario)
+        assert scenario.required_context == (("time_of_day", "never"), ("user_location", "home"))
+
+        asyncio.run(manager._evaluate_scenarios())
+        assert condition._eval_count == 0
+        assert scenario.state == ScenarioState.INACTIVE
+
+    def test_disabled_condition_no_longer_filters(self, manager):
+        condition = ScenarioCondition("location", value="office")
+        scenario = Scenario("s1", "Office")
+        scenario.add_condition(condition)
+        manager.add_scenario(scenario)
+        assert scenario.required_context == (("user_location", "office"),)
+
+        condition.enabled = False
+        manager._dirty.add("s1")
+        asyncio.run(manager._evaluate_scenarios())
+        assert scenario.required_context == ()
+        assert scenario.state == ScenarioState.ACTIVE
+
+    def test_custom_conditions_are_always_evaluated(self, manager):
+        calls = []
+        scenario = Scenario("s1", "Custom")
+        scenario.add_condition(ScenarioCondition("custom", parameters={"callback": lambda ctx: calls.append(1)}))
+        manager.add_scenario(scenario)
+        assert scenario.watched_keys is None
+
+        asyncio.run(manager._evaluate_scenarios())
+        manager.invalidate_context()
+        asyncio.run(manager._evaluate_scenarios())
+        assert len(calls) == 2
+
+
+class TestPersistence:
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_save_to_file(self, manager, tmp_path, monkeypatch, use_orjson):
+        from butler.scenarios import scenario_manager as module
+
+        if not use_orjson:
+            monkeypatch.setattr(module, "orjson", None)
+        manager.add_scenario(Scenario("s1", "Test"))
+        manager._record_scenario_event(manager.get_scenario("s1"), "activated")
+
+        sync_path = tmp_path / "sync.json"
+        async_path = tmp_path / "async.json"
+        manager.save_to_file(str(sync_path))
+        asyncio.run(manager.save_to_file_async(str(async_path)))
+
+        data = json.loads(sync_path.read_text(encoding="utf-8"))
+        assert data == json.loads(async_path.read_text(encoding="utf-8"))
+        assert [s["scenario_id"] for s in data["scenarios"]] == ["s1"]
+        assert len(data["templates"]) == len(manager.templates)
+        assert data["history"][0]["event_type"] == "activated"
+        assert "起床模式" in sync_path.read_text(encoding="utf-8")
+
+    def test_to_dict_is_cached_until_recompiled(self, manager):
+        template = ScenarioTemplate(
+            template_id="t", name="Template", description="", scenario_type=ScenarioType.MANUAL,
+        )
+        first = template.to_dict()
+        assert template.to_dict() is first
+        assert first["scenario_type"] == "manual"
+
+        template.description = "updated"
+        manager.register_template(template)
+        assert template.to_dict()["description"] == "updated"
+
+
+class TestEvaluationPass:
+    def test_scenario_removed_during_pass_is_skipped(self, manager):
+        first = Scenario("s1", "First")
+        first.add_condition(ScenarioCondition("location", value="home"))
+        second = Scenario("s2", "Second")
+        second.add_condition(ScenarioCondition("location", value="home"))
+        manager.add_scenario(first)
+        manager.add_scenario(second)
+        manager.add_listener(lambda scenario, event: manager.remove_scenario("s2"))
+
+        asyncio.run(manager._evaluate_scenarios())
+
+        assert first.state == ScenarioState.ACTIVE
+        assert second.state == ScenarioState.INACTIVE
+        assert manager.get_scenario("s2") is None
+
+    def test_activations_run_concurrently(self, manager):
+        scenarios = []
+        for i in range(3):
+            scenario = Scenario(f"s{i}", f"Scenario {i}")
+            scenario.add_condition(ScenarioCondition("location", value="home"))
+            scenario.add_action(ScenarioAction("notify", delay=0.1))
+            manager.add_scenario(scenario)
+            scenarios.append(scenario)
+
+        start = time.perf_counter()
+        asyncio.run(manager._evaluate_scenarios())
+        elapsed = time.perf_counter() - start
+
+        assert all(s.state == ScenarioState.ACTIVE for s in scenarios)
+        assert elapsed < 0.25
+
+    def test_transition_deactivates_source_and_activates_target(self, manager):
+        source = Scenario("s1", "Source")
+        target = Scenario("s2", "Target")
+        target.add_condition(ScenarioCondition("location", value="office"))
+        source.add_transition(ScenarioTransition("s1", "s2", conditions=[
+            ScenarioCondition("location", value="home"),
+        ]))
+        manager.add_scenario(source)
+        manager.add_scenario(target)
+        asyncio.run(manager.activate_scenario("s1"))
+
+        asyncio.run(manager._evaluate_scenarios())
+
+        assert source.state == ScenarioState.INACTIVE
+        assert target.state == ScenarioState.ACTIVE
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_load_from_file(self, manager, tmp_path, monkeypatch, use_orjson):
+        from butler.scenarios import scenario_manager as module
+
+        if not use_orjson:
+            monkeypatch.setattr(module, "orjson", None)
+        manager.register_template(ScenarioTemplate(
+            template_id="custom",
+            name="Custom",
+            description="",
+            scenario_type=ScenarioType.EVENT_BASED,
+            actions=[{"action_type": "notify", "parameters": {"message": "{message}"}}],
+        ))
+        path = tmp_path / "scenarios.json"
+        manager.save_to_file(str(path))
+
+        loaded = ScenarioManager()
+        wake_up = loaded.get_template("wake_up")
+        loaded.load_from_file(str(path))
+
+        assert loaded.get_template("wake_up") is wake_up
+        custom = loaded.get_template("custom")
+        assert custom.scenario_type == ScenarioType.EVENT_BASED
+        assert custom.to_dict() == manager.get_template("custom").to_dict()
+        assert custom.create_instance("Instance").scenario_type == ScenarioType.EVENT_BASED
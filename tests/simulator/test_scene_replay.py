@@ -0,0 +1,234 @@
+import pytest
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from butler.simulator import scene_replay
+from butler.simulator.scene_replay import SceneReplayer, ReplayEvent
+
+
+@pytest.fixture
+def replayer():
+    return SceneReplayer()
+
+
+class TestPersistence:
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_round_trip(self, replayer, tmp_path, monkeypatch, use_orjson):
+        if not use_orjson:
+            monkeypatch.setattr(scene_replay, "orjson", None)
+        session = replayer.create_session_from_events("Custom", "Recorded", [
+            ReplayEvent(timestamp=0.5, event_type="device_action", device_id="lamp", action="turn_on",
+                        params={"brightness": 40}),
+        ])
+        path = tmp_path / "sessions.json"
+        replayer.save_to_file(str(path))
+
+        data = json.loads(path.read_text(encoding="utf-8"))
+        assert data["session_count"] == len(replayer.sessions)
+        assert "晨间例行" in path.read_text(encoding="utf-8")
+
+        loaded = SceneReplayer.load_from_file(str(path))
+        restored = loaded.get_session(session.session_id)
+        assert restored.name == "Custom"
+        assert restored.events[0].params == {"brightness": 40}
+        assert restored.duration == 0.5
+
+    def test_orjson_output_matches_to_dict(self, replayer, tmp_path):
+        if scene_replay.orjson is None:
+            pytest.skip("orjson not installed")
+        path = tmp_path / "sessions.json"
+        replayer.save_to_file(str(path))
+        assert json.loads(path.read_text(encoding="utf-8")) == replayer.to_dict()
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_streamed_file_is_one_document(self, replayer, tmp_path, monkeypatch, use_orjson):
+        if not use_orjson:
+            monkeypatch.setattr(scene_replay, "orjson", None)
+        replayer.active_session = next(iter(replayer.sessions.values()))
+        path = tmp_path / "sessions.json"
+        replayer.save_to_file(str(path))
+        assert json.loads(path.read_text(encoding="utf-8")) == replayer.to_dict()
+
+        replayer.sessions.clear()
+        replayer.active_session = None
+        replayer.save_to_file(str(path))
+        assert json.loads(path.read_text(encoding="utf-8")) == {
+            "sessions": [], "session_count": 0, "active_session": None,
+        }
+
+    def test_empty_file_reports_a_decode_error(self, tmp_path):
+        path = tmp_path / "empty.json"
+        path.write_bytes(b"")
+        with pytest.raises(ValueError):
+            SceneReplayer.load_from_file(str(path))
+
+
+class TestModel:
+    def test_events_and_sessions_use_slots(self, replayer):
+        session = next(iter(replayer.sessions.values()))
+        assert not hasattr(session, "__dict__")
+        assert not hasattr(session.events[0], "__dict__")
+
+    def test_loaded_event_labels_are_interned(self, replayer, tmp_path):
+        path = tmp_path / "sessions.json"
+        replayer.save_to_file(str(path))
+        loaded = SceneReplayer.load_from_file(str(path))
+
+        events = [e for s in loaded.sessions.values() for e in s.events if e.event_type == "device_action"]
+        assert all(e.event_type is events[0].event_type for e in events)
+        turn_on = [e.action for e in events if e.action == "turn_on"]
+        assert len(turn_on) > 1 and all(a is turn_on[0] for a in turn_on)
+
+    def test_default_sessions_are_not_shared_between_replayers(self, replayer):
+        other = SceneReplayer()
+        mine = replayer.get_session("session_morning_routine")
+        theirs = other.get_session("session_morning_routine")
+        assert mine is not theirs
+
+        replayer.record_event(mine.session_id, ReplayEvent(timestamp=9.0, event_type="voice_command"))
+        mine.status = "failed"
+        assert len(theirs.events) == 7
+        assert theirs.duration == 4.0
+        assert theirs.status == "ready"
+
+
+class TestSearch:
+    def test_search_matches_name_or_description_and_sees_renames(self, replayer):
+        session = replayer.create_session_from_events("Porch Lights", "Evening ROUTINE", [])
+        assert replayer.search_sessions("porch") == [session]
+        assert replayer.search_sessions("routine") == [session]
+
+        session.name = "Garage"
+        assert replayer.search_sessions("porch") == []
+        assert replayer.search_sessions("GARAGE") == [session]
+
+
+class TestReplay:
+    def test_events_run_at_their_offsets(self, replayer, monkeypatch):
+        clock = [100.0]
+        sleeps = []
+        executed = []
+
+        def fake_sleep(seconds):
+            sleeps.append(round(seconds, 6))
+            clock[0] += seconds
+
+        monkeypatch.setattr(scene_replay.time, "monotonic", lambda: clock[0])
+        monkeypatch.setattr(scene_replay.time, "sleep", fake_sleep)
+        replayer.set_device_executor(lambda device_id, action, params: executed.append((clock[0], device_id)))
+
+        session = replayer.create_session_from_events("Timed", "", [
+            ReplayEvent(timestamp=0.0, event_type="voice_command", params={"text": "hi"}),
+            ReplayEvent(timestamp=1.0, event_type="device_action", device_id="a", action="on"),
+            ReplayEvent(timestamp=1.0, event_type="device_action", device_id="b", action="on"),
+            ReplayEvent(timestamp=3.0, event_type="device_action", device_id="c", action="on"),
+        ])
+
+        result = replayer.replay_session(session.session_id, speed=2.0)
+
+        assert result["success"] is True
+        assert result["events_executed"] == 4
+        assert sleeps == [0.5, 1.0]
+        assert executed == [(100.5, "a"), (100.5, "b"), (101.5, "c")]
+        assert result["duration"] == pytest.approx(1.5)
+
+    def test_compiled_columns_follow_recorded_events(self, replayer, monkeypatch):
+        monkeypatch.setattr(scene_replay.time, "sleep", lambda seconds: None)
+        executed = []
+        replayer.set_device_executor(lambda device_id, action, params: executed.append((device_id, action, params)))
+
+        session = replayer.create_session_from_events("Columns", "", [
+            ReplayEvent(timestamp=0.0, event_type="device_action", device_id="a", action="on", params={"x": 1}),
+            ReplayEvent(timestamp=0.2, event_type="mystery"),
+        ])
+        session._compile()
+        assert list(session._ts) == [0.0, 0.2]
+        assert list(session._ops) == [1, scene_replay._OP_UNKNOWN]
+
+        replayer.record_event(session.session_id, ReplayEvent(
+            timestamp=0.4, event_type="device_action", device_id="b", action="off"))
+        result = replayer.replay_session(session.session_id, speed=100.0)
+
+        assert result["events_executed"] == 3
+        assert session.duration == 0.4
+        assert list(session._ts) == [0.0, 0.2, 0.4]
+        assert executed == [("a", "on", {"x": 1}), ("b", "off", {})]
+
+    def test_replay_sees_edited_and_replaced_events(self, replayer, monkeypatch):
+        monkeypatch.setattr(scene_replay.time, "sleep", lambda seconds: None)
+        executed = []
+        replayer.set_device_executor(lambda device_id, action, params: executed.append((device_id, action)))
+
+        session = replayer.create_session_from_events("Edits", "", [
+            ReplayEvent(timestamp=0.0, event_type="device_action", device_id="a", action="on"),
+            ReplayEvent(timestamp=0.1, event_type="device_action", device_id="b", action="on"),
+        ])
+        replayer.replay_session(session.session_id, speed=100.0)
+
+        session.events[0].action = "off"
+        session.events[1] = ReplayEvent(timestamp=0.1, event_type="device_action", device_id="c", action="on")
+        replayer.replay_session(session.session_id, speed=100.0)
+
+        session.events = [
+            ReplayEvent(timestamp=0.0, event_type="device_action", device_id="d", action="on"),
+            ReplayEvent(timestamp=0.1, event_type="voice_command", params={"text": "hi"}),
+        ]
+        replayer.replay_session(session.session_id, speed=100.0)
+
+        assert executed == [("a", "on"), ("b", "on"), ("a", "off"), ("c", "on"), ("d", "on")]
+
+    def test_execute_event_dispatches_by_type(self, replayer, caplog):
+        executed = []
+        replayer.set_device_executor(lambda device_id, action, params: executed.append((device_id, action)))
+        replayer._execute_event(ReplayEvent(timestamp=0.0, event_type="device_action",
+                                            device_id="fan", action="on"), 1.0)
+        with caplog.at_level("INFO", logger=scene_replay.logger.name):
+            replayer._execute_event(ReplayEvent(timestamp=0.0, event_type="mystery"), 1.0)
+
+        assert executed == [("fan", "on")]
+        assert "Unknown event type: mystery" in caplog.text
+        assert set(scene_replay._EVENT_HANDLERS) == set(scene_replay._OPCODES)
+
+    def test_events_within_a_millisecond_share_one_wait(self, replayer, monkeypatch):
+        clock = [0.0]
+        sleeps = []
+
+        def fake_sleep(seconds):
+            sleeps.append(round(seconds, 6))
+            clock[0] += seconds + 0.0003
+
+        monkeypatch.setattr(scene_replay.time, "monotonic", lambda: clock[0])
+        monkeypatch.setattr(scene_replay.time, "sleep", fake_sleep)
+        replayer.set_device_executor(lambda device_id, action, params: None)
+
+        session = replayer.create_session_from_events("Dense", "", [
+            ReplayEvent(timestamp=1.0, event_type="device_action", device_id="a", action="on"),
+            ReplayEvent(timestamp=1.0004, event_type="device_action", device_id="b", action="on"),
+            ReplayEvent(timestamp=2.0, event_type="device_action", device_id="c", action="on"),
+        ])
+        result = replayer.replay_session(session.session_id)
+
+        assert result["events_executed"] == 3
+        assert sleeps == [1.0, 0.9997]
+        assert list(session._bucket_bounds) == [0, 2, 3]
+
+    def test_stop_on_error_halts_within_a_bucket(self, replayer, monkeypatch):
+        monkeypatch.setattr(scene_replay.time, "sleep", lambda seconds: None)
+        calls = []
+
+        def executor(device_id, action, params):
+            calls.append(device_id)
+            raise RuntimeError("offline")
+
+        replayer.set_device_executor(executor)
+        session = replayer.create_session_from_events("Broken", "", [
+            ReplayEvent(timestamp=0.0, event_type="device_action", device_id="a", action="on"),
+            ReplayEvent(timestamp=0.0, event_type="device_action", device_id="b", action="on"),
+        ])
+        result = replayer.replay_session(session.session_id, stop_on_error=True)
+
+        assert calls == ["a"]
+        assert result["events_failed"] == 1
@@ -0,0 +1,165 @@
+import pytest
+import json
+import threading
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from butler.simulator import test_framework as tf
+
+
+@pytest.fixture
+def framework():
+    return tf.TestFramework()
+
+
+class TestPersistence:
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_round_trip(self, framework, tmp_path, monkeypatch, use_orjson):
+        if not use_orjson:
+            monkeypatch.setattr(tf, "orjson", None)
+        framework.add_test_case(tf.TestCase(
+            test_id="custom", name="自定义", description="custom case",
+            test_func=lambda ctx: {"ok": True}, timeout=5.0,
+        ))
+        framework.run_test("custom")
+        path = tmp_path / "tests.json"
+        framework.save_to_file(str(path))
+
+        data = json.loads(path.read_text(encoding="utf-8"))
+        assert data["test_results"][0]["status"] == "passed"
+        assert data["statistics"]["passed"] == 1
+
+        loaded = tf.TestFramework.load_from_file(str(path))
+        assert loaded.get_test_case("custom").timeout == 5.0
+        assert loaded.get_test_case("custom").name == "自定义"
+
+    def test_orjson_output_matches_to_dict(self, framework, tmp_path):
+        if tf.orjson is None:
+            pytest.skip("orjson not installed")
+        framework.run_all_tests()
+        path = tmp_path / "tests.json"
+        framework.save_to_file(str(path))
+        assert json.loads(path.read_text(encoding="utf-8")) == framework.to_dict()
+
+
+def _fail(ctx):
+    raise AssertionError("boom")
+
+
+class TestStatistics:
+    def test_counts_follow_runs_and_clear(self, framework):
+        framework.add_test_case(tf.TestCase(test_id="bad", name="bad", description="", test_func=_fail))
+        framework.run_all_tests()
+        framework.run_test("bad")
+
+        stats = framework.get_statistics()
+        assert stats["total_runs"] == len(framework.test_results) == 10
+        assert stats["failed"] == 2
+        assert stats["passed"] == 8
+        assert stats["success_rate"] == pytest.approx(80.0)
+
+        framework.clear_results()
+        assert framework.get_statistics() == {
+            "total_runs": 0, "passed": 0, "failed": 0, "skipped": 0, "success_rate": 0.0,
+        }
+
+    def test_history_is_bounded_and_counts_track_it(self, framework):
+        framework.add_test_case(tf.TestCase(test_id="bad", name="bad", description="", test_func=_fail))
+        framework.run_test("bad")
+        for _ in range(framework.test_results.maxlen):
+            framework.run_test("test_light_control")
+
+        assert len(framework.test_results) == framework.test_results.maxlen
+        assert framework.get_statistics()["failed"] == 0
+        assert framework.get_statistics()["passed"] == framework.test_results.maxlen
+
+        recent = framework.get_test_results(limit=3)
+        assert recent == list(framework.test_results)[-3:]
+        assert len(framework.to_dict()["test_results"]) == 50
+
+
+class TestTimeout:
+    def test_stuck_test_fails_after_its_timeout(self, framework):
+        release = threading.Event()
+        framework.add_test_case(tf.TestCase(
+            test_id="stuck", name="stuck", description="",
+            test_func=lambda ctx: release.wait(5), timeout=0.05,
+        ))
+        try:
+            result = framework.run_test("stuck")
+        finally:
+            release.set()
+
+        assert result.status == tf.TestStatus.FAILED
+        assert result.error_message == "Timeout after 0.05s"
+        assert result.duration < 5
+        assert framework._timeout_executor is None
+
+    def test_assertions_still_surface_from_the_worker(self, framework):
+        framework.add_test_case(tf.TestCase(test_id="bad", name="bad", description="", test_func=_fail))
+        result = framework.run_test("bad")
+        assert result.status == tf.TestStatus.FAILED
+        assert result.error_message == "boom"
+
+    def test_timeout_error_raised_by_the_test_is_not_a_timeout(self, framework):
+        def raises_timeout(ctx):
+            raise TimeoutError("device did not answer")
+
+        framework.add_test_case(tf.TestCase(test_id="t", name="t", description="", test_func=raises_timeout))
+        result = framework.run_test("t")
+        assert result.status == tf.TestStatus.FAILED
+        assert result.error_message == "device did not answer"
+
+    def test_non_positive_timeout_runs_inline(self, framework):
+        threads = []
+        framework.add_test_case(tf.TestCase(
+            test_id="inline", name="inline", description="",
+            test_func=lambda ctx: threads.append(threading.current_thread()), timeout=0,
+        ))
+        assert framework.run_test("inline").status == tf.TestStatus.PASSED
+        assert threads == [threading.current_thread()]
+        assert framework._timeout_executor is None
+
+    def test_worker_pool_is_reused_between_tests(self, framework):
+        framework.add_test_case(tf.TestCase(test_id="a", name="a", description="", test_func=lambda ctx: None))
+        framework.run_test("a")
+        executor = framework._timeout_executor
+        framework.run_test("a")
+        assert executor is not None
+        assert framework._timeout_executor is executor
+
+
+class TestSearch:
+    def test_search_is_case_insensitive_and_sees_renames(self, framework):
+        framework.add_test_case(tf.TestCase(test_id="Custom_Case", name="Door Lock", description="Checks LOCKS"))
+        assert [t.test_id for t in framework.search_tests("door")] == ["Custom_Case"]
+        assert [t.test_id for t in framework.search_tests("custom_")] == ["Custom_Case"]
+
+        framework.get_test_case("Custom_Case").name = "Window"
+        framework.get_test_case("Custom_Case").description = ""
+        assert framework.search_tests("door") == []
+        assert [t.test_id for t in framework.search_tests("WINDOW")] == ["Custom_Case"]
+
+
+class TestRunAll:
+    def test_parallel_runs_tests_concurrently_in_order(self, framework):
+        for test_case in framework.list_test_cases():
+            test_case.enabled = False
+        barrier = threading.Barrier(3, timeout=5)
+
+        def wait(ctx):
+            ctx["seen"] = True
+            barrier.wait()
+            return {"ok": True}
+
+        for i in range(3):
+            framework.add_test_case(tf.TestCase(test_id=f"p{i}", name=f"p{i}", description="", test_func=wait))
+        context = {}
+        summary = framework.run_all_tests(context, parallel=True)
+
+        assert summary["passed"] == 3
+        assert [r["test_id"] for r in summary["results"]] == ["p0", "p1", "p2"]
+        assert context == {}
+        assert framework.get_statistics()["total_runs"] == 3
@@ -0,0 +1,216 @@
+import pytest
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from butler.simulator import virtual_device as vd
+from butler.simulator.virtual_device import VirtualDevice, VirtualDeviceManager, VirtualDeviceType
+
+
+@pytest.fixture
+def manager():
+    return VirtualDeviceManager()
+
+
+class TestExecuteCommand:
+    def test_dispatches_by_device_type(self, manager):
+        result = manager.execute_command("living_room_light", "turn_on", {"brightness": 30})
+        assert result["success"] is True
+        assert result["message"] == "已打开 客厅灯"
+        assert manager.get_device("living_room_light").state["brightness"] == 30
+
+        result = manager.execute_command("front_door_lock", "unlock", {})
+        assert result["success"] is True
+        assert manager.get_device("front_door_lock").state["state"] == "unlocked"
+
+    def test_unsupported_type_keeps_the_envelope(self):
+        device = VirtualDevice(device_id="misc", name="杂项", device_type=VirtualDeviceType.OTHER)
+        result = device.execute_command("poke", {"x": 1})
+        assert result["success"] is False
+        assert result["device_id"] == "misc"
+        assert result["command"] == "poke"
+        assert result["message"] == f"不支持的设备类型: {VirtualDeviceType.OTHER}"
+
+    def test_unavailable_device_is_rejected(self, manager):
+        manager.set_device_availability("bedroom_light", False)
+        result = manager.execute_command("bedroom_light", "turn_on", {})
+        assert result["success"] is False
+        assert result["message"] == "设备 卧室灯 不可用"
+
+    @pytest.mark.parametrize("device_id,command,params,key,expected", [
+        ("living_room_light", "set_brightness", {"value": 40}, "brightness", 40),
+        ("living_room_light", "set_color_temp", {}, "color_temp", 3000),
+        ("living_room_ac", "set_temperature", {"value": 26}, "temperature", 26),
+        ("living_room_ac", "set_mode", {"mode": "heat"}, "mode", "heat"),
+        ("living_room_curtain", "set_position", {"value": 0}, "state", "closed"),
+        ("temperature_sensor", "simulate_value", {"value": 30.0}, "value", 30.0),
+        ("living_room_camera", "start_recording", {}, "recording", True),
+    ])
+    def test_command_tables_update_state(self, manager, device_id, command, params, key, expected):
+        result = manager.execute_command(device_id, command, params)
+        assert result["success"] is True
+        assert result["state"][key] == expected
+
+    def test_unknown_command_reports_the_device_kind(self, manager):
+        result = manager.execute_command("living_room_curtain", "spin", {})
+        assert result == {"success": False, "message": "不支持的窗帘命令: spin"}
+
+    def test_failure_messages(self, manager):
+        assert manager.execute_command("garage", "open", {}) == {"success": False, "message": "设备不存在: garage"}
+
+        result = manager.execute_command("living_room_curtain", "set_position", {"value": "half"})
+        assert result["success"] is False
+        assert result["message"].startswith("命令执行失败: ")
+
+    def test_one_clock_read_per_command(self, monkeypatch):
+        ticks = iter(range(100, 200))
+        monkeypatch.setattr(vd.time, "time", lambda: float(next(ticks)))
+        events = []
+        device = VirtualDevice(device_id="lamp", name="台灯", device_type=VirtualDeviceType.LIGHT,
+                               event_callback=events.append)
+
+        device.execute_command("turn_on", {})
+        device.execute_command("turn_off", {})
+
+        assert [e["timestamp"] for e in events] == [100.0, 101.0]
+        assert next(ticks) == 102
+
+    def test_multi_key_commands_emit_one_bulk_event(self):
+        events = []
+        device = VirtualDevice(device_id="lamp", name="台灯", device_type=VirtualDeviceType.LIGHT,
+                               state={"state": "off", "brightness": 50}, event_callback=events.append)
+
+        device.execute_command("turn_on", {"brightness": 10, "color": "warm"})
+        device.execute_command("turn_on", {})
+
+        bulk, single = events
+        assert bulk["event_type"] == "state_change_bulk"
+        assert bulk["changes"] == {"state": "on", "brightness": 10, "color": "warm"}
+        assert bulk["old_values"] == {"state": "off", "brightness": 50, "color": None}
+        assert single["event_type"] == "state_change"
+        assert single["key"] == "state"
+        assert device.state == {"state": "on", "brightness": 10, "color": "warm"}
+
+
+class TestModel:
+    def test_devices_use_slots(self, manager):
+        device = manager.get_device("living_room_light")
+        assert not hasattr(device, "__dict__")
+        with pytest.raises(AttributeError):
+            device.nickname = "lamp"
+
+    def test_capabilities_are_frozen_and_saved_sorted(self, manager, tmp_path):
+        device = VirtualDevice(device_id="plug", name="插座", device_type=VirtualDeviceType.SWITCH,
+                               capabilities=["turn_off", "turn_on"])
+        assert device.capabilities == frozenset({"turn_on", "turn_off"})
+        assert device.has_capability("turn_on")
+        assert not device.has_capability("play")
+
+        manager.add_device(device)
+        path = tmp_path / "devices.json"
+        manager.save_to_file(str(path))
+        loaded = VirtualDeviceManager.load_from_file(str(path))
+        assert loaded.get_device("plug").capabilities == device.capabilities
+        assert loaded.get_device("plug").to_dict()["capabilities"] == ["turn_off", "turn_on"]
+        assert loaded.get_device("plug").to_dict()["device_type"] == "switch"
+        assert "_type_value" not in device.to_dict()
+
+    def test_equal_capability_sets_are_shared(self, manager, tmp_path):
+        path = tmp_path / "devices.json"
+        manager.save_to_file(str(path))
+        loaded = VirtualDeviceManager.load_from_file(str(path))
+
+        assert loaded.get_device("bedroom_ac").capabilities is manager.get_device("living_room_ac").capabilities
+        plug = VirtualDevice(device_id="plug", name="插座", device_type=VirtualDeviceType.SWITCH,
+                             capabilities=["turn_on", "turn_off"])
+        assert plug.capabilities is vd._SWITCH_CAPABILITIES
+
+
+class TestManager:
+    def test_search_by_name_or_id_tracks_changes(self, manager):
+        assert {d.device_id for d in manager.search_devices("BEDROOM")} == {"bedroom_light", "bedroom_ac"}
+        assert [d.device_id for d in manager.search_devices("前门")] == ["front_door_lock"]
+
+        manager.get_device("front_door_lock").name = "后门锁"
+        manager.remove_device("bedroom_ac")
+        assert manager.search_devices("前门") == []
+        assert [d.device_id for d in manager.search_devices("后门")] == ["front_door_lock"]
+        assert [d.device_id for d in manager.search_devices("bedroom")] == ["bedroom_light"]
+
+    def test_list_devices_by_type_follows_adds_and_removes(self, manager):
+        lights = [d.device_id for d in manager.list_devices(VirtualDeviceType.LIGHT)]
+        assert lights == ["living_room_light", "bedroom_light", "kitchen_light"]
+        assert list(manager.list_devices(VirtualDeviceType.MEDIA_PLAYER)) == []
+
+        manager.add_device(VirtualDevice(device_id="kitchen_light", name="厨房插座", device_type=VirtualDeviceType.SWITCH))
+        manager.remove_device("bedroom_light")
+        assert [d.device_id for d in manager.list_devices(VirtualDeviceType.LIGHT)] == ["living_room_light"]
+        assert [d.device_id for d in manager.list_devices(VirtualDeviceType.SWITCH)] == ["kitchen_light"]
+        assert len(manager.list_devices()) == 9
+
+    def test_list_devices_returns_live_views(self, manager):
+        everything = manager.list_devices()
+        locks = manager.list_devices(VirtualDeviceType.LOCK)
+        manager.add_device(VirtualDevice(device_id="back_door_lock", name="后门锁", device_type=VirtualDeviceType.LOCK))
+        assert len(everything) == 11
+        assert [d.device_id for d in locks] == ["front_door_lock", "back_door_lock"]
+
+    def test_state_changes_without_listeners_still_apply(self, caplog):
+        device = VirtualDevice(device_id="ac", name="空调", device_type=VirtualDeviceType.CLIMATE)
+        device.execute_command("set_temperature", {"value": 20})
+        device.set_state("mode", "cool")
+        assert device.state == {"temperature": 20, "state": "on", "mode": "cool"}
+
+        with caplog.at_level("DEBUG", logger=vd.logger.name):
+            device.set_state("mode", "heat")
+        assert "mode changed from cool to heat" in caplog.text
+
+
+class TestPersistence:
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_round_trip(self, manager, tmp_path, monkeypatch, use_orjson):
+        if not use_orjson:
+            monkeypatch.setattr(vd, "orjson", None)
+        manager.execute_command("living_room_ac", "set_temperature", {"value": 19})
+        path = tmp_path / "devices.json"
+        manager.save_to_file(str(path))
+
+        assert json.loads(path.read_text(encoding="utf-8")) == manager.to_dict()
+        assert "客厅空调" in path.read_text(encoding="utf-8")
+
+        loaded = VirtualDeviceManager.load_from_file(str(path))
+        ac = loaded.get_device("living_room_ac")
+        assert ac.state["temperature"] == 19
+        assert ac.device_type is VirtualDeviceType.CLIMATE
+
+    def test_load_restores_exactly_the_saved_devices(self, manager, tmp_path):
+        manager.remove_device("kitchen_light")
+        path = tmp_path / "devices.json"
+        manager.save_to_file(str(path))
+
+        loaded = VirtualDeviceManager.load_from_file(str(path))
+        assert set(loaded.devices) == set(manager.devices)
+        assert loaded.get_device("kitchen_light") is None
+
+    def test_managers_do_not_share_default_state(self, manager):
+        other = VirtualDeviceManager()
+        manager.execute_command("kitchen_light", "turn_on", {})
+        assert other.get_device("kitchen_light").state["state"] == "off"
+        assert VirtualDeviceManager(load_defaults=False).devices == {}
+
+    def test_batch_execute_keeps_order_and_defaults_params(self, manager):
+        results = manager.batch_execute_commands([
+            {"device_id": "bedroom_light", "command": "turn_on"},
+            {"device_id": "nowhere", "command": "turn_on"},
+            {"device_id": "front_door_lock", "command": "unlock", "params": None},
+        ])
+        assert [r["success"] for r in results] == [True, False, True]
+        assert manager.get_device("front_door_lock").state["state"] == "unlocked"
+
+    def test_unknown_device_type_in_file_is_rejected(self, tmp_path):
+        path = tmp_path / "devices.json"
+        path.write_text(json.dumps({"devices": [{"device_id": "x", "name": "x", "device_type": "toaster"}]}))
+        with pytest.raises(ValueError):
+            VirtualDeviceManager.load_from_file(str(path))
@@ -0,0 +1,38 @@
+import pytest
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from butler.skills.builtin import DeviceSkill, NotificationSkill
+from butler.skills.skill_base import SkillContext
+
+
+@pytest.fixture
+def context():
+    return SkillContext(conversation_id="test")
+
+
+class TestDeviceSkill:
+    def test_commands_dispatch_to_their_handlers(self, context):
+        skill = DeviceSkill()
+        result = asyncio.run(skill.execute("turn_on", {"device_id": "lamp", "brightness": 40}, context))
+        assert result.success is True
+        assert skill.devices["lamp"] == {"state": "on", "brightness": 40}
+
+        result = asyncio.run(skill.execute("turn_off", {"device_id": "lamp"}, context))
+        assert result.success is True
+        assert skill.devices["lamp"]["state"] == "off"
+
+    def test_dispatch_table_covers_declared_commands(self):
+        assert set(DeviceSkill()._dispatch) == set(DeviceSkill.commands)
+
+
+class TestNotificationSkill:
+    def test_send_dispatches_to_handler(self, context):
+        skill = NotificationSkill()
+        result = asyncio.run(skill.execute("send", {"message": "hello"}, context))
+        assert result.success is True
+        assert len(skill.notifications) == 1
+        assert set(skill._dispatch) == set(NotificationSkill.commands)